@@ -1,6 +1,5 @@
 import streamlit as st
 from PIL import Image
-import io
 import os
 from datetime import datetime
 
@@ -253,11 +252,42 @@ if 'divisao' not in st.session_state:
     st.session_state.divisao = None
 if 'mensagens_cobranca' not in st.session_state:
     st.session_state.mensagens_cobranca = {}
+# Churrasco das cobranças Pix: cada nota lida é um evento novo no livro de cobranças
+if 'evento_cobranca' not in st.session_state:
+    st.session_state.evento_cobranca = ""
 if 'historico_churrascos' not in st.session_state:
     st.session_state.historico_churrascos = []
 if 'templates_salvos' not in st.session_state:
     st.session_state.templates_salvos = []
 
+# ============================================
+# RENDERIZAÇÃO DA LISTA DE COMPRAS
+# ============================================
+CABECALHOS_CATEGORIAS = {
+    "carnes": '<div class="categoria-header">🥩 CARNES</div>',
+    "bebidas": '<div class="categoria-header categoria-header-blue">🍺 BEBIDAS</div>',
+    "acompanhamentos": '<div class="categoria-header categoria-header-green">🥗 ACOMPANHAMENTOS</div>',
+    "carvao_gelo": '<div class="categoria-header">🔥 CARVÃO & GELO</div>',
+}
+
+
+def renderizar_categoria(categoria: str, itens: list):
+    """Mostra o cabeçalho e os itens de uma categoria da lista de compras."""
+    st.markdown(CABECALHOS_CATEGORIAS[categoria], unsafe_allow_html=True)
+    for item in itens:
+        col1, col2, col3 = st.columns([3, 1, 1])
+        with col1:
+            if categoria == "bebidas":
+                emoji = "🍺" if item.get('alcoolica') else "🥤"
+                st.write(f"{emoji} **{item['item']}**")
+            else:
+                st.write(f"**{item['item']}**")
+        with col2:
+            st.write(item['quantidade'])
+        with col3:
+            st.write(f"R$ {item['preco_estimado']:.2f}")
+
+
 # ============================================
 # SIDEBAR - CONFIGURAÇÕES
 # ============================================
@@ -292,6 +322,10 @@ with st.sidebar:
                 st.session_state.custom_api_key = api_key
                 if api_key:
                     os.environ["CUSTOM_OPENAI_API_KEY"] = api_key
+            elif os.environ.pop("CUSTOM_OPENAI_API_KEY", None):
+                # Voltou pra chave do sistema: tira o cliente da chave antiga do pool
+                from utils import descartar_clientes_openai
+                descartar_clientes_openai("custom")
     else:
         # Se NÃO tem chave no ambiente, mostra o campo obrigatório em destaque
         st.warning("⚠️ IA não configurada")
@@ -310,6 +344,9 @@ with st.sidebar:
         if api_key:
             os.environ["CUSTOM_OPENAI_API_KEY"] = api_key
             st.success("✅ Chave salva!")
+        elif os.environ.pop("CUSTOM_OPENAI_API_KEY", None):
+            from utils import descartar_clientes_openai
+            descartar_clientes_openai("custom")
     
     st.markdown("---")
     
@@ -333,6 +370,10 @@ with st.sidebar:
         placeholder="Sua cidade"
     )
     
+    from utils import textos_cortados
+    for aviso in textos_cortados(pix_nome, pix_cidade):
+        st.warning(f"✂️ No Pix, {aviso}")
+    
     st.markdown("---")
     
     # Histórico
@@ -344,9 +385,67 @@ with st.sidebar:
             st.rerun()
     else:
         st.caption("Nenhum churrasco salvo ainda")
-    
+
     st.markdown("---")
-    
+
+    # Painel admin (só aparece com CHURRASCO_ADMIN=1)
+    if os.environ.get("CHURRASCO_ADMIN") == "1":
+        with st.expander("📊 Painel admin"):
+            from utils import (
+                metricas_chamadas_ia, exportar_metricas_prometheus, exportar_metricas_json, estatisticas_cache,
+                estatisticas_limite_taxa, estatisticas_voo_unico, estatisticas_clientes_openai,
+                estatisticas_pool_mensagens, estatisticas_roteamento, estatisticas_cassete, estatisticas_qrcode
+            )
+            from concorrencia_utils import semaforo_ia
+
+            metricas = metricas_chamadas_ia()
+            if metricas["funcoes"]:
+                st.dataframe([
+                    {
+                        "função": funcao,
+                        "chamadas": m["chamadas"],
+                        "erros": m["erros"],
+                        "retries": m["retries"],
+                        "p50 (s)": m["latencia_s"]["p50"],
+                        "p95 (s)": m["latencia_s"]["p95"],
+                        "1º token p50 (s)": m["primeiro_token_s"]["p50"],
+                        "tokens": m["tokens_entrada"] + m["tokens_saida"],
+                        "cache hits": m["cache_hits"],
+                        "locais": m["respostas_locais"],
+                        "custo (US$)": round(m["custo_usd"], 4),
+                    }
+                    for funcao, m in metricas["funcoes"].items()
+                ], hide_index=True)
+            else:
+                st.caption("Nenhuma chamada registrada ainda")
+
+            st.markdown("**Cache**")
+            st.json(estatisticas_cache(), expanded=False)
+            st.markdown("**Limitador de taxa**")
+            st.json(estatisticas_limite_taxa(), expanded=False)
+            st.markdown("**Roteamento de modelos**")
+            st.json(estatisticas_roteamento(), expanded=False)
+            st.markdown("**Chamadas coalescidas / pool de mensagens / semáforo / clientes / cassete / QR codes**")
+            st.json({
+                "voo_unico": estatisticas_voo_unico(),
+                "pool_mensagens": estatisticas_pool_mensagens(),
+                "semaforo": semaforo_ia.estatisticas(),
+                "clientes": estatisticas_clientes_openai(),
+                "cassete": estatisticas_cassete(),
+                "qrcode": estatisticas_qrcode(),
+            }, expanded=False)
+
+            st.download_button(
+                "⬇️ Prometheus", exportar_metricas_prometheus(),
+                file_name="metricas.prom", mime="text/plain"
+            )
+            st.download_button(
+                "⬇️ JSON", exportar_metricas_json(),
+                file_name="metricas.json", mime="application/json"
+            )
+
+        st.markdown("---")
+
     # About
     st.markdown("### 📌 Sobre")
     st.markdown("""
@@ -407,12 +506,64 @@ with tab1:
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
         calcular_btn = st.button("🤖 Calcular com IA", use_container_width=True, type="primary")
+        ignorar_cache = st.checkbox(
+            "🔄 Pedir resposta nova da IA",
+            help="Ignora listas já calculadas para descrições parecidas e sempre consulta a IA"
+        )
+    
+    with st.expander("⚡ Modo rápido: calcular na hora, sem esperar a IA"):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            rapido_homens = st.number_input("Homens", min_value=0, max_value=500, value=5)
+            rapido_mulheres = st.number_input("Mulheres", min_value=0, max_value=500, value=5)
+        with col2:
+            rapido_criancas = st.number_input("Crianças", min_value=0, max_value=500, value=0)
+            rapido_vegetarianos = st.number_input("Vegetarianos", min_value=0, max_value=500, value=0)
+        with col3:
+            rapido_horas = st.number_input("Duração (horas)", min_value=1, max_value=24, value=4)
+            rapido_bebedores = st.number_input("Quantos bebem", min_value=0, max_value=1000, value=8)
+        rapido_bebem_muito = st.checkbox("🍺 A galera bebe MUITO")
+        rapido_textos_ia = st.checkbox("🤖 Resumo e dicas engraçadas com IA", help="Só o texto vem da IA; as quantidades são calculadas na hora")
+        
+        if st.button("⚡ Calcular na hora", use_container_width=True):
+            from utils import gerar_lista_churrasco_local, salvar_historico_local
+            espec = {
+                "homens": rapido_homens,
+                "mulheres": rapido_mulheres,
+                "criancas": rapido_criancas,
+                "vegetarianos": rapido_vegetarianos,
+                "duracao_horas": rapido_horas,
+                "bebedores": rapido_bebedores,
+                "bebem_muito": rapido_bebem_muito,
+            }
+            resultado = gerar_lista_churrasco_local(espec, textos_com_ia=rapido_textos_ia, descricao=descricao)
+            st.session_state.lista_compras = resultado
+            st.session_state.historico_churrascos.append(salvar_historico_local({
+                "tipo": "planejamento",
+                "descricao": descricao,
+                "espec": espec,
+                "resultado": resultado
+            }))
     
     if calcular_btn and descricao.strip():
+        # Mostra cada categoria assim que ela chega, antes da resposta inteira
+        area_parcial = st.empty()
         with st.spinner("🥩 Consultando o Mestre do Churrasco..."):
             try:
-                from utils import gerar_lista_churrasco, salvar_historico_local
-                resultado = gerar_lista_churrasco(descricao)
+                from utils import gerar_lista_churrasco_stream, salvar_historico_local, CATEGORIAS_LISTA, FIM_STREAM
+                resultado = None
+                recebidas = {}
+                for campo, valor in gerar_lista_churrasco_stream(
+                    descricao, usar_cache=not ignorar_cache, permitir_local=not ignorar_cache
+                ):
+                    if campo == FIM_STREAM:
+                        resultado = valor
+                    elif campo in CATEGORIAS_LISTA and isinstance(valor, list):
+                        recebidas[campo] = valor
+                        with area_parcial.container():
+                            for categoria, itens in recebidas.items():
+                                renderizar_categoria(categoria, itens)
+                area_parcial.empty()
                 st.session_state.lista_compras = resultado
                 
                 # Salvar no histórico
@@ -438,6 +589,8 @@ with tab1:
             <h3>🎉 {lista.get('resumo', 'Lista pronta!')}</h3>
         </div>
         """, unsafe_allow_html=True)
+        if lista.get('origem') == 'local':
+            st.caption("⚡ Calculado na hora pelas regras do Mestre, sem esperar a IA")
         
         # Métricas
         col1, col2, col3 = st.columns(3)
@@ -464,46 +617,9 @@ with tab1:
             """, unsafe_allow_html=True)
         
         # Categorias
-        st.markdown('<div class="categoria-header">🥩 CARNES</div>', unsafe_allow_html=True)
-        for item in lista.get('carnes', []):
-            col1, col2, col3 = st.columns([3, 1, 1])
-            with col1:
-                st.write(f"**{item['item']}**")
-            with col2:
-                st.write(item['quantidade'])
-            with col3:
-                st.write(f"R$ {item['preco_estimado']:.2f}")
-        
-        st.markdown('<div class="categoria-header categoria-header-blue">🍺 BEBIDAS</div>', unsafe_allow_html=True)
-        for item in lista.get('bebidas', []):
-            col1, col2, col3 = st.columns([3, 1, 1])
-            with col1:
-                emoji = "🍺" if item.get('alcoolica') else "🥤"
-                st.write(f"{emoji} **{item['item']}**")
-            with col2:
-                st.write(item['quantidade'])
-            with col3:
-                st.write(f"R$ {item['preco_estimado']:.2f}")
-        
-        st.markdown('<div class="categoria-header categoria-header-green">🥗 ACOMPANHAMENTOS</div>', unsafe_allow_html=True)
-        for item in lista.get('acompanhamentos', []):
-            col1, col2, col3 = st.columns([3, 1, 1])
-            with col1:
-                st.write(f"**{item['item']}**")
-            with col2:
-                st.write(item['quantidade'])
-            with col3:
-                st.write(f"R$ {item['preco_estimado']:.2f}")
-        
-        st.markdown('<div class="categoria-header">🔥 CARVÃO & GELO</div>', unsafe_allow_html=True)
-        for item in lista.get('carvao_gelo', []):
-            col1, col2, col3 = st.columns([3, 1, 1])
-            with col1:
-                st.write(f"**{item['item']}**")
-            with col2:
-                st.write(item['quantidade'])
-            with col3:
-                st.write(f"R$ {item['preco_estimado']:.2f}")
+        from utils import CATEGORIAS_LISTA
+        for categoria in CATEGORIAS_LISTA:
+            renderizar_categoria(categoria, lista.get(categoria, []))
         
         # Total
         st.markdown(f"""
@@ -550,18 +666,21 @@ with tab1:
 with tab2:
     st.markdown("### 📸 Tire foto da notinha do mercado!")
     
-    uploaded_file = st.file_uploader(
-        "Upload da nota fiscal",
+    uploaded_files = st.file_uploader(
+        "Upload das notas fiscais",
         type=['png', 'jpg', 'jpeg'],
-        help="Pode ser foto do celular mesmo, não precisa ser perfeita!"
+        accept_multiple_files=True,
+        help="Pode mandar várias (açougue, mercado, gelo...) e foto do celular mesmo, não precisa ser perfeita!"
     )
     
-    if uploaded_file:
+    if uploaded_files:
         col1, col2 = st.columns([1, 1])
         
         with col1:
-            image = Image.open(uploaded_file)
-            st.image(image, caption="📄 Sua nota fiscal", use_container_width=True)
+            for arquivo in uploaded_files:
+                image = Image.open(arquivo)
+                legenda = "📄 Sua nota fiscal" if len(uploaded_files) == 1 else f"📄 {arquivo.name}"
+                st.image(image, caption=legenda, use_container_width=True)
         
         with col2:
             st.markdown("""
@@ -576,20 +695,44 @@ with tab2:
             </div>
             """, unsafe_allow_html=True)
             
-            processar_btn = st.button("🔍 Ler Nota com IA", use_container_width=True, type="primary")
+            from imagem_utils import PERFIS_PREPROCESSAMENTO, PERFIL_PADRAO
+            perfil_imagem = st.select_slider(
+                "Qualidade x velocidade",
+                options=list(PERFIS_PREPROCESSAMENTO.keys()),
+                value=PERFIL_PADRAO,
+                help="Economia envia uma imagem menor (mais rápido e barato); Detalhe ajuda em notas com letra miúda"
+            )
+            
+            texto_botao = "🔍 Ler Nota com IA" if len(uploaded_files) == 1 else f"🔍 Ler {len(uploaded_files)} Notas com IA"
+            processar_btn = st.button(texto_botao, use_container_width=True, type="primary")
         
         if processar_btn:
             with st.spinner("🤖 Lendo os itens da nota..."):
                 try:
-                    from utils import extrair_itens_nota
-                    img_bytes = io.BytesIO()
-                    image.save(img_bytes, format='JPEG')
-                    resultado = extrair_itens_nota(img_bytes.getvalue())
+                    from utils import extrair_varias_notas
+                    from imagem_utils import formatar_bytes
+                    leitura = extrair_varias_notas(
+                        [(arquivo.name, arquivo.getvalue()) for arquivo in uploaded_files],
+                        perfil=perfil_imagem
+                    )
                     
-                    if 'erro' in resultado:
-                        st.error(f"❌ {resultado['erro']}")
-                    else:
-                        st.session_state.itens_nota = resultado
+                    if leitura["relatorios"]:
+                        relatorios = leitura["relatorios"].values()
+                        originais = sum(r["bytes_originais"] for r in relatorios)
+                        finais = sum(r["bytes_finais"] for r in relatorios)
+                        faixas = sum(r.get("faixas", 0) for r in relatorios)
+                        st.caption(
+                            f"📉 Imagens otimizadas: {formatar_bytes(originais)} → {formatar_bytes(finais)}"
+                            + (f" · 🧾 notas compridas lidas em {faixas} faixas" if faixas else "")
+                        )
+                    
+                    for nome, erro in leitura["erros"].items():
+                        st.error(f"❌ {nome}: {erro}")
+                    
+                    if leitura["nota"]:
+                        from utils import gerar_id_churrasco
+                        st.session_state.itens_nota = leitura["nota"]
+                        st.session_state.evento_cobranca = gerar_id_churrasco()
                 except Exception as e:
                     st.error(f"❌ Erro ao processar: {str(e)}")
     
@@ -610,12 +753,17 @@ with tab2:
                 if nota.get('data_compra'):
                     st.info(f"📅 {nota.get('data_compra')}")
         
+        if nota.get('itens_sem_preco'):
+            st.warning(f"⚠️ Não deu pra ler o preço de: {', '.join(nota['itens_sem_preco'])}")
+        
         # Lista de itens
+        varias_notas = len(nota.get('notas', [])) > 1
         for item in nota['itens']:
             emoji = "🍺" if item.get('alcoolica') else "🛒"
+            origem = f" <small style='color: #777;'>· {item['origem']}</small>" if varias_notas and item.get('origem') else ""
             st.markdown(f"""
             <div class="item-card">
-                <span>{emoji} {item['nome']}</span>
+                <span>{emoji} {item['nome']}{origem}</span>
                 <span style="color: #38ef7d; font-weight: 600;">R$ {item['preco']:.2f}</span>
             </div>
             """, unsafe_allow_html=True)
@@ -715,6 +863,26 @@ with tab2:
                         value=pix_key_default or "seupix@email.com"
                     )
                 
+                from mensagens_utils import PERSONAS
+                col1, col2 = st.columns(2)
+                with col1:
+                    persona = st.selectbox(
+                        "Quem cobra:",
+                        options=list(PERSONAS),
+                        format_func=lambda p: PERSONAS[p]["titulo"]
+                    )
+                with col2:
+                    extra_zoeira = st.checkbox(
+                        "🤪 Extra zoeira (IA)",
+                        help="Mensagens escritas pela IA. Sem isso a mensagem é montada na hora pelo banco de frases."
+                    )
+                    if extra_zoeira:
+                        # Vai enchendo o pool de mensagens da IA enquanto o usuário escolhe quem cobrar
+                        from utils import aquecer_pool_mensagens
+                        aquecer_pool_mensagens()
+                # Cada clique gera uma variação nova da mensagem local
+                variacao = st.session_state.get('variacao_cobranca', 0)
+                
                 col1, col2, col3 = st.columns(3)
                 
                 with col1:
@@ -726,8 +894,12 @@ with tab2:
                                     pessoa_cobrar,
                                     div['divisao'][pessoa_cobrar],
                                     pix_key=pix_cobranca,
-                                    bebeu=(pessoa_cobrar in quem_bebeu)
+                                    bebeu=(pessoa_cobrar in quem_bebeu),
+                                    extra_zoeira=extra_zoeira,
+                                    persona=persona,
+                                    semente=variacao
                                 )
+                                st.session_state.variacao_cobranca = variacao + 1
                                 st.session_state.mensagens_cobranca[pessoa_cobrar] = msg
                             except Exception as e:
                                 st.error(f"Erro: {str(e)}")
@@ -739,8 +911,13 @@ with tab2:
                                 from utils import gerar_cobranca_caloteiro
                                 msg = gerar_cobranca_caloteiro(
                                     pessoa_cobrar,
-                                    div['divisao'][pessoa_cobrar]
+                                    div['divisao'][pessoa_cobrar],
+                                    extra_zoeira=extra_zoeira,
+                                    pix_key=pix_cobranca,
+                                    persona=persona,
+                                    semente=variacao
                                 )
+                                st.session_state.variacao_cobranca = variacao + 1
                                 st.session_state.mensagens_cobranca[f"{pessoa_cobrar}_caloteiro"] = msg
                             except Exception as e:
                                 st.error(f"Erro: {str(e)}")
@@ -748,32 +925,108 @@ with tab2:
                 with col3:
                     if st.button("📲 Gerar QR Pix", use_container_width=True):
                         try:
-                            from utils import gerar_qrcode_pix, gerar_link_pix_copia_cola, HAS_QRCODE
+                            from utils import qrcode_pix_do_payload, gerar_link_pix_copia_cola, registrar_cobranca_pix, HAS_QRCODE
                             valor_cobrar = div['divisao'][pessoa_cobrar]
-                            
-                            if HAS_QRCODE:
-                                qr_bytes = gerar_qrcode_pix(
-                                    pix_cobranca,
-                                    pix_nome,
-                                    pix_cidade,
-                                    valor_cobrar,
-                                    f"Churras-{pessoa_cobrar[:10]}"
-                                )
-                                if qr_bytes:
-                                    st.session_state.mensagens_cobranca[f"{pessoa_cobrar}_qr"] = qr_bytes
+                            descricao_pix = f"Churras-{pessoa_cobrar[:10]}"
+                            # Mesmo txid no QR e no copia e cola, para achar o pagamento no extrato
+                            txid = registrar_cobranca_pix(
+                                pix_cobranca, pessoa_cobrar, valor_cobrar, descricao_pix, st.session_state.evento_cobranca
+                            )
                             
                             pix_copia_cola = gerar_link_pix_copia_cola(
                                 pix_cobranca,
                                 pix_nome,
                                 pix_cidade,
                                 valor_cobrar,
-                                f"Churras-{pessoa_cobrar[:10]}"
+                                descricao_pix,
+                                txid
                             )
                             st.session_state.mensagens_cobranca[f"{pessoa_cobrar}_pix"] = pix_copia_cola
                             
+                            # A sessão guarda só o payload; a imagem fica no cache compartilhado
+                            if HAS_QRCODE and qrcode_pix_do_payload(pix_copia_cola):
+                                st.session_state.mensagens_cobranca[f"{pessoa_cobrar}_qr"] = pix_copia_cola
+                            
                         except Exception as e:
                             st.error(f"Erro ao gerar Pix: {str(e)}")
                 
+                col1, col2 = st.columns([2, 1])
+                with col1:
+                    cobrar_todos_btn = st.button("🚀 Cobrar Todo Mundo", use_container_width=True)
+                with col2:
+                    incluir_caloteiro = st.checkbox("🔥 Incluir caloteiro", key="lote_caloteiro")
+                
+                if cobrar_todos_btn:
+                    try:
+                        with st.spinner(f"Gerando cobranças de {len(div['divisao'])} pessoas..."):
+                            from utils import gerar_cobrancas_em_lote
+                            lote = gerar_cobrancas_em_lote(
+                                div['divisao'],
+                                quem_bebeu,
+                                pix_key=pix_cobranca,
+                                pix_nome=pix_nome,
+                                pix_cidade=pix_cidade,
+                                incluir_caloteiro=incluir_caloteiro,
+                                extra_zoeira=extra_zoeira,
+                                persona=persona,
+                                evento=st.session_state.evento_cobranca
+                            )
+                            st.session_state.mensagens_cobranca.update(lote["mensagens"])
+                            from utils import qrcode_pix_do_payload, HAS_QRCODE
+                            if HAS_QRCODE:
+                                # QR de todo mundo já no cache: trocar de pessoa acima não renderiza nada
+                                for pessoa in div['divisao']:
+                                    payload = lote["mensagens"].get(f"{pessoa}_pix")
+                                    if payload and qrcode_pix_do_payload(payload):
+                                        st.session_state.mensagens_cobranca[f"{pessoa}_qr"] = payload
+                            if lote["erros"]:
+                                st.warning(f"⚠️ {len(lote['erros'])} cobranças falharam: {', '.join(lote['erros'])}")
+                            else:
+                                st.success(f"✅ Cobranças prontas pra {len(div['divisao'])} pessoas! Escolha acima quem ver.")
+                    except Exception as e:
+                        st.error(f"Erro ao gerar as cobranças: {str(e)}")
+                
+                with st.expander("📦 Exportar cobranças de todo mundo"):
+                    st.caption("QR Code, Pix copia e cola e mensagem de cada pessoa num arquivo só.")
+                    tipo_exportacao = st.radio(
+                        "Formato",
+                        ["ZIP (imagens PNG + planilha)", "ZIP (imagens SVG + planilha)", "PDF (uma página por pessoa)"],
+                        horizontal=True,
+                        key="tipo_exportacao"
+                    )
+                    if st.button("📦 Gerar arquivo", use_container_width=True):
+                        try:
+                            from utils import exportar_cobrancas_pix
+                            formato = "pdf" if tipo_exportacao.startswith("PDF") else "zip"
+                            imagem = "svg" if "SVG" in tipo_exportacao else "png"
+                            with st.spinner(f"Exportando {len(div['divisao'])} cobranças..."):
+                                exportacao = exportar_cobrancas_pix(
+                                    div['divisao'],
+                                    pix_cobranca,
+                                    pix_nome,
+                                    pix_cidade,
+                                    formato=formato,
+                                    imagem=imagem,
+                                    mensagens=st.session_state.mensagens_cobranca,
+                                    quem_bebeu=quem_bebeu,
+                                    persona=persona,
+                                    evento=st.session_state.evento_cobranca
+                                )
+                            # O arquivo vai direto para o botão, sem ficar guardado na sessão
+                            st.download_button(
+                                "⬇️ Baixar",
+                                exportacao["conteudo"],
+                                file_name=f"cobrancas_churrasco.{formato}",
+                                mime="application/pdf" if formato == "pdf" else "application/zip",
+                                use_container_width=True
+                            )
+                            st.caption(
+                                f"{exportacao['cobrancas']} cobranças em {exportacao['tempo_s']:.2f}s "
+                                f"({exportacao['bytes'] / 1024:.0f} KB, {exportacao['processos']} processo(s))"
+                            )
+                        except Exception as e:
+                            st.error(f"Erro ao exportar: {str(e)}")
+                
                 # Exibir mensagens geradas
                 if pessoa_cobrar in st.session_state.mensagens_cobranca:
                     st.markdown("#### 💬 Mensagem Normal:")
@@ -792,17 +1045,48 @@ with tab2:
                     st.code(st.session_state.mensagens_cobranca[f"{pessoa_cobrar}_caloteiro"], language=None)
                 
                 if f"{pessoa_cobrar}_qr" in st.session_state.mensagens_cobranca:
+                    from utils import qrcode_pix_do_payload
+                    payload_qr = st.session_state.mensagens_cobranca[f"{pessoa_cobrar}_qr"]
                     st.markdown("#### 📲 QR Code Pix:")
                     col1, col2, col3 = st.columns([1, 2, 1])
                     with col2:
                         st.markdown('<div class="qrcode-container">', unsafe_allow_html=True)
-                        st.image(st.session_state.mensagens_cobranca[f"{pessoa_cobrar}_qr"], width=250)
+                        st.image(qrcode_pix_do_payload(payload_qr), width=250)
                         st.markdown('</div>', unsafe_allow_html=True)
+                        st.download_button(
+                            "⬇️ QR em SVG", qrcode_pix_do_payload(payload_qr, "svg"),
+                            file_name=f"pix_{pessoa_cobrar}.svg", mime="image/svg+xml",
+                            key=f"qr_svg_{pessoa_cobrar}"
+                        )
                 
                 if f"{pessoa_cobrar}_pix" in st.session_state.mensagens_cobranca:
                     st.markdown("#### 📋 Pix Copia e Cola:")
                     st.code(st.session_state.mensagens_cobranca[f"{pessoa_cobrar}_pix"], language=None)
 
+                with st.expander("🏦 Quem já pagou? (extrato do banco)"):
+                    st.caption("Envie o extrato exportado do banco (CSV ou OFX) para dar baixa nos Pix recebidos.")
+                    extrato = st.file_uploader("Extrato", type=["csv", "ofx", "txt"], key="extrato_pix")
+                    if extrato is not None and st.button("🔎 Conferir pagamentos", use_container_width=True):
+                        try:
+                            from utils import conciliar_extrato_pix
+                            conciliacao = conciliar_extrato_pix(extrato, pix_cobranca)
+                            est = conciliacao["estatisticas"]
+                            st.success(
+                                f"✅ {est['conciliados']} pagamentos conferidos em {est['linhas']} linhas "
+                                f"({est['tempo_s']:.2f}s)"
+                            )
+                            if conciliacao["conciliados"]:
+                                st.dataframe([
+                                    {"pessoa": c["pessoa"], "valor": c["valor"], "data": c["lancamento"]["data"], "via": c["via"]}
+                                    for c in conciliacao["conciliados"]
+                                ], hide_index=True)
+                            if conciliacao["ambiguos"]:
+                                st.warning(f"⚠️ {est['ambiguos']} Pix com o mesmo valor de mais de uma pessoa: confira na mão")
+                            if conciliacao["em_aberto"]:
+                                st.info("⏳ Ainda não pagaram: " + ", ".join(c["pessoa"] for c in conciliacao["em_aberto"]))
+                        except Exception as e:
+                            st.error(f"Erro ao ler o extrato: {str(e)}")
+
 # ============================================
 # TAB 3: TEMPLATES
 # ============================================
@@ -0,0 +1,224 @@
+"""
+Teste de carga offline: várias sessões simuladas fazendo os fluxos do app
+(lista em streaming, leitura da nota, divisão e cobranças em lote) ao mesmo tempo,
+contra o servidor falso. Mede vazão, p50/p95/p99 de cada etapa e os retries.
+
+Uso (da raiz do projeto):
+    python -m bench.carga --sessoes 50 --concorrencia 10 --escala 0.2 --taxa-429 0.05
+    python -m bench.carga --url http://127.0.0.1:8765/v1   # servidor já rodando
+
+Com a fita do cassete_utils, uma rodada gravada pode ser repetida sem servidor nenhum,
+com as mesmas latências (ou latência zero), para comparar tempos entre commits:
+    python -m bench.carga --cassete gravar --cassete-arquivo fita.jsonl.gz
+    python -m bench.carga --cassete reproduzir --cassete-arquivo fita.jsonl.gz --json tempos.json
+"""
+import io
+import os
+import json
+import time
+import random
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from bench.servidor_falso import ServidorFalso
+
+ETAPAS = ("lista", "nota", "cobrancas", "sessao")
+
+PARTICIPANTES = ["Ana", "Beto", "Carla", "Duda", "Edu", "Fabi"]
+
+
+def percentil(valores: list, p: float) -> float:
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(p * len(ordenados)))]
+
+
+def imagem_nota(semente: int) -> bytes:
+    """JPEG de uma 'nota' sintética, diferente para cada semente (cai fora do cache)."""
+    from PIL import Image, ImageDraw
+
+    rng = random.Random(semente)
+    imagem = Image.new("RGB", (600, 900), "white")
+    desenho = ImageDraw.Draw(imagem)
+    for linha in range(30):
+        y = 40 + linha * 27
+        desenho.rectangle((40, y, 40 + rng.randint(150, 420), y + 12), fill=(40, 40, 40))
+        desenho.rectangle((480, y, 560, y + 12), fill=(40, 40, 40))
+    saida = io.BytesIO()
+    imagem.save(saida, format="JPEG", quality=80)
+    return saida.getvalue()
+
+
+def sessao(indice: int, args, utils) -> dict:
+    """Uma sessão do app: aba 1 (lista) e aba 2 (nota, divisão, cobranças)."""
+    # Uma parte das sessões repete a descrição/nota de outra, como usuários pedindo o mesmo churrasco
+    rng = random.Random(indice)
+    base = rng.randrange(max(1, indice)) if indice and rng.random() < args.repeticao else indice
+    tempos, erros = {}, {}
+    inicio = time.perf_counter()
+
+    t = time.perf_counter()
+    try:
+        for campo, valor in utils.gerar_lista_churrasco_stream(
+            f"Churrasco para {8 + base % 20} pessoas, uns {base % 7} não bebem (sessão {base})",
+            permitir_local=args.permitir_local,
+        ):
+            pass
+        tempos["lista"] = time.perf_counter() - t
+    except Exception as e:
+        erros["lista"] = f"{type(e).__name__}: {e}"
+
+    t = time.perf_counter()
+    itens = []
+    try:
+        leitura = utils.extrair_varias_notas([(f"nota_{base}.jpg", imagem_nota(base))])
+        if leitura["nota"]:
+            itens = leitura["nota"]["itens"]
+        tempos["nota"] = time.perf_counter() - t
+        if leitura["erros"]:
+            erros["nota"] = "; ".join(leitura["erros"].values())
+    except Exception as e:
+        erros["nota"] = f"{type(e).__name__}: {e}"
+
+    t = time.perf_counter()
+    try:
+        participantes = PARTICIPANTES[: 3 + indice % 4]
+        quem_bebeu = participantes[::2]
+        divisao = utils.calcular_divisao(itens, participantes, quem_bebeu)
+        lote = utils.gerar_cobrancas_em_lote(
+            divisao["divisao"], quem_bebeu, incluir_caloteiro=True, extra_zoeira=args.extra_zoeira
+        )
+        tempos["cobrancas"] = time.perf_counter() - t
+        if lote["erros"]:
+            erros["cobrancas"] = f"{len(lote['erros'])} mensagens falharam"
+    except Exception as e:
+        erros["cobrancas"] = f"{type(e).__name__}: {e}"
+
+    tempos["sessao"] = time.perf_counter() - inicio
+    return {"tempos": tempos, "erros": erros}
+
+
+def relatorio(resultados: list, duracao: float, servidor_stats: dict | None, utils) -> dict:
+    etapas = {}
+    for etapa in ETAPAS:
+        tempos = [r["tempos"][etapa] for r in resultados if etapa in r["tempos"]]
+        etapas[etapa] = {
+            "ok": len(tempos),
+            "erros": sum(1 for r in resultados if etapa in r["erros"]),
+            "p50_s": round(percentil(tempos, 0.50), 3),
+            "p95_s": round(percentil(tempos, 0.95), 3),
+            "p99_s": round(percentil(tempos, 0.99), 3),
+            "max_s": round(max(tempos), 3) if tempos else 0.0,
+        }
+
+    metricas = utils.metricas_chamadas_ia()["funcoes"]
+    limites = utils.estatisticas_limite_taxa()
+    chamadas = sum(m["chamadas"] for m in metricas.values())
+    dados = {
+        "sessoes": len(resultados),
+        "duracao_s": round(duracao, 2),
+        "sessoes_por_s": round(len(resultados) / duracao, 2) if duracao else 0.0,
+        "chamadas_ia": chamadas,
+        "chamadas_por_s": round(chamadas / duracao, 2) if duracao else 0.0,
+        "etapas": etapas,
+        "retries": {
+            "tenacity": sum(m["retries"] for m in metricas.values()),
+            "erros_ia": sum(m["erros"] for m in metricas.values()),
+            "pausas_retry_after": sum(limite["pausas_retry_after"] for limite in limites.values()),
+        },
+        "limitador": {
+            "esperas": sum(limite["esperas"] for limite in limites.values()),
+            "espera_p95_s": max((limite["espera_p95_s"] for limite in limites.values()), default=0.0),
+            "espera_max_s": max((limite["espera_max_s"] for limite in limites.values()), default=0.0),
+        },
+        "cache": {funcao: {"hits": m["cache_hits"], "misses": m["cache_misses"]} for funcao, m in metricas.items()},
+        "voo_unico": utils.estatisticas_voo_unico(),
+        "cassete": utils.estatisticas_cassete(),
+        "exemplos_erros": [r["erros"] for r in resultados if r["erros"]][:5],
+    }
+    if servidor_stats is not None:
+        dados["servidor"] = servidor_stats
+    return dados
+
+
+def imprimir(dados: dict):
+    print(f"\n{dados['sessoes']} sessões em {dados['duracao_s']}s "
+          f"({dados['sessoes_por_s']} sessões/s, {dados['chamadas_por_s']} chamadas de IA/s)\n")
+    print(f"{'etapa':<10} {'ok':>5} {'erros':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    for etapa, e in dados["etapas"].items():
+        print(f"{etapa:<10} {e['ok']:>5} {e['erros']:>6} {e['p50_s']:>8} {e['p95_s']:>8} {e['p99_s']:>8} {e['max_s']:>8}")
+    print(f"\nretries: {dados['retries']}")
+    print(f"limitador de taxa: {dados['limitador']}")
+    if "servidor" in dados:
+        servidor = dados["servidor"]
+        print(f"servidor: {servidor['requisicoes']} requisições, {servidor['respostas_429']} x 429, "
+              f"{servidor['respostas_500']} x 500, por tarefa {servidor['por_tarefa']}")
+    for erro in dados["exemplos_erros"]:
+        print(f"erro: {erro}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga offline do Churrasco.ai")
+    parser.add_argument("--sessoes", type=int, default=30)
+    parser.add_argument("--concorrencia", type=int, default=10, help="Sessões simultâneas")
+    parser.add_argument("--url", default=None, help="Servidor falso já rodando (senão sobe um embutido)")
+    parser.add_argument("--escala", type=float, default=0.1, help="Multiplica as latências do servidor embutido")
+    parser.add_argument("--taxa-429", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--taxa-500", type=float, default=0.0)
+    parser.add_argument("--repeticao", type=float, default=0.2, help="Fração de sessões que repetem lista/nota de outra")
+    parser.add_argument("--extra-zoeira", action="store_true", help="Cobranças pela IA (pool) em vez do banco de frases")
+    parser.add_argument("--permitir-local", action="store_true", help="Deixa o motor local responder a lista")
+    parser.add_argument("--limite-rpm", type=int, default=None, help="RPM do limitador (padrão: o informado pela API)")
+    parser.add_argument("--limite-tpm", type=int, default=None, help="TPM do limitador (padrão: o informado pela API)")
+    parser.add_argument("--cassete", choices=("gravar", "reproduzir"), default=None)
+    parser.add_argument("--cassete-arquivo", default="bench_cassete.jsonl.gz")
+    parser.add_argument("--cassete-latencia", choices=("original", "zero"), default="original")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--json", default=None, help="Salva o relatório em JSON neste arquivo")
+    args = parser.parse_args()
+
+    servidor = None
+    if args.cassete == "reproduzir":
+        # Tudo sai da fita: não precisa de servidor
+        os.environ["CHURRASCO_CASSETE"] = "reproduzir"
+        args.url = "http://127.0.0.1:9/v1"
+    elif args.cassete == "gravar":
+        os.environ["CHURRASCO_CASSETE"] = "gravar"
+        if os.path.exists(args.cassete_arquivo):
+            os.remove(args.cassete_arquivo)
+    if args.cassete:
+        os.environ["CHURRASCO_CASSETE_ARQUIVO"] = args.cassete_arquivo
+        os.environ["CHURRASCO_CASSETE_LATENCIA"] = args.cassete_latencia
+    if args.url is None:
+        servidor = ServidorFalso(0, args.escala, args.taxa_429, args.retry_after, args.taxa_500, args.semente).iniciar()
+    # Credencial falsa pela variável de ambiente e cache descartável: nada sai da máquina
+    os.environ.pop("CUSTOM_OPENAI_API_KEY", None)
+    os.environ["OPENAI_API_KEY"] = "sk-falso"
+    os.environ["OPENAI_BASE_URL"] = args.url or servidor.url
+    os.environ["CHURRASCO_CACHE_DIR"] = tempfile.mkdtemp(prefix="churrasco_bench_")
+    if args.limite_rpm:
+        os.environ["CHURRASCO_LIMITE_RPM"] = str(args.limite_rpm)
+    if args.limite_tpm:
+        os.environ["CHURRASCO_LIMITE_TPM"] = str(args.limite_tpm)
+
+    import utils
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concorrencia) as executor:
+        resultados = list(executor.map(lambda i: sessao(i, args, utils), range(args.sessoes)))
+    duracao = time.perf_counter() - inicio
+
+    dados = relatorio(resultados, duracao, servidor.estatisticas() if servidor else None, utils)
+    if servidor:
+        servidor.parar()
+    imprimir(dados)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(dados, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
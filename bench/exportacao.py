@@ -0,0 +1,61 @@
+"""
+Benchmark da exportação em lote: ZIP (PNG/SVG + manifesto) e PDF para um grupo grande,
+no próprio processo e no pool de processos. Com --memoria mede também o pico de
+memória do processo principal (o tracemalloc deixa a rodada no próprio processo mais lenta).
+
+Uso (da raiz do projeto):
+    python -m bench.exportacao --pessoas 1000 --processos 4
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da exportação das cobranças")
+    parser.add_argument("--pessoas", type=int, default=1000)
+    parser.add_argument("--processos", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--memoria", action="store_true", help="Mede o pico de memória com tracemalloc")
+    args = parser.parse_args()
+
+    # Livro de cobranças descartável
+    os.environ["CHURRASCO_CACHE_DIR"] = tempfile.mkdtemp(prefix="churrasco_bench_")
+    from utils import exportar_cobrancas_pix
+    from qrcode_utils import renderizador_qr
+
+    rng = random.Random(args.semente)
+    divisao = {f"Pessoa {i:04d}": round(rng.uniform(10, 500), 2) for i in range(args.pessoas)}
+    pasta = tempfile.mkdtemp(prefix="churrasco_export_")
+
+    print(f"{args.pessoas} cobranças\n")
+    print(f"{'exportação':<12} {'processos':>9} {'tempo (s)':>10} {'por pessoa (ms)':>16} {'arquivo (KB)':>13} {'pico memória (KB)':>18}")
+    for processos in sorted({1, args.processos}):
+        os.environ["CHURRASCO_EXPORTACAO_PROCESSOS"] = str(processos)
+        for formato, imagem in (("zip", "png"), ("zip", "svg"), ("pdf", "png")):
+            # Sem o cache de QR do app, para medir a renderização de verdade
+            renderizador_qr.limpar()
+            destino = os.path.join(pasta, f"cobrancas_{processos}_{imagem}.{formato}")
+            if args.memoria:
+                tracemalloc.start()
+            inicio = time.perf_counter()
+            relatorio = exportar_cobrancas_pix(
+                divisao, "organizador@churrasco.com.br", "Churrasqueiro Master", "Sao Paulo",
+                formato=formato, imagem=imagem, destino=destino
+            )
+            duracao = time.perf_counter() - inicio
+            pico = "-"
+            if args.memoria:
+                pico = f"{tracemalloc.get_traced_memory()[1] / 1024:.0f}"
+                tracemalloc.stop()
+            nome = f"{formato}/{imagem}" if formato == "zip" else "pdf"
+            print(f"{nome:<12} {relatorio['processos']:>9} {duracao:>10.2f} {relatorio['por_cobranca_ms']:>16.2f} "
+                  f"{relatorio['bytes'] / 1024:>13.0f} {pico:>18}")
+    print(f"\narquivos em {pasta}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark do motor Pix: CRC16 e payloads um a um (implementação original, bit a bit)
+contra o pix_utils (CRC em C, campos fixos em cache e geração em lote).
+
+Uso (da raiz do projeto):
+    python -m bench.pix --cobrancas 5000
+"""
+import os
+import time
+import random
+import argparse
+
+from pix_utils import calcular_crc16, gerar_payload_pix, gerar_payloads_pix, validar_payload_pix
+
+
+# ============================================
+# IMPLEMENTAÇÃO ORIGINAL (REFERÊNCIA)
+# ============================================
+
+def crc16_original(payload: str) -> str:
+    crc = 0xFFFF
+    for byte in payload.encode('utf-8'):
+        crc ^= byte << 8
+        for _ in range(8):
+            if crc & 0x8000:
+                crc = (crc << 1) ^ 0x1021
+            else:
+                crc <<= 1
+            crc &= 0xFFFF
+    return format(crc, '04X')
+
+
+def payload_original(chave_pix: str, nome_recebedor: str, cidade: str, valor: float, descricao: str = "") -> str:
+    def formatar_campo(id_campo: str, valor_campo: str) -> str:
+        tamanho = str(len(valor_campo)).zfill(2)
+        return f"{id_campo}{tamanho}{valor_campo}"
+
+    nome_recebedor = nome_recebedor[:25].upper()
+    cidade = cidade[:15].upper()
+    gui = formatar_campo("00", "br.gov.bcb.pix")
+    chave = formatar_campo("01", chave_pix)
+    if descricao:
+        mai = formatar_campo("26", gui + chave + formatar_campo("02", descricao[:25]))
+    else:
+        mai = formatar_campo("26", gui + chave)
+    payload = (
+        formatar_campo("00", "01") + formatar_campo("01", "12") + mai
+        + formatar_campo("52", "0000") + formatar_campo("53", "986")
+        + formatar_campo("54", f"{valor:.2f}") + formatar_campo("58", "BR")
+        + formatar_campo("59", nome_recebedor) + formatar_campo("60", cidade)
+        + formatar_campo("62", formatar_campo("05", "***")) + "6304"
+    )
+    return payload + crc16_original(payload)
+
+
+# ============================================
+# MEDIÇÃO
+# ============================================
+
+def cronometrar(funcao, repeticoes: int = 3) -> float:
+    """Melhor tempo de algumas repetições (menos ruído do que a média)."""
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do motor Pix")
+    parser.add_argument("--cobrancas", type=int, default=5000)
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.semente)
+    chave, nome, cidade = "organizador@churrasco.com.br", "Churrasqueiro Master", "Sao Paulo"
+    divisao = {f"Pessoa {i:05d}": round(rng.uniform(10, 500), 2) for i in range(args.cobrancas)}
+
+    # Mesmo resultado, byte a byte, antes de medir
+    esperado = {p: payload_original(chave, nome, cidade, v, f"Churras-{p[:10]}") for p, v in divisao.items()}
+    assert gerar_payloads_pix(chave, nome, cidade, divisao) == esperado
+    assert all(gerar_payload_pix(chave, nome, cidade, v, f"Churras-{p[:10]}") == esperado[p] for p, v in divisao.items())
+    assert all(calcular_crc16(p[:-4]) == p[-4:] for p in esperado.values())
+
+    amostra = list(esperado.values())
+    medicoes = {
+        "crc16": (
+            cronometrar(lambda: [crc16_original(p) for p in amostra]),
+            cronometrar(lambda: [calcular_crc16(p) for p in amostra]),
+        ),
+        "payload um a um": (
+            cronometrar(lambda: [payload_original(chave, nome, cidade, v, f"Churras-{p[:10]}") for p, v in divisao.items()]),
+            cronometrar(lambda: [gerar_payload_pix(chave, nome, cidade, v, f"Churras-{p[:10]}") for p, v in divisao.items()]),
+        ),
+        "lote (descrição por pessoa)": (
+            cronometrar(lambda: {p: payload_original(chave, nome, cidade, v, f"Churras-{p[:10]}") for p, v in divisao.items()}),
+            cronometrar(lambda: gerar_payloads_pix(chave, nome, cidade, divisao)),
+        ),
+        "lote (descrição única)": (
+            cronometrar(lambda: {p: payload_original(chave, nome, cidade, v, "Churras") for p, v in divisao.items()}),
+            cronometrar(lambda: gerar_payloads_pix(chave, nome, cidade, divisao, "Churras")),
+        ),
+    }
+    # Sem a conferência de cada payload gerado (CHURRASCO_VALIDAR_PIX=0)
+    os.environ["CHURRASCO_VALIDAR_PIX"] = "0"
+    medicoes["lote sem conferência"] = (
+        medicoes["lote (descrição por pessoa)"][0],
+        cronometrar(lambda: gerar_payloads_pix(chave, nome, cidade, divisao)),
+    )
+    del os.environ["CHURRASCO_VALIDAR_PIX"]
+    validacao = cronometrar(lambda: [validar_payload_pix(p) for p in amostra])
+
+    print(f"{args.cobrancas} cobranças\n")
+    print(f"{'operação':<30} {'original (ms)':>14} {'pix_utils (ms)':>15} {'ganho':>8}")
+    for nome_medicao, (original, novo) in medicoes.items():
+        print(f"{nome_medicao:<30} {original * 1000:>14.1f} {novo * 1000:>15.1f} {original / novo:>7.1f}x")
+    print(f"\nvalidar_payload_pix: {len(amostra) / validacao:,.0f} payloads/s")
+
+
+if __name__ == "__main__":
+    main()
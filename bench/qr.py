@@ -0,0 +1,80 @@
+"""
+Benchmark dos QR codes Pix: implementação original (qrcode + PIL a cada clique)
+contra o qrcode_utils (versão e máscara pré-calculadas, PNG direto da matriz, SVG e cache).
+
+Uso (da raiz do projeto):
+    python -m bench.qr --pessoas 200
+"""
+import io
+import time
+import random
+import argparse
+
+import qrcode
+from PIL import Image, ImageChops
+
+from pix_utils import gerar_payloads_pix
+from qrcode_utils import RenderizadorQR, calcular_matriz, desenhar_png
+
+
+def qrcode_original(payload: str) -> bytes:
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=10,
+        border=4,
+    )
+    qr.add_data(payload)
+    qr.make(fit=True)
+    img = qr.make_image(fill_color="black", back_color="white")
+    buffer = io.BytesIO()
+    img.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def mesma_imagem(png_a: bytes, png_b: bytes) -> bool:
+    a = Image.open(io.BytesIO(png_a)).convert("L")
+    b = Image.open(io.BytesIO(png_b)).convert("L")
+    return a.size == b.size and ImageChops.difference(a, b).getbbox() is None
+
+
+def cronometrar(funcao) -> float:
+    inicio = time.perf_counter()
+    funcao()
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos QR codes Pix")
+    parser.add_argument("--pessoas", type=int, default=200)
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.semente)
+    chave, nome, cidade = "organizador@churrasco.com.br", "Churrasqueiro Master", "Sao Paulo"
+    divisao = {f"Pessoa {i:04d}": round(rng.uniform(10, 500), 2) for i in range(args.pessoas)}
+    payloads = list(gerar_payloads_pix(chave, nome, cidade, divisao).values())
+    molde = f"{chave}|{nome}|{cidade}"
+
+    # Sem molde a escolha de máscara é a do qrcode: mesma imagem, pixel a pixel
+    assert all(mesma_imagem(qrcode_original(p), desenhar_png(calcular_matriz(p))) for p in payloads[:20])
+
+    renderizador = RenderizadorQR()
+    medicoes = {
+        "original (qrcode + PIL)": cronometrar(lambda: [qrcode_original(p) for p in payloads]),
+        "png, máscara por payload": cronometrar(lambda: RenderizadorQR().renderizar_lote(payloads)),
+        "png, máscara do molde": cronometrar(lambda: renderizador.renderizar_lote(payloads, molde=molde)),
+        "svg, máscara do molde": cronometrar(lambda: renderizador.renderizar_lote(payloads, "svg", molde=molde)),
+        "png do cache (rerun)": cronometrar(lambda: renderizador.renderizar_lote(payloads)),
+    }
+
+    original = medicoes["original (qrcode + PIL)"]
+    print(f"{args.pessoas} QR codes\n")
+    print(f"{'renderização':<28} {'total (ms)':>11} {'por QR (ms)':>12} {'ganho':>8}")
+    for nome_medicao, tempo in medicoes.items():
+        print(f"{nome_medicao:<28} {tempo * 1000:>11.1f} {tempo * 1000 / len(payloads):>12.3f} {original / tempo:>7.1f}x")
+    print(f"\ncache: {renderizador.estatisticas()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+"""
+Servidor falso compatível com a API de chat da OpenAI, para testar carga sem gastar crédito.
+
+Responde POST /v1/chat/completions com JSON pronto para cada tarefa do utils (lista,
+textos do plano, nota fiscal, preços da nota, pool de mensagens e cobranças), com
+latência sorteada de uma distribuição log-normal, streaming SSE e 429/5xx injetados.
+
+Uso:
+    python -m bench.servidor_falso --porta 8765 --taxa-429 0.05
+    OPENAI_API_KEY=falso OPENAI_BASE_URL=http://127.0.0.1:8765/v1 streamlit run app.py
+"""
+import re
+import json
+import math
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ============================================
+# LATÊNCIAS
+# ============================================
+
+# Tarefa -> (mediana em segundos, sigma da log-normal)
+LATENCIAS_PADRAO = {
+    "lista": (4.0, 0.4),
+    "categorias_lista": (2.0, 0.4),
+    "textos_plano": (1.2, 0.3),
+    "nota": (6.0, 0.5),
+    "precos_nota": (2.0, 0.4),
+    "pool": (5.0, 0.4),
+    "cobranca": (1.5, 0.3),
+}
+
+# Modelos menores respondem mais rápido (multiplica a latência da tarefa)
+FATOR_MODELO = {"gpt-4o": 1.0, "gpt-4o-mini": 0.45}
+
+# Pedaço de texto por chunk do streaming
+TAMANHO_CHUNK = 24
+
+
+def sortear_latencia(tarefa: str, modelo: str, escala: float = 1.0, rng: random.Random = random) -> float:
+    mediana, sigma = LATENCIAS_PADRAO.get(tarefa, (1.0, 0.3))
+    return escala * FATOR_MODELO.get(modelo, 1.0) * mediana * math.exp(sigma * rng.gauss(0, 1))
+
+
+# ============================================
+# RESPOSTAS PRONTAS
+# ============================================
+
+_LISTA = {
+    "resumo": "Churrasco raiz: carne de sobra, cerveja gelada e ninguém vai embora com fome.",
+    "pessoas": 10,
+    "duracao_estimada": "5 horas",
+    "carnes": [
+        {"item": "Picanha", "quantidade": "2kg", "preco_estimado": 150.00},
+        {"item": "Fraldinha", "quantidade": "1.5kg", "preco_estimado": 75.00},
+        {"item": "Linguiça Toscana", "quantidade": "1kg", "preco_estimado": 25.00},
+    ],
+    "bebidas": [
+        {"item": "Cerveja Lata", "quantidade": "36 unidades", "preco_estimado": 120.00, "alcoolica": True},
+        {"item": "Refrigerante 2L", "quantidade": "3 unidades", "preco_estimado": 30.00, "alcoolica": False},
+    ],
+    "acompanhamentos": [
+        {"item": "Pão de Alho", "quantidade": "20 unidades", "preco_estimado": 25.00},
+        {"item": "Farofa pronta", "quantidade": "500g", "preco_estimado": 8.00},
+    ],
+    "carvao_gelo": [
+        {"item": "Carvão", "quantidade": "5kg", "preco_estimado": 25.00},
+        {"item": "Gelo", "quantidade": "4kg", "preco_estimado": 16.00},
+    ],
+    "total_estimado": 474.00,
+    "dicas": ["Salgue a picanha só na hora de ir pra grelha", "Gelo nunca é demais"],
+}
+
+_NOTA = {
+    "itens": [
+        {"nome": "PICANHA KG", "preco": 89.90, "alcoolica": False},
+        {"nome": "LINGUICA TOSCANA", "preco": 24.50, "alcoolica": False},
+        {"nome": "BRAHMA LATA 350ML", "preco": 42.00, "alcoolica": True},
+        {"nome": "COCA COLA 2L", "preco": 9.90, "alcoolica": False},
+        {"nome": "CARVAO 5KG", "preco": 22.00, "alcoolica": False},
+    ],
+    "total_nota": 188.30,
+    "estabelecimento": "Mercado do Bench",
+    "data_compra": "01/01/2026",
+}
+
+_MENSAGENS = [
+    "Fala {nome}! 🍖 A conta do churrasco chegou: {valor}.",
+    "{nome}, meu consagrado, bora acertar os {valor}? 🤑",
+    "Ô {nome}, a picanha já foi, falta o Pix de {valor}! 🔥",
+]
+
+
+def classificar_requisicao(corpo: dict) -> str:
+    """Descobre a tarefa do utils pelo conteúdo da requisição."""
+    mensagens = corpo.get("messages", [])
+    ultima = mensagens[-1]["content"] if mensagens else ""
+    if isinstance(ultima, list):
+        texto = " ".join(parte.get("text", "") for parte in ultima if isinstance(parte, dict))
+        return "precos_nota" if "APENAS o preço" in texto else "nota"
+    if "mensagens DIFERENTES" in ultima:
+        return "pool"
+    if "Complete APENAS estas categorias" in ultima:
+        return "categorias_lista"
+    if "Escreva só o resumo" in ultima:
+        return "textos_plano"
+    if corpo.get("response_format", {}).get("type") == "json_object":
+        return "lista"
+    return "cobranca"
+
+
+def gerar_conteudo(tarefa: str, corpo: dict, rng: random.Random = random) -> str:
+    ultima = corpo["messages"][-1]["content"]
+    if tarefa == "lista":
+        return json.dumps(_LISTA, ensure_ascii=False)
+    if tarefa == "categorias_lista":
+        faltando = re.search(r"estas categorias: ([^.\n]+)", ultima).group(1).split(", ")
+        return json.dumps({c: _LISTA.get(c, []) for c in faltando}, ensure_ascii=False)
+    if tarefa == "textos_plano":
+        return json.dumps({"resumo": _LISTA["resumo"], "dicas": _LISTA["dicas"]}, ensure_ascii=False)
+    if tarefa == "nota":
+        return json.dumps(_NOTA, ensure_ascii=False)
+    if tarefa == "precos_nota":
+        return json.dumps({"itens": []})
+    if tarefa == "pool":
+        quantidade = int(re.search(r"Gere (\d+)", ultima).group(1))
+        extra = " Já são {dias} dias!" if "{dias}" in ultima else "\n💸 Pix: {pix}"
+        return json.dumps({
+            "mensagens": [f"{rng.choice(_MENSAGENS)}{extra} #{i}" for i in range(quantidade)]
+        }, ensure_ascii=False)
+    nome = re.search(r"Nome: (.+)", ultima)
+    return f"Fala {nome.group(1) if nome else 'campeão'}! 🍖 Bora pagar o churrasco? Pix tá esperando! 💸"
+
+
+# ============================================
+# SERVIDOR
+# ============================================
+
+class ServidorFalso:
+    """
+    Servidor HTTP em thread própria. escala multiplica todas as latências
+    (0 = responde na hora); taxa_429/taxa_500 são probabilidades por requisição.
+    """
+
+    def __init__(self, porta: int = 0, escala: float = 1.0, taxa_429: float = 0.0,
+                 retry_after_s: float = 1.0, taxa_500: float = 0.0, semente: int | None = None,
+                 limite_rpm: int = 10000, limite_tpm: int = 2000000):
+        self.escala = escala
+        # Informados nos headers x-ratelimit-*, como a API faz com os limites do tier da conta
+        self.cabecalhos_limite = {
+            "x-ratelimit-limit-requests": str(limite_rpm),
+            "x-ratelimit-limit-tokens": str(limite_tpm),
+        }
+        self.taxa_429 = taxa_429
+        self.retry_after_s = retry_after_s
+        self.taxa_500 = taxa_500
+        self._rng = random.Random(semente)
+        self._rng_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self.contadores = {"requisicoes": 0, "respostas_429": 0, "respostas_500": 0, "streams": 0}
+        self.por_tarefa: dict = {}
+        self._http = ThreadingHTTPServer(("127.0.0.1", porta), self._criar_handler())
+        self._http.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, porta = self._http.server_address[:2]
+        return f"http://{host}:{porta}/v1"
+
+    def iniciar(self) -> "ServidorFalso":
+        self._thread = threading.Thread(target=self._http.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def parar(self):
+        self._http.shutdown()
+        self._http.server_close()
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            return {**self.contadores, "por_tarefa": dict(self.por_tarefa)}
+
+    def _contar(self, campo: str, tarefa: str | None = None):
+        with self._lock:
+            self.contadores[campo] += 1
+            if tarefa:
+                self.por_tarefa[tarefa] = self.por_tarefa.get(tarefa, 0) + 1
+
+    def _sortear(self, funcao, *args):
+        with self._rng_lock:
+            return funcao(*args)
+
+    def _criar_handler(self):
+        servidor = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _enviar_json(self, status: int, dados: dict, cabecalhos: dict | None = None):
+                corpo = json.dumps(dados, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(corpo)))
+                for nome, valor in (cabecalhos or {}).items():
+                    self.send_header(nome, valor)
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            def do_POST(self):
+                tamanho = int(self.headers.get("Content-Length", 0))
+                corpo = json.loads(self.rfile.read(tamanho) or b"{}")
+                if not self.path.endswith("/chat/completions"):
+                    self._enviar_json(404, {"error": {"message": "rota não suportada", "type": "invalid_request_error"}})
+                    return
+
+                tarefa = classificar_requisicao(corpo)
+                servidor._contar("requisicoes", tarefa)
+                sorteio = servidor._sortear(servidor._rng.random)
+                if sorteio < servidor.taxa_429:
+                    servidor._contar("respostas_429")
+                    self._enviar_json(
+                        429,
+                        {"error": {"message": "Rate limit reached (429)", "type": "requests", "code": "rate_limit_exceeded"}},
+                        {"Retry-After": f"{servidor.retry_after_s:g}", **servidor.cabecalhos_limite},
+                    )
+                    return
+                if sorteio < servidor.taxa_429 + servidor.taxa_500:
+                    servidor._contar("respostas_500")
+                    self._enviar_json(500, {"error": {"message": "erro injetado", "type": "server_error"}})
+                    return
+
+                modelo = corpo.get("model", "gpt-4o")
+                latencia = servidor._sortear(sortear_latencia, tarefa, modelo, servidor.escala, servidor._rng)
+                conteudo = servidor._sortear(gerar_conteudo, tarefa, corpo, servidor._rng)
+                uso = {
+                    "prompt_tokens": len(json.dumps(corpo.get("messages", []))) // 4,
+                    "completion_tokens": max(1, len(conteudo) // 4),
+                }
+                uso["total_tokens"] = uso["prompt_tokens"] + uso["completion_tokens"]
+
+                if corpo.get("stream"):
+                    servidor._contar("streams")
+                    self._enviar_stream(modelo, conteudo, uso, latencia, corpo)
+                    return
+
+                time.sleep(latencia)
+                self._enviar_json(200, {
+                    "id": f"chatcmpl-falso-{time.time_ns()}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": modelo,
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": conteudo},
+                        "finish_reason": "stop",
+                    }],
+                    "usage": uso,
+                }, servidor.cabecalhos_limite)
+
+            def _enviar_stream(self, modelo: str, conteudo: str, uso: dict, latencia: float, corpo: dict):
+                """SSE: 1/3 da latência até o primeiro token, o resto espalhado pelos chunks."""
+                pedacos = [conteudo[i:i + TAMANHO_CHUNK] for i in range(0, len(conteudo), TAMANHO_CHUNK)]
+                intervalo = (2 * latencia / 3) / max(1, len(pedacos))
+                base = {"id": f"chatcmpl-falso-{time.time_ns()}", "object": "chat.completion.chunk",
+                        "created": int(time.time()), "model": modelo}
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Connection", "close")
+                for nome, valor in servidor.cabecalhos_limite.items():
+                    self.send_header(nome, valor)
+                self.end_headers()
+
+                def evento(dados):
+                    self.wfile.write(f"data: {json.dumps(dados, ensure_ascii=False)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+
+                time.sleep(latencia / 3)
+                evento({**base, "choices": [{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}]})
+                for pedaco in pedacos:
+                    evento({**base, "choices": [{"index": 0, "delta": {"content": pedaco}, "finish_reason": None}]})
+                    time.sleep(intervalo)
+                evento({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+                if corpo.get("stream_options", {}).get("include_usage"):
+                    evento({**base, "choices": [], "usage": uso})
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+                self.close_connection = True
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor falso compatível com a API de chat da OpenAI")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--escala", type=float, default=1.0, help="Multiplica todas as latências (0 = sem espera)")
+    parser.add_argument("--taxa-429", type=float, default=0.0, help="Fração das requisições que recebem 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Segundos no cabeçalho Retry-After do 429")
+    parser.add_argument("--taxa-500", type=float, default=0.0, help="Fração das requisições que recebem 500")
+    parser.add_argument("--semente", type=int, default=None)
+    args = parser.parse_args()
+
+    servidor = ServidorFalso(args.porta, args.escala, args.taxa_429, args.retry_after, args.taxa_500, args.semente)
+    print(f"Servidor falso em {servidor.url} (Ctrl+C para parar)")
+    print(f"  OPENAI_API_KEY=falso OPENAI_BASE_URL={servidor.url} streamlit run app.py")
+    try:
+        servidor._http.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor._http.server_close()
+        print(json.dumps(servidor.estatisticas(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+# ============================================
+# CONFIGURAÇÃO DO CACHE
+# ============================================
+
+CACHE_DIR = os.environ.get(
+    "CHURRASCO_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+)
+CACHE_ARQUIVO = os.path.join(CACHE_DIR, "respostas_ia.sqlite3")
+
+
+def gerar_chave_cache(*partes) -> str:
+    """Gera chave estável (sha256) a partir de partes serializáveis em JSON."""
+    bruto = json.dumps(partes, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(bruto.encode("utf-8")).hexdigest()
+
+
+def hash_arquivo(conteudo: bytes) -> str:
+    """Hash de conteúdo (sha256) para cachear por arquivo enviado, não pelo nome."""
+    return hashlib.sha256(conteudo).hexdigest()
+
+
+# ============================================
+# CACHE EM DUAS CAMADAS (MEMÓRIA + DISCO)
+# ============================================
+
+class CacheRespostas:
+    """
+    Cache de respostas da IA em duas camadas:
+    memória (LRU limitado por número de itens) e disco (SQLite com TTL),
+    para que um restart do app não comece com o cache frio.
+    Com limite_bytes, as duas camadas também são limitadas pelo tamanho total
+    dos valores, descartando primeiro os menos usados recentemente.
+    Os valores são guardados como JSON, então cada leitura devolve uma cópia nova.
+    """
+
+    def __init__(self, namespace: str, max_itens: int = 256, ttl_segundos: float = 7 * 24 * 3600,
+                 caminho: str | None = CACHE_ARQUIVO, limite_bytes: int | None = None):
+        self.namespace = namespace
+        self.max_itens = max_itens
+        self.ttl_segundos = ttl_segundos
+        self.caminho = caminho
+        self.limite_bytes = limite_bytes
+        self._memoria: OrderedDict = OrderedDict()  # chave -> (expira_em, json, bytes)
+        self._bytes_memoria = 0
+        self._lock = threading.Lock()
+        self._conexao = None
+        self._disco_indisponivel = caminho is None
+        self._estatisticas = {"hits_memoria": 0, "hits_disco": 0, "misses": 0, "gravacoes": 0}
+
+    # ---------- disco ----------
+
+    def _abrir_disco(self):
+        """Abre (uma vez) o SQLite. Se falhar, o cache segue só em memória."""
+        if self._conexao is not None or self._disco_indisponivel:
+            return self._conexao
+        try:
+            os.makedirs(os.path.dirname(self.caminho), exist_ok=True)
+            conexao = sqlite3.connect(self.caminho, check_same_thread=False, timeout=5)
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.execute(
+                """CREATE TABLE IF NOT EXISTS cache (
+                    namespace TEXT NOT NULL,
+                    chave TEXT NOT NULL,
+                    valor TEXT NOT NULL,
+                    expira_em REAL NOT NULL,
+                    tamanho INTEGER NOT NULL DEFAULT 0,
+                    acessado_em REAL NOT NULL DEFAULT 0,
+                    PRIMARY KEY (namespace, chave)
+                )"""
+            )
+            colunas = {linha[1] for linha in conexao.execute("PRAGMA table_info(cache)")}
+            if "tamanho" not in colunas:
+                conexao.execute("ALTER TABLE cache ADD COLUMN tamanho INTEGER NOT NULL DEFAULT 0")
+            if "acessado_em" not in colunas:
+                conexao.execute("ALTER TABLE cache ADD COLUMN acessado_em REAL NOT NULL DEFAULT 0")
+            conexao.execute(
+                "DELETE FROM cache WHERE namespace = ? AND expira_em < ?",
+                (self.namespace, time.time())
+            )
+            conexao.commit()
+            self._conexao = conexao
+        except (sqlite3.Error, OSError):
+            self._disco_indisponivel = True
+        return self._conexao
+
+    def _ler_disco(self, chave: str):
+        conexao = self._abrir_disco()
+        if conexao is None:
+            return None
+        try:
+            linha = conexao.execute(
+                "SELECT valor, expira_em FROM cache WHERE namespace = ? AND chave = ?",
+                (self.namespace, chave)
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        if linha is None:
+            return None
+        if linha[1] < time.time():
+            self._apagar_disco(chave)
+            return None
+        if self.limite_bytes is not None:
+            try:
+                conexao.execute(
+                    "UPDATE cache SET acessado_em = ? WHERE namespace = ? AND chave = ?",
+                    (time.time(), self.namespace, chave)
+                )
+                conexao.commit()
+            except sqlite3.Error:
+                pass
+        return linha
+
+    def _gravar_disco(self, chave: str, valor: str, expira_em: float):
+        conexao = self._abrir_disco()
+        if conexao is None:
+            return
+        try:
+            conexao.execute(
+                "INSERT OR REPLACE INTO cache (namespace, chave, valor, expira_em, tamanho, acessado_em) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (self.namespace, chave, valor, expira_em, len(valor.encode("utf-8")), time.time())
+            )
+            if self.limite_bytes is not None:
+                self._podar_disco(conexao)
+            conexao.commit()
+        except sqlite3.Error:
+            pass
+
+    def _podar_disco(self, conexao):
+        """Apaga os itens menos acessados até o namespace caber em limite_bytes."""
+        total = conexao.execute(
+            "SELECT COALESCE(SUM(tamanho), 0) FROM cache WHERE namespace = ?", (self.namespace,)
+        ).fetchone()[0]
+        if total <= self.limite_bytes:
+            return
+        linhas = conexao.execute(
+            "SELECT chave, tamanho FROM cache WHERE namespace = ? ORDER BY acessado_em ASC",
+            (self.namespace,)
+        ).fetchall()
+        removidas = []
+        for chave, tamanho in linhas:
+            if total <= self.limite_bytes:
+                break
+            removidas.append((self.namespace, chave))
+            total -= tamanho
+        conexao.executemany("DELETE FROM cache WHERE namespace = ? AND chave = ?", removidas)
+
+    def _apagar_disco(self, chave: str):
+        conexao = self._abrir_disco()
+        if conexao is None:
+            return
+        try:
+            conexao.execute("DELETE FROM cache WHERE namespace = ? AND chave = ?", (self.namespace, chave))
+            conexao.commit()
+        except sqlite3.Error:
+            pass
+
+    # ---------- memória ----------
+
+    def _guardar_memoria(self, chave: str, expira_em: float, valor: str):
+        self._remover_memoria(chave)
+        # Bytes em UTF-8, como no disco: acentos e emojis contam mais de 1
+        tamanho = len(valor.encode("utf-8"))
+        self._memoria[chave] = (expira_em, valor, tamanho)
+        self._bytes_memoria += tamanho
+        while self._memoria and (
+            len(self._memoria) > self.max_itens
+            or (self.limite_bytes is not None and self._bytes_memoria > self.limite_bytes)
+        ):
+            _, (_, _, tamanho_antigo) = self._memoria.popitem(last=False)
+            self._bytes_memoria -= tamanho_antigo
+
+    def _remover_memoria(self, chave: str):
+        entrada = self._memoria.pop(chave, None)
+        if entrada is not None:
+            self._bytes_memoria -= entrada[2]
+
+    # ---------- API pública ----------
+
+    def obter(self, chave: str):
+        """Retorna o valor guardado ou None se não existir/expirou."""
+        agora = time.time()
+        with self._lock:
+            entrada = self._memoria.get(chave)
+            if entrada is not None:
+                if entrada[0] >= agora:
+                    self._memoria.move_to_end(chave)
+                    self._estatisticas["hits_memoria"] += 1
+                    return json.loads(entrada[1])
+                self._remover_memoria(chave)
+
+            linha = self._ler_disco(chave)
+            if linha is None:
+                self._estatisticas["misses"] += 1
+                return None
+
+            valor, expira_em = linha
+            self._guardar_memoria(chave, expira_em, valor)
+            self._estatisticas["hits_disco"] += 1
+            return json.loads(valor)
+
+    def guardar(self, chave: str, valor) -> None:
+        """Guarda um valor serializável em JSON nas duas camadas."""
+        texto = json.dumps(valor, ensure_ascii=False)
+        expira_em = time.time() + self.ttl_segundos
+        with self._lock:
+            self._guardar_memoria(chave, expira_em, texto)
+            self._gravar_disco(chave, texto, expira_em)
+            self._estatisticas["gravacoes"] += 1
+
+    def limpar(self) -> None:
+        """Apaga tudo deste namespace (memória e disco)."""
+        with self._lock:
+            self._memoria.clear()
+            self._bytes_memoria = 0
+            conexao = self._abrir_disco()
+            if conexao is not None:
+                try:
+                    conexao.execute("DELETE FROM cache WHERE namespace = ?", (self.namespace,))
+                    conexao.commit()
+                except sqlite3.Error:
+                    pass
+
+    def estatisticas(self) -> dict:
+        """Contadores de hit/miss e ocupação do cache."""
+        with self._lock:
+            hits = self._estatisticas["hits_memoria"] + self._estatisticas["hits_disco"]
+            consultas = hits + self._estatisticas["misses"]
+            return {
+                **self._estatisticas,
+                "itens_memoria": len(self._memoria),
+                "bytes_memoria": self._bytes_memoria,
+                "taxa_acerto": round(hits / consultas, 3) if consultas else 0.0,
+                "disco": not self._disco_indisponivel,
+            }
@@ -0,0 +1,198 @@
+import os
+import gzip
+import json
+import time
+import asyncio
+import threading
+from types import SimpleNamespace
+
+from cache_utils import CACHE_DIR, gerar_chave_cache
+
+# Tipos da OpenAI para remontar as respostas reproduzidas iguais às reais
+try:
+    from openai.types.chat import ChatCompletion, ChatCompletionChunk  # type: ignore
+except ImportError:  # pragma: no cover
+    ChatCompletion = ChatCompletionChunk = None  # type: ignore[assignment]
+
+# ============================================
+# CONFIGURAÇÃO DA FITA
+# ============================================
+
+# CHURRASCO_CASSETE: "gravar" grava toda chamada de IA, "reproduzir" responde só com o que foi gravado
+MODOS = ("gravar", "reproduzir")
+ARQUIVO_PADRAO = os.path.join(CACHE_DIR, "cassete.jsonl.gz")
+
+
+def modo_cassete() -> str | None:
+    modo = os.environ.get("CHURRASCO_CASSETE", "").strip().lower()
+    return modo if modo in MODOS else None
+
+
+def arquivo_cassete() -> str:
+    return os.environ.get("CHURRASCO_CASSETE_ARQUIVO") or ARQUIVO_PADRAO
+
+
+def latencia_original() -> bool:
+    """CHURRASCO_CASSETE_LATENCIA=zero reproduz sem esperar; o padrão repete a latência gravada."""
+    return os.environ.get("CHURRASCO_CASSETE_LATENCIA", "original").strip().lower() != "zero"
+
+
+class GravacaoAusente(Exception):
+    """No modo reproduzir, a requisição não está na fita."""
+
+
+def impressao_digital(params: dict, funcao: str) -> str:
+    """
+    Identifica a requisição pelo conteúdo. O modelo fica de fora para a fita continuar
+    valendo quando o roteador escolhe outro modelo para a mesma tarefa.
+    """
+    return gerar_chave_cache(funcao, {k: v for k, v in params.items() if k != "model"})
+
+
+def _para_dict(objeto) -> dict:
+    if hasattr(objeto, "model_dump"):
+        return objeto.model_dump(exclude_unset=True)
+    return json.loads(json.dumps(objeto, default=lambda o: vars(o)))
+
+
+def _remontar(dados: dict, tipo):
+    if tipo is not None:
+        return tipo.model_validate(dados)
+    return json.loads(json.dumps(dados), object_hook=lambda d: SimpleNamespace(**d))
+
+
+# ============================================
+# FITA
+# ============================================
+
+class Cassete:
+    """
+    Grava as respostas cruas das chamadas de IA (com a latência medida e, no streaming,
+    o instante de cada chunk) num JSONL gzipado e as reproduz depois sem rede e sem
+    custo. Requisições iguais gravadas mais de uma vez são reproduzidas na mesma ordem.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fitas: dict = {}  # arquivo -> {impressao: [gravacoes]}
+        self._posicoes: dict = {}  # (arquivo, impressao) -> próxima gravação
+        self._estatisticas = {"gravadas": 0, "reproduzidas": 0, "ausentes": 0}
+
+    # ---------- disco ----------
+
+    def _carregar(self, arquivo: str) -> dict:
+        fita = self._fitas.get(arquivo)
+        if fita is None:
+            fita = {}
+            if os.path.exists(arquivo):
+                with gzip.open(arquivo, "rt", encoding="utf-8") as f:
+                    for linha in f:
+                        if linha.strip():
+                            gravacao = json.loads(linha)
+                            fita.setdefault(gravacao["id"], []).append(gravacao)
+            self._fitas[arquivo] = fita
+        return fita
+
+    def _gravar(self, gravacao: dict):
+        arquivo = arquivo_cassete()
+        linha = json.dumps(gravacao, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            os.makedirs(os.path.dirname(os.path.abspath(arquivo)), exist_ok=True)
+            # Cada append vira um membro gzip novo; o gzip lê membros concatenados
+            with gzip.open(arquivo, "at", encoding="utf-8") as f:
+                f.write(linha)
+            self._carregar(arquivo).setdefault(gravacao["id"], []).append(gravacao)
+            self._estatisticas["gravadas"] += 1
+
+    def _buscar(self, impressao: str, funcao: str) -> dict:
+        arquivo = arquivo_cassete()
+        with self._lock:
+            gravacoes = self._carregar(arquivo).get(impressao)
+            if not gravacoes:
+                self._estatisticas["ausentes"] += 1
+                raise GravacaoAusente(f"Chamada de {funcao} não está na fita {arquivo}")
+            posicao = self._posicoes.get((arquivo, impressao), 0)
+            self._posicoes[(arquivo, impressao)] = posicao + 1
+            self._estatisticas["reproduzidas"] += 1
+            # Passou do que foi gravado: repete a última
+            return gravacoes[min(posicao, len(gravacoes) - 1)]
+
+    # ---------- chamadas ----------
+
+    def chamar(self, params: dict, funcao: str, chamada):
+        """Faz `chamada()` gravando a resposta, ou a reproduz da fita, conforme o modo."""
+        modo = modo_cassete()
+        if modo is None:
+            return chamada()
+        impressao = impressao_digital(params, funcao)
+        if modo == "reproduzir":
+            gravacao = self._buscar(impressao, funcao)
+            if gravacao.get("chunks") is not None:
+                return self._reproduzir_stream(gravacao)
+            if latencia_original():
+                time.sleep(gravacao["latencia_s"])
+            return _remontar(gravacao["resposta"], ChatCompletion)
+
+        inicio = time.perf_counter()
+        response = chamada()
+        if params.get("stream"):
+            return self._gravar_stream(response, impressao, funcao, inicio)
+        self._gravar({
+            "id": impressao, "funcao": funcao, "latencia_s": round(time.perf_counter() - inicio, 4),
+            "resposta": _para_dict(response),
+        })
+        return response
+
+    async def chamar_async(self, params: dict, funcao: str, chamada):
+        """Versão assíncrona de chamar; `chamada()` devolve a coroutine da chamada real."""
+        modo = modo_cassete()
+        if modo is None:
+            return await chamada()
+        impressao = impressao_digital(params, funcao)
+        if modo == "reproduzir":
+            gravacao = self._buscar(impressao, funcao)
+            if latencia_original():
+                await asyncio.sleep(gravacao["latencia_s"])
+            return _remontar(gravacao["resposta"], ChatCompletion)
+
+        inicio = time.perf_counter()
+        response = await chamada()
+        await asyncio.to_thread(self._gravar, {
+            "id": impressao, "funcao": funcao, "latencia_s": round(time.perf_counter() - inicio, 4),
+            "resposta": _para_dict(response),
+        })
+        return response
+
+    def _gravar_stream(self, stream, impressao: str, funcao: str, inicio: float):
+        chunks = []
+        for chunk in stream:
+            chunks.append([round(time.perf_counter() - inicio, 4), _para_dict(chunk)])
+            yield chunk
+        # Stream interrompido no meio não chega aqui e não é gravado
+        self._gravar({
+            "id": impressao, "funcao": funcao, "latencia_s": round(time.perf_counter() - inicio, 4),
+            "chunks": chunks,
+        })
+
+    def _reproduzir_stream(self, gravacao: dict):
+        inicio = time.perf_counter()
+        esperar = latencia_original()
+        for instante, dados in gravacao["chunks"]:
+            if esperar:
+                atraso = instante - (time.perf_counter() - inicio)
+                if atraso > 0:
+                    time.sleep(atraso)
+            yield _remontar(dados, ChatCompletionChunk)
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            return {
+                "modo": modo_cassete(),
+                "arquivo": arquivo_cassete(),
+                "latencia": "original" if latencia_original() else "zero",
+                **self._estatisticas,
+            }
+
+
+# Fita única do processo
+cassete_ia = Cassete()
@@ -0,0 +1,406 @@
+import io
+import os
+import re
+import csv
+import time
+import sqlite3
+import threading
+from datetime import date, datetime
+
+from cache_utils import CACHE_DIR
+from esquemas_utils import converter_numero
+from pix_utils import gerar_txid
+from texto_utils import normalizar_texto
+
+# ============================================
+# LIVRO DE COBRANÇAS PIX
+# ============================================
+
+LIVRO_ARQUIVO = os.path.join(CACHE_DIR, "cobrancas_pix.sqlite3")
+
+
+def _centavos(valor: float) -> int:
+    return int(round(valor * 100))
+
+
+class LivroCobrancas:
+    """
+    Registro das cobranças Pix geradas, cada uma com seu txid, para conferir depois
+    no extrato quem pagou. Fica em SQLite (ou só em memória se o disco falhar).
+    Gerar de novo a mesma cobrança ainda em aberto (mesma chave, pessoa, valor e
+    descrição) devolve o mesmo txid, para o QR e o copia e cola não se multiplicarem.
+    Cada lote pertence a um evento (o churrasco): se o valor ou a descrição mudarem
+    no mesmo evento, o txid novo substitui o anterior da pessoa, que deixa de contar
+    como em aberto. Cobranças de outros eventos da mesma pessoa continuam valendo.
+    """
+
+    def __init__(self, caminho: str | None = LIVRO_ARQUIVO):
+        self.caminho = caminho
+        self._conexao = None
+        self._lock = threading.Lock()
+
+    def _abrir(self):
+        if self._conexao is not None:
+            return self._conexao
+        conexao = None
+        if self.caminho:
+            try:
+                os.makedirs(os.path.dirname(self.caminho), exist_ok=True)
+                conexao = sqlite3.connect(self.caminho, check_same_thread=False, timeout=5)
+                conexao.execute("PRAGMA journal_mode=WAL")
+            except (sqlite3.Error, OSError):
+                conexao = None
+        if conexao is None:
+            conexao = sqlite3.connect(":memory:", check_same_thread=False)
+        conexao.execute(
+            """CREATE TABLE IF NOT EXISTS cobrancas (
+                txid TEXT PRIMARY KEY,
+                chave_pix TEXT NOT NULL,
+                pessoa TEXT NOT NULL,
+                valor_centavos INTEGER NOT NULL,
+                descricao TEXT NOT NULL DEFAULT '',
+                criado_em REAL NOT NULL,
+                pago_em REAL,
+                lancamento TEXT,
+                substituida_por TEXT,
+                evento TEXT NOT NULL DEFAULT ''
+            )"""
+        )
+        # Livros criados antes das colunas substituida_por e evento
+        colunas = {linha[1] for linha in conexao.execute("PRAGMA table_info(cobrancas)")}
+        if "substituida_por" not in colunas:
+            conexao.execute("ALTER TABLE cobrancas ADD COLUMN substituida_por TEXT")
+        if "evento" not in colunas:
+            conexao.execute("ALTER TABLE cobrancas ADD COLUMN evento TEXT NOT NULL DEFAULT ''")
+        conexao.execute("CREATE INDEX IF NOT EXISTS cobrancas_abertas ON cobrancas (chave_pix, pago_em)")
+        conexao.commit()
+        self._conexao = conexao
+        return conexao
+
+    def registrar_lote(self, chave_pix: str, valores: dict, descricoes: dict | None = None, evento: str = "") -> dict:
+        """Registra {pessoa: valor} do evento numa transação só. Retorna {pessoa: txid}."""
+        with self._lock:
+            conexao = self._abrir()
+            abertas = {
+                (pessoa, centavos, descricao): txid
+                for txid, pessoa, centavos, descricao in conexao.execute(
+                    "SELECT txid, pessoa, valor_centavos, descricao FROM cobrancas "
+                    "WHERE chave_pix = ? AND evento = ? AND pago_em IS NULL AND substituida_por IS NULL",
+                    (chave_pix, evento)
+                )
+            }
+            txids, novas = {}, []
+            agora = time.time()
+            for pessoa, valor in valores.items():
+                descricao = (descricoes or {}).get(pessoa, "")
+                chave = (pessoa, _centavos(valor), descricao)
+                txid = abertas.get(chave)
+                if txid is None:
+                    txid = abertas[chave] = gerar_txid()
+                    novas.append((txid, chave_pix, pessoa, chave[1], descricao, agora, evento))
+                txids[pessoa] = txid
+            conexao.executemany(
+                "INSERT INTO cobrancas (txid, chave_pix, pessoa, valor_centavos, descricao, criado_em, evento) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                novas
+            )
+            # Valor ou descrição mudou no mesmo evento: a cobrança anterior da pessoa fica substituída
+            conexao.executemany(
+                "UPDATE cobrancas SET substituida_por = ? WHERE chave_pix = ? AND pessoa = ? AND evento = ? "
+                "AND txid != ? AND pago_em IS NULL AND substituida_por IS NULL",
+                [(txid, chave_pix, pessoa, evento, txid) for txid, chave_pix, pessoa, *_ in novas]
+            )
+            conexao.commit()
+        return txids
+
+    def registrar(self, chave_pix: str, pessoa: str, valor: float, descricao: str = "", evento: str = "") -> str:
+        return self.registrar_lote(chave_pix, {pessoa: valor}, {pessoa: descricao}, evento)[pessoa]
+
+    def em_aberto(self, chave_pix: str | None = None, incluir_substituidas: bool = False) -> list:
+        """
+        Cobranças ainda não pagas. As substituídas (a pessoa ganhou um txid novo) só vêm
+        com incluir_substituidas, marcadas em "substituida_por": alguém pode ter pago o
+        QR antigo, e a conciliação ainda reconhece esse txid no extrato.
+        """
+        with self._lock:
+            conexao = self._abrir()
+            consulta = ("SELECT txid, chave_pix, pessoa, valor_centavos, descricao, criado_em, substituida_por, evento "
+                        "FROM cobrancas WHERE pago_em IS NULL")
+            parametros = ()
+            if not incluir_substituidas:
+                consulta += " AND substituida_por IS NULL"
+            if chave_pix is not None:
+                consulta += " AND chave_pix = ?"
+                parametros = (chave_pix,)
+            return [
+                {"txid": txid, "chave_pix": chave, "pessoa": pessoa, "valor": centavos / 100,
+                 "descricao": descricao, "criado_em": criado_em, "substituida_por": substituida_por, "evento": evento}
+                for txid, chave, pessoa, centavos, descricao, criado_em, substituida_por, evento
+                in conexao.execute(consulta, parametros)
+            ]
+
+    def marcar_pagas(self, conciliados: list) -> int:
+        """Dá baixa nas cobranças conciliadas (itens de conciliar(...)["conciliados"])."""
+        with self._lock:
+            conexao = self._abrir()
+            cursor = conexao.executemany(
+                "UPDATE cobrancas SET pago_em = ?, lancamento = ? WHERE txid = ? AND pago_em IS NULL",
+                [(time.time(), c["lancamento"]["id"], c["txid"]) for c in conciliados]
+            )
+            conexao.commit()
+            return cursor.rowcount
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            abertas, pagas, substituidas = self._abrir().execute(
+                "SELECT SUM(pago_em IS NULL AND substituida_por IS NULL), SUM(pago_em IS NOT NULL), "
+                "SUM(pago_em IS NULL AND substituida_por IS NOT NULL) FROM cobrancas"
+            ).fetchone()
+        return {"em_aberto": abertas or 0, "pagas": pagas or 0, "substituidas": substituidas or 0}
+
+
+# Livro único do processo
+livro_cobrancas = LivroCobrancas()
+
+
+# ============================================
+# LEITURA DO EXTRATO (CSV OU OFX)
+# ============================================
+
+_FORMATOS_DATA = ("%d/%m/%Y", "%Y-%m-%d", "%d/%m/%y", "%d-%m-%Y", "%Y%m%d")
+
+# Nome da coluna normalizado -> campo do lançamento (primeiro que bater)
+_COLUNAS_CSV = (
+    ("data", ("data", "date", "dt")),
+    ("valor", ("valor", "amount", "quantia", "credito", "entrada")),
+    ("descricao", ("descricao", "historico", "memo", "detalhe", "lancamento", "description")),
+    ("id", ("id", "identificador", "documento", "fitid", "autenticacao")),
+)
+
+
+def _ler_data(texto: str) -> date | None:
+    texto = texto.strip().split(" ")[0].split("T")[0]
+    for formato in _FORMATOS_DATA:
+        try:
+            return datetime.strptime(texto, formato).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _abrir_texto(arquivo):
+    """Aceita caminho, bytes, arquivo binário (ex.: upload do Streamlit) ou de texto."""
+    if isinstance(arquivo, (str, os.PathLike)):
+        return open(arquivo, encoding="utf-8-sig", errors="replace", newline="")
+    if isinstance(arquivo, bytes):
+        arquivo = io.BytesIO(arquivo)
+    if isinstance(arquivo, io.TextIOBase):
+        return arquivo
+    return io.TextIOWrapper(arquivo, encoding="utf-8-sig", errors="replace", newline="")
+
+
+def _lancamento(data: date | None, valor, descricao: str, identificador: str, linha: int) -> dict | None:
+    valor = converter_numero(valor)
+    if data is None or valor is None:
+        return None
+    return {
+        "id": identificador or f"linha-{linha}",
+        "data": data,
+        "valor_centavos": _centavos(valor),
+        "descricao": descricao.strip(),
+    }
+
+
+def _ler_csv(linhas) -> iter:
+    cabecalho = next(linhas, "")
+    delimitador = ";" if cabecalho.count(";") >= cabecalho.count(",") else ","
+    nomes = [normalizar_texto(nome) for nome in next(csv.reader([cabecalho], delimiter=delimitador))]
+    indices = {}
+    for campo, apelidos in _COLUNAS_CSV:
+        for apelido in apelidos:
+            indice = next((i for i, nome in enumerate(nomes) if nome.startswith(apelido) and i not in indices.values()), None)
+            if indice is not None:
+                indices[campo] = indice
+                break
+    if "data" not in indices or "valor" not in indices:
+        raise ValueError("CSV sem colunas de data e valor reconhecíveis")
+
+    for numero, colunas in enumerate(csv.reader(linhas, delimiter=delimitador), start=2):
+        if len(colunas) <= max(indices.values()):
+            continue
+
+        def coluna(campo):
+            return colunas[indices[campo]] if campo in indices else ""
+
+        lancamento = _lancamento(_ler_data(coluna("data")), coluna("valor"), coluna("descricao"), coluna("id"), numero)
+        if lancamento:
+            yield lancamento
+
+
+# Uma tag e o texto até a próxima tag (no SGML as tags de valor não são fechadas)
+_TAG_OFX = re.compile(r"<(/?)(\w+)>([^<]*)")
+
+
+def _tags_ofx(linhas) -> iter:
+    """
+    Gera (fechamento, TAG, valor) em streaming, pelas tags e não pelas linhas: o mesmo
+    código lê o SGML com uma tag por linha e o XML minificado numa linha só. Uma tag só
+    sai quando a seguinte já chegou, porque o valor dela pode continuar na próxima linha.
+    """
+    pendente = ""
+    for linha in linhas:
+        pendente += linha
+        ultima = pendente.rfind("<")
+        if ultima <= 0:
+            continue
+        for fechamento, tag, valor in _TAG_OFX.findall(pendente, 0, ultima):
+            yield fechamento, tag.upper(), valor.strip()
+        pendente = pendente[ultima:]
+    for fechamento, tag, valor in _TAG_OFX.findall(pendente):
+        yield fechamento, tag.upper(), valor.strip()
+
+
+def _ler_ofx(linhas) -> iter:
+    """OFX (SGML ou XML, com ou sem quebras de linha): um lançamento por bloco <STMTTRN>."""
+    atual = None
+    numero = 0
+
+    def fechar(campos):
+        nonlocal numero
+        numero += 1
+        return _lancamento(
+            _ler_data(campos.get("DTPOSTED", "")[:8]), campos.get("TRNAMT"),
+            " ".join(filter(None, (campos.get("NAME"), campos.get("MEMO")))), campos.get("FITID", ""), numero
+        )
+
+    for fechamento, tag, valor in _tags_ofx(linhas):
+        if tag == "STMTTRN":
+            # Um <STMTTRN> novo sem o </STMTTRN> do anterior também encerra o anterior
+            lancamento = fechar(atual) if atual is not None else None
+            atual = None if fechamento else {}
+            if lancamento:
+                yield lancamento
+        elif atual is not None and not fechamento:
+            atual[tag] = valor
+    if atual is not None:
+        lancamento = fechar(atual)
+        if lancamento:
+            yield lancamento
+
+
+def ler_extrato(arquivo, formato: str | None = None):
+    """
+    Lê o extrato exportado do banco (CSV ou OFX) em streaming, sem carregar o arquivo
+    inteiro. Gera dicts {id, data, valor_centavos, descricao}; débitos vêm negativos.
+    formato "csv"/"ofx" força o tipo; sem ele, é detectado pelo começo do arquivo.
+    """
+    texto = _abrir_texto(arquivo)
+    try:
+        primeira = texto.readline()
+        if formato is None:
+            formato = "ofx" if "OFX" in primeira.upper() or primeira.lstrip().startswith("<") else "csv"
+
+        def linhas():
+            yield primeira
+            yield from texto
+
+        yield from (_ler_ofx if formato == "ofx" else _ler_csv)(linhas())
+    finally:
+        if isinstance(arquivo, (str, os.PathLike)):
+            texto.close()
+
+
+# ============================================
+# CONCILIAÇÃO
+# ============================================
+
+# Candidatos listados num lançamento ambíguo
+MAX_CANDIDATOS = 10
+
+
+def _procurar_txid(texto: str, por_txid: dict, tamanhos: list) -> dict | None:
+    """Primeira cobrança cujo txid aparece em `texto`, mesmo colado em outras letras."""
+    for tamanho in tamanhos:
+        for inicio in range(len(texto) - tamanho + 1):
+            cobranca = por_txid.get(texto[inicio:inicio + tamanho])
+            if cobranca is not None:
+                return cobranca
+    return None
+
+
+def conciliar(lancamentos, cobrancas: list, janela_dias: int = 3) -> dict:
+    """
+    Casa os créditos do extrato com as cobranças em aberto.
+    1. txid no histórico do lançamento -> índice por txid. O banco costuma colar o txid
+       em outros textos ("PIXCH..."), então cada trecho do histórico do tamanho de um
+       txid conhecido é procurado no índice.
+    2. Sem txid: índice por (valor em centavos, dia da cobrança), procurando o crédito
+       nos janela_dias depois da cobrança; mais de uma cobrança possível é ambígua.
+    Cobranças substituídas (ver LivroCobrancas.em_aberto) só casam pelo txid.
+    Cada lançamento custa O(tamanho do histórico), independente do número de cobranças,
+    então o extrato pode ter dezenas de milhares de linhas.
+    """
+    inicio = time.perf_counter()
+    por_txid = {c["txid"].upper(): c for c in cobrancas}
+    tamanhos_txid = sorted({len(txid) for txid in por_txid}, reverse=True)
+    por_valor_dia: dict = {}
+    for c in cobrancas:
+        if c.get("substituida_por"):
+            continue
+        dia = datetime.fromtimestamp(c["criado_em"]).date().toordinal()
+        por_valor_dia.setdefault((_centavos(c["valor"]), dia), []).append(c)
+
+    pagas = set()
+    conciliados, ambiguos, nao_identificados, duplicados = [], [], [], []
+    linhas = creditos = 0
+    for lancamento in lancamentos:
+        linhas += 1
+        if lancamento["valor_centavos"] <= 0:
+            continue
+        creditos += 1
+        registro = {**lancamento, "data": lancamento["data"].isoformat()}
+
+        cobranca = _procurar_txid(f"{lancamento['descricao']} {lancamento['id']}".upper(), por_txid, tamanhos_txid)
+        if cobranca is not None:
+            if cobranca["txid"] in pagas:
+                duplicados.append({"txid": cobranca["txid"], "lancamento": registro})
+            else:
+                pagas.add(cobranca["txid"])
+                conciliados.append({"txid": cobranca["txid"], "pessoa": cobranca["pessoa"],
+                                    "valor": cobranca["valor"], "via": "txid", "lancamento": registro})
+            continue
+
+        dia = lancamento["data"].toordinal()
+        possiveis = []
+        for d in range(dia - janela_dias, dia + 1):
+            for c in por_valor_dia.get((lancamento["valor_centavos"], d), ()):
+                if c["txid"] not in pagas:
+                    possiveis.append(c)
+            # Divisão igual para muita gente: já é ambíguo, não precisa listar todos
+            if len(possiveis) > MAX_CANDIDATOS:
+                break
+        if len(possiveis) == 1:
+            cobranca = possiveis[0]
+            pagas.add(cobranca["txid"])
+            conciliados.append({"txid": cobranca["txid"], "pessoa": cobranca["pessoa"],
+                                "valor": cobranca["valor"], "via": "valor_data", "lancamento": registro})
+        elif possiveis:
+            ambiguos.append({"lancamento": registro, "candidatos": [c["txid"] for c in possiveis[:MAX_CANDIDATOS]]})
+        else:
+            nao_identificados.append(registro)
+
+    return {
+        "conciliados": conciliados,
+        "ambiguos": ambiguos,
+        "nao_identificados": nao_identificados,
+        "duplicados": duplicados,
+        "em_aberto": [c for c in cobrancas if c["txid"] not in pagas and not c.get("substituida_por")],
+        "estatisticas": {
+            "linhas": linhas,
+            "creditos": creditos,
+            "conciliados": len(conciliados),
+            "ambiguos": len(ambiguos),
+            "nao_identificados": len(nao_identificados),
+            "tempo_s": round(time.perf_counter() - inicio, 4),
+        },
+    }
@@ -0,0 +1,290 @@
+import os
+import copy
+import asyncio
+import threading
+from collections import deque
+
+# ============================================
+# SEMÁFORO GLOBAL (ENTRE EVENT LOOPS)
+# ============================================
+
+class _Espera:
+    """Uma coroutine aguardando vaga no semáforo."""
+    __slots__ = ("loop", "futuro", "concedida")
+
+    def __init__(self, loop, futuro):
+        self.loop = loop
+        self.futuro = futuro
+        self.concedida = False
+
+
+def _resolver(futuro):
+    if not futuro.done():
+        futuro.set_result(None)
+
+
+class SemaforoGlobal:
+    """
+    Semáforo assíncrono válido para o processo inteiro.
+    O asyncio.Semaphore fica preso ao event loop em que foi usado; no Streamlit cada
+    sessão roda em uma thread com seu próprio loop, então o limite precisa ser
+    compartilhado entre loops. A fila é FIFO e uma coroutine cancelada enquanto
+    espera não consome vaga.
+    """
+
+    def __init__(self, limite: int):
+        self.limite = limite
+        self._livres = limite
+        self._fila: deque = deque()
+        self._lock = threading.Lock()
+
+    async def adquirir(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._livres > 0 and not self._fila:
+                self._livres -= 1
+                return
+            espera = _Espera(loop, loop.create_future())
+            self._fila.append(espera)
+
+        try:
+            await espera.futuro
+        except asyncio.CancelledError:
+            with self._lock:
+                if espera.concedida:
+                    # A vaga chegou junto com o cancelamento: repassa para o próximo
+                    self._liberar_com_lock()
+                else:
+                    self._fila.remove(espera)
+            raise
+
+    def liberar(self):
+        with self._lock:
+            self._liberar_com_lock()
+
+    def _liberar_com_lock(self):
+        while self._fila:
+            espera = self._fila.popleft()
+            if espera.loop.is_closed():
+                continue
+            espera.concedida = True
+            espera.loop.call_soon_threadsafe(_resolver, espera.futuro)
+            return
+        self._livres += 1
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            return {"limite": self.limite, "em_uso": self.limite - self._livres, "na_fila": len(self._fila)}
+
+    async def __aenter__(self):
+        await self.adquirir()
+        return self
+
+    async def __aexit__(self, *exc):
+        self.liberar()
+        return False
+
+
+# Limite de chamadas simultâneas à IA no processo todo (todas as sessões)
+semaforo_ia = SemaforoGlobal(int(os.environ.get("CHURRASCO_IA_CONCORRENCIA", "8")))
+
+
+# ============================================
+# PONTE ENTRE CÓDIGO SÍNCRONO E ASSÍNCRONO
+# ============================================
+
+async def _aguardar_com_cancelamento(coro, cancelamento: threading.Event | None):
+    """Roda a coroutine e a cancela se o evento for disparado de outra thread."""
+    tarefa = asyncio.ensure_future(coro)
+    if cancelamento is None:
+        return await tarefa
+
+    async def vigiar():
+        while not cancelamento.is_set():
+            await asyncio.sleep(0.1)
+        tarefa.cancel()
+
+    vigia = asyncio.ensure_future(vigiar())
+    try:
+        return await tarefa
+    finally:
+        vigia.cancel()
+
+
+def executar_async(coro, cancelamento: threading.Event | None = None):
+    """
+    Executa uma coroutine a partir de código síncrono (ex: script do Streamlit).
+    Se já houver um event loop rodando nesta thread, executa em uma thread auxiliar.
+    Com cancelamento, disparar o evento cancela a coroutine (levanta CancelledError).
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(_aguardar_com_cancelamento(coro, cancelamento))
+
+    resultado = {}
+
+    def rodar():
+        try:
+            resultado["valor"] = asyncio.run(_aguardar_com_cancelamento(coro, cancelamento))
+        except BaseException as e:
+            resultado["erro"] = e
+
+    thread = threading.Thread(target=rodar, daemon=True)
+    thread.start()
+    thread.join()
+    if "erro" in resultado:
+        raise resultado["erro"]
+    return resultado["valor"]
+
+
+async def reunir(*coros, return_exceptions: bool = False):
+    """
+    asyncio.gather que cancela as coroutines restantes quando uma falha
+    (ou quando quem aguarda é cancelado), em vez de deixá-las rodando soltas.
+    """
+    tarefas = [asyncio.ensure_future(c) for c in coros]
+    try:
+        return await asyncio.gather(*tarefas, return_exceptions=return_exceptions)
+    except BaseException:
+        for tarefa in tarefas:
+            tarefa.cancel()
+        await asyncio.gather(*tarefas, return_exceptions=True)
+        raise
+
+
+# ============================================
+# VOO ÚNICO (CHAMADAS IDÊNTICAS EM ANDAMENTO)
+# ============================================
+
+class VooCancelado(Exception):
+    """A chamada líder foi interrompida; quem esperava deve tentar de novo."""
+
+
+class _Voo:
+    """Uma chamada em andamento e quem está esperando o resultado dela."""
+    __slots__ = ("pronto", "valor", "erro", "cancelado", "esperas_async", "passageiros")
+
+    def __init__(self):
+        self.pronto = threading.Event()
+        self.valor = None
+        self.erro = None
+        self.cancelado = False
+        self.esperas_async = []  # (loop, futuro) de coroutines aguardando
+        self.passageiros = 0
+
+
+class VooUnico:
+    """
+    Junta chamadas idênticas que chegam enquanto a primeira ainda está rodando:
+    só a primeira (a "líder") vai à API, e as outras recebem uma cópia do mesmo
+    resultado ou a mesma exceção. Vale entre threads e event loops diferentes
+    (sessões do Streamlit). Se a líder for interrompida (cancelamento, rerun do
+    Streamlit), quem esperava não herda a interrupção: uma delas assume e refaz a chamada.
+    """
+
+    def __init__(self):
+        self._voos: dict = {}
+        self._lock = threading.Lock()
+        self._estatisticas = {"chamadas": 0, "coalescidas": 0}
+
+    def entrar(self, chave: str) -> tuple:
+        """Retorna (eh_lider, voo). A líder deve chamar concluir() ao terminar, com sucesso ou não."""
+        with self._lock:
+            self._estatisticas["chamadas"] += 1
+            voo = self._voos.get(chave)
+            if voo is not None:
+                voo.passageiros += 1
+                self._estatisticas["coalescidas"] += 1
+                return False, voo
+            voo = self._voos[chave] = _Voo()
+            return True, voo
+
+    def concluir(self, chave: str, voo: _Voo, valor=None, erro: BaseException | None = None):
+        """
+        Publica o resultado da líder. Exceções comuns são repassadas a todos;
+        interrupções (BaseException, como CancelledError) liberam os outros para tentar de novo.
+        """
+        with self._lock:
+            if self._voos.get(chave) is voo:
+                del self._voos[chave]
+            if erro is not None and not isinstance(erro, Exception):
+                voo.cancelado = True
+            else:
+                voo.valor = copy.deepcopy(valor)
+                voo.erro = erro
+            voo.pronto.set()
+            esperas, voo.esperas_async = voo.esperas_async, []
+        for loop, futuro in esperas:
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(_resolver, futuro)
+
+    def _resultado(self, voo: _Voo):
+        if voo.cancelado:
+            raise VooCancelado()
+        if voo.erro is not None:
+            raise voo.erro
+        return copy.deepcopy(voo.valor)
+
+    def aguardar(self, voo: _Voo):
+        """Espera (bloqueando a thread) o voo da líder terminar e devolve uma cópia do resultado."""
+        voo.pronto.wait()
+        return self._resultado(voo)
+
+    async def aguardar_async(self, voo: _Voo):
+        """Versão assíncrona de aguardar."""
+        loop = asyncio.get_running_loop()
+        futuro = loop.create_future()
+        with self._lock:
+            if voo.pronto.is_set():
+                futuro.set_result(None)
+            else:
+                voo.esperas_async.append((loop, futuro))
+        await futuro
+        return self._resultado(voo)
+
+    def executar(self, chave: str, funcao):
+        """Roda funcao() uma vez por chave em andamento e compartilha o resultado."""
+        while True:
+            lider, voo = self.entrar(chave)
+            if not lider:
+                try:
+                    return self.aguardar(voo)
+                except VooCancelado:
+                    continue
+            try:
+                valor = funcao()
+            except BaseException as e:
+                self.concluir(chave, voo, erro=e)
+                raise
+            self.concluir(chave, voo, valor=valor)
+            return valor
+
+    async def executar_async(self, chave: str, fabrica_coro):
+        """Versão assíncrona: fabrica_coro() cria a coroutine, chamada só pela líder."""
+        while True:
+            lider, voo = self.entrar(chave)
+            if not lider:
+                try:
+                    return await self.aguardar_async(voo)
+                except VooCancelado:
+                    continue
+            try:
+                valor = await fabrica_coro()
+            except BaseException as e:
+                self.concluir(chave, voo, erro=e)
+                raise
+            self.concluir(chave, voo, valor=valor)
+            return valor
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            return {
+                **self._estatisticas,
+                "em_andamento": len(self._voos),
+                "aguardando": sum(voo.passageiros for voo in self._voos.values()),
+            }
+
+
+# Chamadas de IA idênticas em andamento no processo todo
+voo_unico_ia = VooUnico()
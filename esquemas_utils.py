@@ -0,0 +1,195 @@
+import re
+
+from texto_utils import remover_acentos
+
+# ============================================
+# CONVERSÃO DE TIPOS
+# ============================================
+
+_NAO_NUMERICO = re.compile(r"[^\d,.\-]")
+
+
+def converter_numero(valor) -> float | None:
+    """
+    Converte o que a IA mandar como preço em float.
+    Aceita 89.9, "89,90", "R$ 1.234,56", "1,234.56"; retorna None se não for número.
+    """
+    if isinstance(valor, bool):
+        return None
+    if isinstance(valor, (int, float)):
+        return float(valor)
+    if not isinstance(valor, str):
+        return None
+    texto = _NAO_NUMERICO.sub("", valor)
+    if not texto or not any(c.isdigit() for c in texto):
+        return None
+    if "," in texto and "." in texto:
+        # O separador que aparece por último é o decimal
+        if texto.rfind(",") > texto.rfind("."):
+            texto = texto.replace(".", "").replace(",", ".")
+        else:
+            texto = texto.replace(",", "")
+    elif "," in texto:
+        texto = texto.replace(",", ".")
+    elif texto.count(".") > 1:
+        # "1.234.567" é separador de milhar
+        texto = texto.replace(".", "")
+    try:
+        return float(texto)
+    except ValueError:
+        return None
+
+
+def converter_booleano(valor, padrao: bool = False) -> bool:
+    if isinstance(valor, bool):
+        return valor
+    if isinstance(valor, (int, float)):
+        return valor != 0
+    if isinstance(valor, str):
+        texto = valor.strip().lower()
+        if texto in ("true", "sim", "s", "yes", "1", "verdadeiro"):
+            return True
+        if texto in ("false", "nao", "não", "n", "no", "0", "falso"):
+            return False
+    return padrao
+
+
+def converter_inteiro(valor, padrao: int = 0) -> int:
+    numero = converter_numero(valor)
+    return int(round(numero)) if numero is not None else padrao
+
+
+def converter_texto(valor, padrao: str = "") -> str:
+    if valor is None:
+        return padrao
+    if isinstance(valor, str):
+        return valor.strip() or padrao
+    return str(valor)
+
+
+# ============================================
+# ESQUEMA DA LISTA DE COMPRAS
+# ============================================
+
+CATEGORIAS_LISTA = ["carnes", "bebidas", "acompanhamentos", "carvao_gelo"]
+
+# Campo -> (conversor, padrão) de cada item da lista
+ESQUEMA_ITEM_LISTA = {
+    "item": (converter_texto, None),
+    "quantidade": (converter_texto, ""),
+    "preco_estimado": (converter_numero, 0.0),
+}
+
+# Palavras inteiras, sem acento: "gin" não pode pegar "Ginger Ale" nem "Suco Original"
+_PALAVRAS_ALCOOLICAS = re.compile(
+    r"\b(?:cervejas?|chopps?|chopes?|vinhos?|vodkas?|whiskys?|whiskies|cachacas?|gin|caipirinhas?|licor(?:es)?|espumantes?)\b"
+)
+
+
+def _parece_alcoolica(nome: str) -> bool:
+    return _PALAVRAS_ALCOOLICAS.search(remover_acentos(nome).lower()) is not None
+
+
+def validar_itens_lista(categoria: str, itens) -> list:
+    """Normaliza os itens de uma categoria; itens sem nome são descartados."""
+    if not isinstance(itens, list):
+        return []
+    validos = []
+    for bruto in itens:
+        if isinstance(bruto, str):
+            bruto = {"item": bruto}
+        if not isinstance(bruto, dict):
+            continue
+        item = {}
+        for campo, (conversor, padrao) in ESQUEMA_ITEM_LISTA.items():
+            valor = conversor(bruto.get(campo))
+            item[campo] = valor if valor is not None else padrao
+        if not item["item"]:
+            continue
+        item["preco_estimado"] = round(max(0.0, item["preco_estimado"]), 2)
+        if categoria == "bebidas":
+            item["alcoolica"] = converter_booleano(bruto.get("alcoolica"), _parece_alcoolica(item["item"]))
+        validos.append(item)
+    return validos
+
+
+def validar_lista(dados) -> tuple:
+    """
+    Confere e completa a lista de compras vinda da IA.
+    Retorna (lista, categorias_faltando): as categorias que não vieram (resposta cortada
+    ou incompleta) ficam vazias na lista e saem em categorias_faltando, para pedir só elas de novo.
+    O total_estimado é sempre recalculado a partir dos itens.
+    """
+    dados = dados if isinstance(dados, dict) else {}
+    lista = {**dados}
+    faltando = []
+    for categoria in CATEGORIAS_LISTA:
+        if not isinstance(dados.get(categoria), list):
+            faltando.append(categoria)
+        lista[categoria] = validar_itens_lista(categoria, dados.get(categoria))
+
+    lista["resumo"] = converter_texto(dados.get("resumo"), "Lista pronta!")
+    lista["pessoas"] = converter_inteiro(dados.get("pessoas"))
+    lista["duracao_estimada"] = converter_texto(dados.get("duracao_estimada"))
+    dicas = dados.get("dicas")
+    lista["dicas"] = [converter_texto(d) for d in dicas if d] if isinstance(dicas, list) else []
+    lista["total_estimado"] = recalcular_total_lista(lista)
+    return lista, faltando
+
+
+def recalcular_total_lista(lista: dict) -> float:
+    return round(sum(
+        item["preco_estimado"] for categoria in CATEGORIAS_LISTA for item in lista.get(categoria, [])
+    ), 2)
+
+
+# ============================================
+# ESQUEMA DA NOTA FISCAL
+# ============================================
+
+def validar_itens_nota(itens) -> tuple:
+    """
+    Normaliza os itens da nota. Retorna (itens, sem_preco): itens cujo preço não deu
+    para ler ficam fora da lista e saem pelo nome em sem_preco.
+    """
+    if not isinstance(itens, list):
+        return [], []
+    validos, sem_preco = [], []
+    for bruto in itens:
+        if not isinstance(bruto, dict):
+            continue
+        nome = converter_texto(bruto.get("nome") or bruto.get("item"))
+        if not nome:
+            continue
+        preco = converter_numero(bruto.get("preco"))
+        if preco is None:
+            sem_preco.append(nome)
+            continue
+        validos.append({
+            **bruto,
+            "nome": nome,
+            "preco": round(preco, 2),
+            "alcoolica": converter_booleano(bruto.get("alcoolica"), _parece_alcoolica(nome)),
+        })
+    return validos, sem_preco
+
+
+def validar_nota(dados) -> tuple:
+    """
+    Confere a nota vinda da IA. Retorna (nota, sem_preco).
+    O total que a IA leu na nota vira total_impresso; os totais somados ficam para
+    quem chama recalcular a partir dos itens (utils.recalcular_totais_nota).
+    Respostas de erro ("não é nota fiscal") passam sem alteração.
+    """
+    dados = dados if isinstance(dados, dict) else {}
+    if "erro" in dados and not dados.get("itens"):
+        return dados, []
+    itens, sem_preco = validar_itens_nota(dados.get("itens"))
+    nota = {**dados, "itens": itens}
+    total_impresso = converter_numero(dados.get("total_impresso", dados.get("total_nota")))
+    nota.pop("total_impresso", None)
+    if total_impresso is not None:
+        nota["total_impresso"] = round(total_impresso, 2)
+    nota["estabelecimento"] = converter_texto(dados.get("estabelecimento")) or None
+    nota["data_compra"] = converter_texto(dados.get("data_compra")) or None
+    return nota, sem_preco
@@ -0,0 +1,345 @@
+import io
+import os
+import re
+import csv
+import time
+import zlib
+import zipfile
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from PIL import Image
+
+from qrcode_utils import calcular_matriz, desenhar_png, desenhar_svg, renderizador_qr, BORDA_PADRAO
+from mensagens_utils import formatar_valor
+from texto_utils import remover_acentos
+
+# ============================================
+# CONFIGURAÇÃO DA EXPORTAÇÃO
+# ============================================
+
+FORMATOS_EXPORTACAO = ("zip", "pdf")
+IMAGENS_EXPORTACAO = ("png", "svg")
+
+# Abaixo disso renderiza no próprio processo: subir e alimentar o pool custa mais que os QRs
+LIMIAR_PROCESSOS = 64
+# QRs por tarefa enviada ao pool e tarefas em voo por processo (memória limitada)
+TAMANHO_BLOCO = 32
+BLOCOS_POR_PROCESSO = 2
+
+
+def processos_exportacao() -> int:
+    """CHURRASCO_EXPORTACAO_PROCESSOS limita o pool (padrão: núcleos da máquina, no máximo 8)."""
+    valor = os.environ.get("CHURRASCO_EXPORTACAO_PROCESSOS")
+    if valor:
+        return max(1, int(valor))
+    return min(8, os.cpu_count() or 1)
+
+
+def _nome_arquivo(indice: int, pessoa: str) -> str:
+    """'003_joao_da_silva': ordem da divisão e nome sem acento, seguro em qualquer sistema."""
+    base = re.sub(r"[^a-z0-9]+", "_", remover_acentos(pessoa).lower()).strip("_") or "pessoa"
+    return f"{indice:03d}_{base[:40]}"
+
+
+# ============================================
+# RENDERIZAÇÃO (NOS PROCESSOS DO POOL)
+# ============================================
+
+def _bitmap_pdf(payload: str, molde: str | None) -> tuple:
+    """QR com borda em 1 bit por módulo, comprimido: a página do PDF amplia sem interpolar."""
+    matriz = calcular_matriz(payload, molde=molde)
+    lado = len(matriz) + 2 * BORDA_PADRAO
+    margem = b"\xff" * lado
+    lateral = b"\xff" * BORDA_PADRAO
+    linhas = [margem] * BORDA_PADRAO
+    for linha in matriz:
+        linhas.append(lateral + bytes(0 if escuro else 255 for escuro in linha) + lateral)
+    linhas.extend([margem] * BORDA_PADRAO)
+    imagem = Image.frombytes("L", (lado, lado), b"".join(linhas)).convert("1")
+    return lado, zlib.compress(imagem.tobytes())
+
+
+def _renderizar_bloco(payloads: list, imagem: str, molde: str | None) -> list:
+    """Tarefa do pool: um bloco de payloads vira PNG, SVG ou bitmap de PDF (na mesma ordem)."""
+    if imagem == "pdf":
+        return [_bitmap_pdf(payload, molde) for payload in payloads]
+    desenhar = desenhar_svg if imagem == "svg" else desenhar_png
+    return [desenhar(calcular_matriz(payload, molde=molde)) for payload in payloads]
+
+
+# Pool único do processo, criado na primeira exportação grande e reaproveitado
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _obter_pool(processos: int):
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # forkserver: os filhos não herdam as threads e locks do Streamlit
+            metodo = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _pool = ProcessPoolExecutor(max_workers=processos, mp_context=multiprocessing.get_context(metodo))
+        return _pool
+
+
+def _descartar_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def renderizar_em_ordem(payloads: list, imagem: str, molde: str | None = None, estado: dict | None = None):
+    """
+    Gera o resultado de cada payload na ordem, para ir gravando direto no arquivo.
+
+    Grupos grandes vão para o pool em blocos, com no máximo BLOCOS_POR_PROCESSO blocos
+    por processo em voo: a memória não cresce com o tamanho do grupo. Grupos pequenos
+    (ou máquina com um núcleo) renderizam aqui mesmo, aproveitando o cache de QR do app.
+    """
+    estado = estado if estado is not None else {}
+    processos = processos_exportacao()
+    blocos = [payloads[i:i + TAMANHO_BLOCO] for i in range(0, len(payloads), TAMANHO_BLOCO)]
+
+    if len(payloads) >= LIMIAR_PROCESSOS and processos > 1:
+        estado["processos"] = processos
+        feitos = 0
+        try:
+            pool = _obter_pool(processos)
+            em_voo = deque()
+            while feitos < len(blocos):
+                while feitos + len(em_voo) < len(blocos) and len(em_voo) < processos * BLOCOS_POR_PROCESSO:
+                    em_voo.append(pool.submit(_renderizar_bloco, blocos[feitos + len(em_voo)], imagem, molde))
+                resultado = em_voo.popleft().result()
+                feitos += 1
+                yield from resultado
+            return
+        except (BrokenProcessPool, OSError):
+            # Ambiente sem suporte a processos: segue no próprio processo a partir do bloco que falhou
+            _descartar_pool()
+            blocos = blocos[feitos:]
+            estado["processos"] = 1
+            estado["pool_indisponivel"] = True
+
+    estado.setdefault("processos", 1)
+    # Grupo pequeno costuma já estar no cache do app; grupo grande não deve expulsar o que está lá
+    usar_cache = imagem != "pdf" and len(payloads) < LIMIAR_PROCESSOS
+    for bloco in blocos:
+        if usar_cache:
+            yield from renderizador_qr.renderizar_lote(bloco, imagem, molde=molde)
+        else:
+            yield from _renderizar_bloco(bloco, imagem, molde)
+
+
+# ============================================
+# ZIP (IMAGENS + MANIFESTO CSV)
+# ============================================
+
+COLUNAS_MANIFESTO = ("pessoa", "valor", "txid", "arquivo_qr", "pix_copia_cola", "mensagem")
+
+
+def exportar_zip(cobrancas: list, destino, imagem: str = "png", molde: str | None = None, estado: dict | None = None):
+    """
+    ZIP com um QR por pessoa (qrcodes/NNN_nome.png|svg) e o manifesto cobrancas.csv
+    (pessoa, valor, txid, arquivo, copia e cola e mensagem). Cada imagem é gravada
+    assim que fica pronta; `destino` é um caminho ou arquivo binário aberto.
+    """
+    arquivos = [f"qrcodes/{_nome_arquivo(i, c['pessoa'])}.{imagem}" for i, c in enumerate(cobrancas, start=1)]
+    # PNG já vem comprimido; SVG é texto e comprime bem
+    compressao = zipfile.ZIP_DEFLATED if imagem == "svg" else zipfile.ZIP_STORED
+    with zipfile.ZipFile(destino, "w", compression=compressao) as arquivo_zip:
+        with arquivo_zip.open("cobrancas.csv", "w", force_zip64=True) as bruto:
+            with io.TextIOWrapper(bruto, encoding="utf-8-sig", newline="") as texto:
+                escritor = csv.writer(texto)
+                escritor.writerow(COLUNAS_MANIFESTO)
+                for cobranca, arquivo in zip(cobrancas, arquivos):
+                    escritor.writerow([
+                        cobranca["pessoa"], f"{cobranca['valor']:.2f}", cobranca.get("txid", ""),
+                        arquivo, cobranca["payload"], cobranca.get("mensagem", ""),
+                    ])
+        resultados = renderizar_em_ordem([c["payload"] for c in cobrancas], imagem, molde, estado)
+        for arquivo, conteudo in zip(arquivos, resultados):
+            arquivo_zip.writestr(arquivo, conteudo)
+
+
+# ============================================
+# PDF (UMA PÁGINA POR PESSOA)
+# ============================================
+
+LARGURA_PAGINA, ALTURA_PAGINA = 595, 842  # A4 em pontos
+LADO_QR_PDF = 280
+
+
+def _texto_pdf(texto: str) -> bytes:
+    """Texto para as fontes padrão do PDF (WinAnsi): sem emoji e com ( ) \\ escapados."""
+    bruto = texto.encode("cp1252", errors="ignore")
+    return bruto.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def _quebrar(texto: str, largura: int) -> list:
+    """Quebra o texto em linhas de até `largura` caracteres (palavras maiores são cortadas)."""
+    linhas, atual = [], ""
+    for palavra in texto.split():
+        while len(palavra) > largura:
+            if atual:
+                linhas.append(atual)
+                atual = ""
+            linhas.append(palavra[:largura])
+            palavra = palavra[largura:]
+        if atual and len(atual) + 1 + len(palavra) > largura:
+            linhas.append(atual)
+            atual = palavra
+        else:
+            atual = f"{atual} {palavra}" if atual else palavra
+    if atual:
+        linhas.append(atual)
+    return linhas
+
+
+def _conteudo_pagina(cobranca: dict) -> bytes:
+    x_qr = (LARGURA_PAGINA - LADO_QR_PDF) // 2
+    y_qr = 430
+    partes = [
+        b"BT /F2 24 Tf 60 770 Td (" + _texto_pdf(cobranca["pessoa"]) + b") Tj ET",
+        b"BT /F1 16 Tf 60 740 Td (" + _texto_pdf(f"Valor: {formatar_valor(cobranca['valor'])}") + b") Tj ET",
+        f"q {LADO_QR_PDF} 0 0 {LADO_QR_PDF} {x_qr} {y_qr} cm /QR Do Q".encode(),
+        b"BT /F2 11 Tf 60 400 Td (Pix copia e cola:) Tj ET",
+    ]
+    y = 384
+    # O copia e cola vai em fatias fixas: os espaços dele (nome, cidade) fazem parte do código
+    payload = cobranca["payload"]
+    for linha in (payload[i:i + 80] for i in range(0, len(payload), 80)):
+        partes.append(f"BT /F3 8 Tf 60 {y} Td (".encode() + _texto_pdf(linha) + b") Tj ET")
+        y -= 11
+    if cobranca.get("txid"):
+        y -= 6
+        partes.append(f"BT /F1 9 Tf 60 {y} Td (".encode() + _texto_pdf(f"txid: {cobranca['txid']}") + b") Tj ET")
+        y -= 12
+    if cobranca.get("mensagem"):
+        y -= 14
+        partes.append(f"BT /F2 11 Tf 60 {y} Td (Mensagem:) Tj ET".encode())
+        y -= 16
+        for linha in _quebrar(cobranca["mensagem"], 90):
+            if y < 40:
+                break
+            partes.append(f"BT /F1 10 Tf 60 {y} Td (".encode() + _texto_pdf(linha) + b") Tj ET")
+            y -= 13
+    return b"\n".join(partes)
+
+
+class _EscritorPdf:
+    """PDF mínimo gravado objeto a objeto: só os offsets ficam em memória até o xref."""
+
+    # 1 = catálogo, 2 = árvore de páginas (gravada no fim), 3-5 = fontes padrão
+    FONTES = {3: b"Helvetica", 4: b"Helvetica-Bold", 5: b"Courier"}
+
+    def __init__(self, saida):
+        self.saida = saida
+        self.posicao = 0
+        self.offsets = {}
+        self.paginas = []
+        self.proximo = 6
+        self._escrever(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._objeto(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        for numero, fonte in self.FONTES.items():
+            self._objeto(numero, b"<< /Type /Font /Subtype /Type1 /BaseFont /" + fonte + b" /Encoding /WinAnsiEncoding >>")
+
+    def _escrever(self, dados: bytes):
+        self.saida.write(dados)
+        self.posicao += len(dados)
+
+    def _objeto(self, numero: int, corpo: bytes, fluxo: bytes | None = None):
+        self.offsets[numero] = self.posicao
+        self._escrever(f"{numero} 0 obj\n".encode() + corpo)
+        if fluxo is not None:
+            self._escrever(b"\nstream\n" + fluxo + b"\nendstream")
+        self._escrever(b"\nendobj\n")
+
+    def _novo_numero(self) -> int:
+        numero = self.proximo
+        self.proximo += 1
+        return numero
+
+    def pagina(self, conteudo: bytes, lado_qr: int, bitmap_qr: bytes):
+        imagem, texto, pagina = self._novo_numero(), self._novo_numero(), self._novo_numero()
+        self._objeto(imagem, (
+            f"<< /Type /XObject /Subtype /Image /Width {lado_qr} /Height {lado_qr} "
+            f"/ColorSpace /DeviceGray /BitsPerComponent 1 /Interpolate false "
+            f"/Filter /FlateDecode /Length {len(bitmap_qr)} >>"
+        ).encode(), bitmap_qr)
+        comprimido = zlib.compress(conteudo)
+        self._objeto(texto, f"<< /Filter /FlateDecode /Length {len(comprimido)} >>".encode(), comprimido)
+        self._objeto(pagina, (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {LARGURA_PAGINA} {ALTURA_PAGINA}] "
+            f"/Resources << /Font << /F1 3 0 R /F2 4 0 R /F3 5 0 R >> /XObject << /QR {imagem} 0 R >> >> "
+            f"/Contents {texto} 0 R >>"
+        ).encode())
+        self.paginas.append(pagina)
+
+    def fechar(self):
+        filhos = " ".join(f"{numero} 0 R" for numero in self.paginas)
+        self._objeto(2, f"<< /Type /Pages /Kids [{filhos}] /Count {len(self.paginas)} >>".encode())
+        inicio_xref = self.posicao
+        linhas = [f"xref\n0 {self.proximo}\n", "0000000000 65535 f \n"]
+        linhas.extend(f"{self.offsets[numero]:010d} 00000 n \n" for numero in range(1, self.proximo))
+        linhas.append(f"trailer\n<< /Size {self.proximo} /Root 1 0 R >>\nstartxref\n{inicio_xref}\n%%EOF\n")
+        self._escrever("".join(linhas).encode())
+
+
+def exportar_pdf(cobrancas: list, destino, molde: str | None = None, estado: dict | None = None):
+    """PDF com uma página por pessoa: nome, valor, QR, copia e cola, txid e mensagem."""
+    saida = open(destino, "wb") if isinstance(destino, (str, os.PathLike)) else destino
+    try:
+        escritor = _EscritorPdf(saida)
+        resultados = renderizar_em_ordem([c["payload"] for c in cobrancas], "pdf", molde, estado)
+        for cobranca, (lado_qr, bitmap_qr) in zip(cobrancas, resultados):
+            escritor.pagina(_conteudo_pagina(cobranca), lado_qr, bitmap_qr)
+        escritor.fechar()
+    finally:
+        if saida is not destino:
+            saida.close()
+
+
+# ============================================
+# API PÚBLICA
+# ============================================
+
+def exportar_cobrancas(cobrancas: list, destino, formato: str = "zip", imagem: str = "png",
+                       molde: str | None = None) -> dict:
+    """
+    Exporta as cobranças (dicts com pessoa, valor, payload e, opcionalmente, txid e mensagem)
+    para `destino` como ZIP (imagens + manifesto) ou PDF. Retorna o tempo gasto,
+    os processos usados e o tamanho do arquivo.
+    """
+    if formato not in FORMATOS_EXPORTACAO:
+        raise ValueError(f"Formato de exportação desconhecido: {formato}")
+    if imagem not in IMAGENS_EXPORTACAO:
+        raise ValueError(f"Formato de imagem desconhecido: {imagem}")
+
+    estado = {}
+    inicio = time.perf_counter()
+    if formato == "zip":
+        exportar_zip(cobrancas, destino, imagem, molde, estado)
+    else:
+        exportar_pdf(cobrancas, destino, molde, estado)
+    duracao = time.perf_counter() - inicio
+
+    if isinstance(destino, (str, os.PathLike)):
+        tamanho = os.path.getsize(destino)
+    else:
+        tamanho = destino.tell()
+    return {
+        "formato": formato,
+        "imagem": imagem if formato == "zip" else "pdf",
+        "cobrancas": len(cobrancas),
+        "bytes": tamanho,
+        "tempo_s": round(duracao, 3),
+        "por_cobranca_ms": round(duracao / len(cobrancas) * 1000, 2) if cobrancas else 0.0,
+        "processos": estado.get("processos", 1),
+        "pool_indisponivel": estado.get("pool_indisponivel", False),
+    }
@@ -0,0 +1,288 @@
+import io
+import time
+
+from PIL import Image, ImageOps
+
+# ============================================
+# PERFIS DE QUALIDADE x TAMANHO
+# ============================================
+
+PERFIS_PREPROCESSAMENTO = {
+    "economia": {"lado_maximo": 1280, "bytes_alvo": 150 * 1024},
+    "equilibrado": {"lado_maximo": 1600, "bytes_alvo": 300 * 1024},
+    "detalhe": {"lado_maximo": 2048, "bytes_alvo": 600 * 1024},
+}
+
+PERFIL_PADRAO = "equilibrado"
+
+
+# ============================================
+# RECORTE AUTOMÁTICO DA NOTA
+# ============================================
+
+def _limiar_otsu(histograma: list) -> int:
+    """Limiar de Otsu: separa papel (claro) do fundo (escuro) pelo histograma."""
+    total = sum(histograma)
+    soma_total = sum(i * h for i, h in enumerate(histograma))
+    soma_fundo = peso_fundo = 0
+    melhor_limiar, melhor_variancia = 127, 0.0
+    for i, h in enumerate(histograma):
+        peso_fundo += h
+        if peso_fundo == 0:
+            continue
+        peso_frente = total - peso_fundo
+        if peso_frente == 0:
+            break
+        soma_fundo += i * h
+        media_fundo = soma_fundo / peso_fundo
+        media_frente = (soma_total - soma_fundo) / peso_frente
+        variancia = peso_fundo * peso_frente * (media_fundo - media_frente) ** 2
+        if variancia > melhor_variancia:
+            melhor_limiar, melhor_variancia = i, variancia
+    return melhor_limiar
+
+
+def _faixa_clara(mascara: Image.Image, minimo: float) -> tuple | None:
+    """
+    Primeira e última linha da máscara cuja contagem de pixels claros chega a
+    `minimo` da linha mais clara (relativo, porque a nota pode ocupar só parte da largura).
+    """
+    largura, altura = mascara.size
+    dados = mascara.tobytes()
+    contagens = [dados[y * largura:(y + 1) * largura].count(255) for y in range(altura)]
+    maior = max(contagens, default=0)
+    if maior == 0:
+        return None
+    linhas = [y for y, contagem in enumerate(contagens) if contagem >= minimo * maior]
+    return linhas[0], linhas[-1] + 1
+
+
+def detectar_area_nota(imagem: Image.Image, lado_analise: int = 256) -> tuple | None:
+    """
+    Encontra a caixa (esq, topo, dir, base) do papel da nota em uma imagem em tons de cinza.
+    A análise é feita numa miniatura, então custa pouco mesmo em fotos de 4000px.
+    Retorna None quando não há um recorte confiável.
+    """
+    miniatura = imagem.copy()
+    miniatura.thumbnail((lado_analise, lado_analise))
+    limiar = _limiar_otsu(miniatura.histogram()[:256])
+    mascara = miniatura.point(lambda p: 255 if p > limiar else 0)
+
+    faixa_y = _faixa_clara(mascara, 0.5)
+    faixa_x = _faixa_clara(mascara.transpose(Image.Transpose.TRANSPOSE), 0.5)
+    if faixa_y is None or faixa_x is None:
+        return None
+
+    escala_x = imagem.width / miniatura.width
+    escala_y = imagem.height / miniatura.height
+    margem = 0.02
+    esq = max(0, int((faixa_x[0] - margem * miniatura.width) * escala_x))
+    dir_ = min(imagem.width, int((faixa_x[1] + margem * miniatura.width) * escala_x))
+    topo = max(0, int((faixa_y[0] - margem * miniatura.height) * escala_y))
+    base = min(imagem.height, int((faixa_y[1] + margem * miniatura.height) * escala_y))
+
+    area = (dir_ - esq) * (base - topo)
+    area_total = imagem.width * imagem.height
+    # Recorte que quase não tira nada, ou que sobra um pedacinho, não vale o risco
+    if area > 0.9 * area_total or area < 0.15 * area_total:
+        return None
+    return esq, topo, dir_, base
+
+
+# ============================================
+# COMPRESSÃO ADAPTATIVA
+# ============================================
+
+def _salvar_jpeg(imagem: Image.Image, qualidade: int) -> bytes:
+    buffer = io.BytesIO()
+    imagem.save(buffer, format="JPEG", quality=qualidade, optimize=True)
+    return buffer.getvalue()
+
+
+def comprimir_jpeg(imagem: Image.Image, bytes_alvo: int, qualidade_min: int = 40, qualidade_max: int = 90) -> tuple:
+    """Busca binária da maior qualidade JPEG que cabe em bytes_alvo. Retorna (bytes, qualidade)."""
+    melhor = None
+    baixo, alto = qualidade_min, qualidade_max
+    while baixo <= alto:
+        meio = (baixo + alto) // 2
+        dados = _salvar_jpeg(imagem, meio)
+        if len(dados) <= bytes_alvo:
+            melhor = (dados, meio)
+            baixo = meio + 5
+        else:
+            alto = meio - 5
+    if melhor is None:
+        return _salvar_jpeg(imagem, qualidade_min), qualidade_min
+    return melhor
+
+
+# ============================================
+# PIPELINE DE PRÉ-PROCESSAMENTO
+# ============================================
+
+def preprocessar_nota(
+    conteudo: bytes,
+    perfil: str = PERFIL_PADRAO,
+    lado_maximo: int | None = None,
+    bytes_alvo: int | None = None,
+    tons_de_cinza: bool = True,
+    recortar: bool = True
+) -> tuple:
+    """
+    Prepara a foto da nota para o Vision: corrige rotação EXIF, converte para tons de cinza,
+    recorta o papel, reduz para o lado máximo e escolhe a qualidade JPEG que cabe no alvo.
+    lado_maximo/bytes_alvo sobrescrevem os valores do perfil.
+    Retorna (bytes_jpeg, relatorio).
+    """
+    inicio = time.perf_counter()
+    config = PERFIS_PREPROCESSAMENTO.get(perfil, PERFIS_PREPROCESSAMENTO[PERFIL_PADRAO])
+    lado_maximo = lado_maximo or config["lado_maximo"]
+    bytes_alvo = bytes_alvo or config["bytes_alvo"]
+
+    imagem, dimensoes_originais, recorte = _carregar_nota(conteudo, 2 * lado_maximo, tons_de_cinza, recortar)
+    dados, qualidade, imagem = _jpeg_unico(imagem, lado_maximo, bytes_alvo)
+
+    relatorio = _relatorio(conteudo, perfil, [dados], dimensoes_originais, imagem, recorte, inicio)
+    relatorio["qualidade_jpeg"] = qualidade
+    return dados, relatorio
+
+
+def _carregar_nota(conteudo: bytes, lado_decodificacao: int, tons_de_cinza: bool, recortar: bool) -> tuple:
+    """Abre a foto, corrige rotação/cor e recorta o papel. Retorna (imagem, dimensoes_originais, recorte)."""
+    imagem = Image.open(io.BytesIO(conteudo))
+    dimensoes_originais = imagem.size
+
+    # JPEG grande: decodifica já reduzido (escala DCT), com folga para o recorte
+    if imagem.format == "JPEG" and max(imagem.size) > lado_decodificacao:
+        escala = lado_decodificacao / max(imagem.size)
+        imagem.draft("L" if tons_de_cinza else "RGB", (int(imagem.width * escala), int(imagem.height * escala)))
+
+    imagem = ImageOps.exif_transpose(imagem)
+    imagem = imagem.convert("L" if tons_de_cinza else "RGB")
+
+    recorte = None
+    if recortar:
+        caixa = detectar_area_nota(imagem if tons_de_cinza else imagem.convert("L"))
+        if caixa:
+            imagem = imagem.crop(caixa)
+            recorte = caixa
+    return imagem, dimensoes_originais, recorte
+
+
+def _jpeg_unico(imagem: Image.Image, lado_maximo: int, bytes_alvo: int) -> tuple:
+    """Reduz para o lado máximo e comprime. Retorna (bytes, qualidade, imagem_final)."""
+    if max(imagem.size) > lado_maximo:
+        imagem.thumbnail((lado_maximo, lado_maximo), Image.Resampling.LANCZOS)
+    dados, qualidade = comprimir_jpeg(imagem, bytes_alvo)
+    return dados, qualidade, imagem
+
+
+def _relatorio(conteudo: bytes, perfil: str, imagens: list, dimensoes_originais: tuple,
+               imagem: Image.Image, recorte: tuple | None, inicio: float) -> dict:
+    bytes_finais = sum(len(dados) for dados in imagens)
+    return {
+        "perfil": perfil,
+        "bytes_originais": len(conteudo),
+        "bytes_finais": bytes_finais,
+        "bytes_economizados": max(0, len(conteudo) - bytes_finais),
+        "percentual_economia": round(100 * (1 - bytes_finais / len(conteudo)), 1) if conteudo else 0.0,
+        "dimensoes_originais": dimensoes_originais,
+        "dimensoes_finais": imagem.size,
+        "recorte": recorte,
+        "tempo_ms": round((time.perf_counter() - inicio) * 1000, 1),
+    }
+
+
+# ============================================
+# NOTAS LONGAS EM FAIXAS
+# ============================================
+
+# A partir desta proporção (altura/largura) do papel recortado a nota é lida em faixas
+PROPORCAO_NOTA_LONGA = 2.5
+# Altura de cada faixa (em larguras) e a folga repetida na faixa seguinte
+PROPORCAO_FAIXA = 1.5
+SOBREPOSICAO_FAIXA = 0.15
+
+
+def _cortar_faixas(imagem: Image.Image, largura_maxima: int, bytes_alvo: int,
+                   proporcao_faixa: float, sobreposicao: float) -> tuple:
+    """Limita a largura e corta em faixas sobrepostas. Retorna (lista_de_jpegs, imagem_final)."""
+    if imagem.width > largura_maxima:
+        altura = round(imagem.height * largura_maxima / imagem.width)
+        imagem = imagem.resize((largura_maxima, altura), Image.Resampling.LANCZOS)
+
+    altura_faixa = max(1, round(imagem.width * proporcao_faixa))
+    passo = max(1, round(altura_faixa * (1 - sobreposicao)))
+
+    faixas = []
+    topo = 0
+    while True:
+        base = min(imagem.height, topo + altura_faixa)
+        dados, _ = comprimir_jpeg(imagem.crop((0, topo, imagem.width, base)), bytes_alvo)
+        faixas.append(dados)
+        if base >= imagem.height:
+            break
+        topo += passo
+    return faixas, imagem
+
+
+def preparar_faixas_nota(
+    conteudo: bytes,
+    perfil: str = PERFIL_PADRAO,
+    proporcao_faixa: float = PROPORCAO_FAIXA,
+    sobreposicao: float = SOBREPOSICAO_FAIXA,
+    tons_de_cinza: bool = True,
+    recortar: bool = True
+) -> tuple:
+    """
+    Corta uma nota comprida em faixas horizontais sobrepostas.
+    Em vez de encolher a nota inteira até o lado máximo (o que deixa as letras ilegíveis),
+    limita a largura ao lado máximo do perfil e divide a altura em faixas de
+    largura x proporcao_faixa, cada uma com `sobreposicao` de folga para a faixa seguinte.
+    Retorna (lista_de_jpegs, relatorio).
+    """
+    inicio = time.perf_counter()
+    config = PERFIS_PREPROCESSAMENTO.get(perfil, PERFIS_PREPROCESSAMENTO[PERFIL_PADRAO])
+
+    imagem, dimensoes_originais, recorte = _carregar_nota(conteudo, 4 * config["lado_maximo"], tons_de_cinza, recortar)
+    faixas, imagem = _cortar_faixas(imagem, config["lado_maximo"], config["bytes_alvo"], proporcao_faixa, sobreposicao)
+
+    relatorio = _relatorio(conteudo, perfil, faixas, dimensoes_originais, imagem, recorte, inicio)
+    relatorio["faixas"] = len(faixas)
+    return faixas, relatorio
+
+
+def preparar_nota(conteudo: bytes, perfil: str = PERFIL_PADRAO, tons_de_cinza: bool = True, recortar: bool = True) -> tuple:
+    """
+    Pré-processa a foto e decide, pela proporção do papel já recortado, se a nota é
+    comprida: uma nota comum fotografada com muita mesa em volta não vira faixas, e um
+    cupom comprido fotografado de longe sim. Retorna (lista_de_jpegs, relatorio); a
+    lista tem um JPEG só (como em preprocessar_nota) ou as faixas (como em
+    preparar_faixas_nota, com "faixas" no relatório).
+    """
+    inicio = time.perf_counter()
+    config = PERFIS_PREPROCESSAMENTO.get(perfil, PERFIS_PREPROCESSAMENTO[PERFIL_PADRAO])
+
+    # Decodifica com a folga das faixas: a proporção só é conhecida depois do recorte
+    imagem, dimensoes_originais, recorte = _carregar_nota(conteudo, 4 * config["lado_maximo"], tons_de_cinza, recortar)
+    if imagem.width and imagem.height / imagem.width >= PROPORCAO_NOTA_LONGA:
+        imagens, imagem = _cortar_faixas(
+            imagem, config["lado_maximo"], config["bytes_alvo"], PROPORCAO_FAIXA, SOBREPOSICAO_FAIXA
+        )
+        relatorio = _relatorio(conteudo, perfil, imagens, dimensoes_originais, imagem, recorte, inicio)
+        relatorio["faixas"] = len(imagens)
+    else:
+        dados, qualidade, imagem = _jpeg_unico(imagem, config["lado_maximo"], config["bytes_alvo"])
+        imagens = [dados]
+        relatorio = _relatorio(conteudo, perfil, imagens, dimensoes_originais, imagem, recorte, inicio)
+        relatorio["qualidade_jpeg"] = qualidade
+    return imagens, relatorio
+
+
+def formatar_bytes(n: int) -> str:
+    """Ex: 4404019 -> '4.2 MB'."""
+    for unidade in ("B", "KB", "MB"):
+        if n < 1024:
+            return f"{n:.0f} {unidade}" if unidade == "B" else f"{n:.1f} {unidade}"
+        n /= 1024
+    return f"{n:.1f} GB"
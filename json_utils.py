@@ -0,0 +1,170 @@
+import json
+
+# ============================================
+# PARSER INCREMENTAL DE JSON (STREAMING)
+# ============================================
+
+class ParserCamposJson:
+    """
+    Lê um objeto JSON que chega aos pedaços (streaming da IA) e devolve cada
+    campo do nível de cima assim que o valor dele fecha.
+    Ex: em {"resumo": "...", "carnes": [...], ...} o campo "carnes" sai
+    completo logo que o "]" chega, sem esperar o resto da resposta.
+    """
+
+    def __init__(self):
+        self._texto = ""
+        self._pos = 0
+        self._profundidade = 0
+        self._em_string = False
+        self._escape = False
+        self._inicio_string = None
+        self._ultima_string = None
+        self._chave = None
+        self._esperando_valor = False
+        self._inicio_valor = None
+        self.campos = {}
+
+    def alimentar(self, pedaco: str) -> list:
+        """Adiciona texto recebido e retorna os campos [(chave, valor)] que acabaram de fechar."""
+        self._texto += pedaco
+        prontos = []
+        texto = self._texto
+
+        while self._pos < len(texto):
+            c = texto[self._pos]
+
+            if self._em_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._em_string = False
+                    if self._profundidade == 1:
+                        if self._esperando_valor and self._inicio_valor == self._inicio_string:
+                            self._concluir(self._pos + 1, prontos)
+                        elif not self._esperando_valor:
+                            self._ultima_string = json.loads(texto[self._inicio_string:self._pos + 1])
+
+            elif c == '"':
+                self._em_string = True
+                self._inicio_string = self._pos
+                self._marcar_inicio_valor()
+
+            elif c in "{[":
+                self._marcar_inicio_valor()
+                self._profundidade += 1
+
+            elif c in "}]":
+                if self._profundidade == 1 and self._inicio_valor is not None:
+                    # Fim do objeto principal logo após um número/true/false/null
+                    self._concluir(self._pos, prontos)
+                self._profundidade -= 1
+                if self._profundidade == 1 and self._inicio_valor is not None:
+                    self._concluir(self._pos + 1, prontos)
+
+            elif self._profundidade == 1:
+                if c == ":":
+                    self._chave = self._ultima_string
+                    self._esperando_valor = True
+                elif c == ",":
+                    if self._inicio_valor is not None:
+                        self._concluir(self._pos, prontos)
+                elif not c.isspace():
+                    self._marcar_inicio_valor()
+
+            self._pos += 1
+
+        return prontos
+
+    def _marcar_inicio_valor(self):
+        if self._profundidade == 1 and self._esperando_valor and self._inicio_valor is None:
+            self._inicio_valor = self._pos
+
+    def _concluir(self, fim: int, prontos: list):
+        bruto = self._texto[self._inicio_valor:fim].strip()
+        try:
+            valor = json.loads(bruto)
+        except json.JSONDecodeError:
+            valor = None
+        if valor is not None or bruto == "null":
+            self.campos[self._chave] = valor
+            prontos.append((self._chave, valor))
+        self._chave = None
+        self._esperando_valor = False
+        self._inicio_valor = None
+
+    @property
+    def texto(self) -> str:
+        """Todo o texto recebido até agora."""
+        return self._texto
+
+
+# ============================================
+# REPARO DE JSON TRUNCADO
+# ============================================
+
+def _remover_cercas_markdown(texto: str) -> str:
+    """Tira ```json ... ``` em volta da resposta, se o modelo tiver colocado."""
+    texto = texto.strip()
+    if texto.startswith("```"):
+        texto = texto.split("\n", 1)[1] if "\n" in texto else ""
+        if texto.rstrip().endswith("```"):
+            texto = texto.rstrip()[:-3]
+    return texto.strip()
+
+
+def reparar_json(texto: str) -> tuple:
+    """
+    Lê um objeto JSON que pode ter vindo cortado (resposta que estourou max_tokens).
+    Corta no último elemento completo e fecha as chaves/colchetes que ficaram abertos.
+    Retorna (dict, reparado). Levanta ValueError se não sobrar nada aproveitável
+    ou se o JSON for válido mas não for um objeto (ex.: uma lista solta).
+    """
+    texto = _remover_cercas_markdown(texto or "")
+    try:
+        valor = json.loads(texto or "{}")
+    except json.JSONDecodeError:
+        pass
+    else:
+        if not isinstance(valor, dict):
+            raise ValueError(f"Resposta JSON não é um objeto ({type(valor).__name__})")
+        return valor, False
+
+    inicio = texto.find("{")
+    if inicio < 0:
+        raise ValueError("Resposta sem objeto JSON")
+    texto = texto[inicio:]
+
+    # Pontos de corte: logo após um valor que fechou, ou antes de uma vírgula
+    pilha = []
+    cortes = []
+    em_string = escape = False
+    for i, c in enumerate(texto):
+        if em_string:
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == '"':
+                em_string = False
+        elif c == '"':
+            em_string = True
+        elif c in "{[":
+            pilha.append("}" if c == "{" else "]")
+        elif c in "}]":
+            if pilha:
+                pilha.pop()
+            cortes.append((i + 1, "".join(reversed(pilha))))
+        elif c == ",":
+            cortes.append((i, "".join(reversed(pilha))))
+
+    for posicao, fechamento in reversed(cortes):
+        try:
+            valor = json.loads(texto[:posicao] + fechamento)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(valor, dict):
+            return valor, True
+    raise ValueError("JSON truncado sem nenhum campo completo")
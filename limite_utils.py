@@ -0,0 +1,342 @@
+import os
+import time
+import asyncio
+import threading
+from collections import deque
+from email.utils import parsedate_to_datetime
+
+# ============================================
+# LIMITES DA API (REQUISIÇÕES E TOKENS POR MINUTO)
+# ============================================
+
+# Os limites reais dependem do tier da conta: o limitador aprende pelos headers
+# x-ratelimit-limit-requests/tokens de cada resposta e, até lá, deixa passar.
+# CHURRASCO_LIMITE_RPM / CHURRASCO_LIMITE_TPM fixam os limites para todos os modelos.
+
+# Estimativa de tokens quando a requisição não diz quanto vai gerar
+TOKENS_RESPOSTA_PADRAO = 1000
+# Custo aproximado de uma imagem em alta resolução no Vision
+TOKENS_POR_IMAGEM = 765
+
+
+def limites_configurados() -> dict:
+    """Limites fixados por variável de ambiente ({"rpm": None, "tpm": None} se não houver)."""
+    rpm = os.environ.get("CHURRASCO_LIMITE_RPM")
+    tpm = os.environ.get("CHURRASCO_LIMITE_TPM")
+    return {"rpm": int(rpm) if rpm else None, "tpm": int(tpm) if tpm else None}
+
+
+def limites_dos_headers(headers) -> dict:
+    """
+    Lê limite e restante de requisições e tokens dos headers x-ratelimit-* da resposta.
+    Campos ausentes ou ilegíveis ficam None.
+    """
+    def inteiro(nome: str) -> int | None:
+        valor = headers.get(nome) if headers else None
+        try:
+            return int(float(valor)) if valor else None
+        except ValueError:
+            return None
+
+    return {
+        "rpm": inteiro("x-ratelimit-limit-requests"),
+        "tpm": inteiro("x-ratelimit-limit-tokens"),
+        "requisicoes_restantes": inteiro("x-ratelimit-remaining-requests"),
+        "tokens_restantes": inteiro("x-ratelimit-remaining-tokens"),
+    }
+
+
+def estimar_tokens(params: dict) -> int:
+    """Estimativa barata (~4 caracteres por token) do que a requisição vai consumir do TPM."""
+    caracteres = 0
+    imagens = 0
+    for mensagem in params.get("messages", []):
+        conteudo = mensagem.get("content")
+        if isinstance(conteudo, str):
+            caracteres += len(conteudo)
+        elif isinstance(conteudo, list):
+            for parte in conteudo:
+                if parte.get("type") == "text":
+                    caracteres += len(parte.get("text", ""))
+                elif parte.get("type") == "image_url":
+                    imagens += 1
+    resposta = params.get("max_tokens") or TOKENS_RESPOSTA_PADRAO
+    return caracteres // 4 + imagens * TOKENS_POR_IMAGEM + resposta
+
+
+def segundos_retry_after(exception: BaseException) -> float | None:
+    """Lê retry-after-ms / retry-after da resposta 429, se a exceção trouxer os headers."""
+    resposta = getattr(exception, "response", None)
+    headers = getattr(resposta, "headers", None)
+    if not headers:
+        return None
+
+    valor = headers.get("retry-after-ms")
+    if valor:
+        try:
+            return max(0.0, float(valor) / 1000)
+        except ValueError:
+            pass
+
+    valor = headers.get("retry-after")
+    if valor:
+        try:
+            return max(0.0, float(valor))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(valor).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    return None
+
+
+# ============================================
+# BALDE DE TOKENS COM RESERVA EM FILA
+# ============================================
+
+class _Balde:
+    """
+    Balde que enche `taxa` unidades por segundo até `capacidade`.
+    Quem não cabe reserva mesmo assim (o nível fica negativo) e recebe quanto
+    tempo esperar: a ordem de chegada define a ordem de saída, sem ninguém
+    furar a fila acordando antes.
+    """
+
+    def __init__(self, capacidade: float, taxa: float):
+        self.capacidade = capacidade
+        self.taxa = taxa
+        self.nivel = capacidade
+        self.atualizado_em = time.monotonic()
+
+    def _encher(self, agora: float):
+        # Durante uma pausa (retry-after) atualizado_em fica no futuro e o balde não enche
+        if agora > self.atualizado_em:
+            self.nivel = min(self.capacidade, self.nivel + (agora - self.atualizado_em) * self.taxa)
+            self.atualizado_em = agora
+
+    def reservar(self, quantidade: float, agora: float) -> float:
+        """Retira `quantidade` e retorna quantos segundos esperar até ela estar disponível."""
+        self._encher(agora)
+        quantidade = min(quantidade, self.capacidade)
+        espera = max(0.0, self.atualizado_em - agora)
+        falta = quantidade - self.nivel
+        if falta > 0:
+            espera += falta / self.taxa
+        self.nivel -= quantidade
+        return espera
+
+    def redimensionar(self, capacidade: float, restante: float | None = None):
+        """Novo limite informado pela API; `restante` alinha o nível com o que ela ainda aceita."""
+        self.capacidade = capacidade
+        self.taxa = capacidade / 60
+        self.nivel = min(self.nivel, capacidade)
+        if restante is not None:
+            self.nivel = min(self.nivel, restante)
+
+    def devolver(self, quantidade: float):
+        self.nivel = min(self.capacidade, self.nivel + quantidade)
+
+    def pausar(self, ate: float):
+        self.nivel = min(self.nivel, 0.0)
+        self.atualizado_em = max(self.atualizado_em, ate)
+
+
+class _Limite:
+    """
+    Baldes de RPM e TPM de um par (modelo, credencial) e suas métricas.
+    Enquanto um limite não é conhecido (nem configurado nem informado pela API),
+    o balde dele é None e não segura ninguém.
+    """
+
+    def __init__(self, rpm: int | None, tpm: int | None):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.origem = "configurado" if rpm or tpm else "desconhecido"
+        self.requisicoes = _Balde(rpm, rpm / 60) if rpm else None
+        self.tokens = _Balde(tpm, tpm / 60) if tpm else None
+        self.pausado_ate = 0.0
+        self.na_fila = 0
+        self.esperas = deque(maxlen=500)
+        self.total_chamadas = 0
+        self.total_esperas = 0
+        self.espera_total_s = 0.0
+        self.pausas = 0
+
+    def baldes(self) -> list:
+        return [balde for balde in (self.requisicoes, self.tokens) if balde is not None]
+
+
+class LimitadorTaxa:
+    """
+    Limitador de taxa compartilhado pelo processo inteiro (todas as sessões e
+    event loops), com um par de baldes RPM/TPM por modelo e credencial,
+    dimensionados pelos limites que a própria API informa nos headers.
+    Cada chamada reserva sua vaga antes de ir para a API; um 429 com retry-after
+    pausa o balde para todo mundo, em vez de cada sessão insistir sozinha.
+    """
+
+    def __init__(self):
+        self._limites: dict = {}
+        self._lock = threading.Lock()
+
+    def _obter(self, chave: tuple) -> _Limite:
+        limite = self._limites.get(chave)
+        if limite is None:
+            limites = limites_configurados()
+            limite = self._limites[chave] = _Limite(limites["rpm"], limites["tpm"])
+        return limite
+
+    def _reservar(self, chave: tuple, tokens: int) -> float:
+        with self._lock:
+            limite = self._obter(chave)
+            agora = time.monotonic()
+            espera = max(0.0, limite.pausado_ate - agora)
+            if limite.requisicoes is not None:
+                espera = max(espera, limite.requisicoes.reservar(1, agora))
+            if limite.tokens is not None:
+                espera = max(espera, limite.tokens.reservar(tokens, agora))
+            limite.total_chamadas += 1
+            if espera > 0:
+                limite.na_fila += 1
+            return espera
+
+    def _registrar_espera(self, chave: tuple, espera: float):
+        with self._lock:
+            limite = self._obter(chave)
+            limite.na_fila -= 1
+            limite.total_esperas += 1
+            limite.espera_total_s += espera
+            limite.esperas.append(espera)
+
+    def _cancelar(self, chave: tuple, tokens: int):
+        with self._lock:
+            limite = self._obter(chave)
+            limite.na_fila -= 1
+            if limite.requisicoes is not None:
+                limite.requisicoes.devolver(1)
+            if limite.tokens is not None:
+                limite.tokens.devolver(min(tokens, limite.tokens.capacidade))
+
+    def aguardar(self, chave: tuple, tokens: int) -> float:
+        """Bloqueia a thread até a chamada caber no limite. Retorna o tempo esperado."""
+        espera = self._reservar(chave, tokens)
+        if espera > 0:
+            time.sleep(espera)
+            self._registrar_espera(chave, espera)
+        return espera
+
+    async def aguardar_async(self, chave: tuple, tokens: int) -> float:
+        """Versão assíncrona: cancelada na espera, devolve a reserva para os próximos."""
+        espera = self._reservar(chave, tokens)
+        if espera > 0:
+            try:
+                await asyncio.sleep(espera)
+            except asyncio.CancelledError:
+                self._cancelar(chave, tokens)
+                raise
+            self._registrar_espera(chave, espera)
+        return espera
+
+    def ajustar_tokens(self, chave: tuple, estimado: int, real: int):
+        """Corrige o balde de TPM com o uso real informado pela API."""
+        with self._lock:
+            limite = self._obter(chave)
+            if limite.tokens is None:
+                return
+            diferenca = estimado - real
+            if diferenca > 0:
+                limite.tokens.devolver(diferenca)
+            elif diferenca < 0:
+                limite.tokens.nivel += diferenca
+
+    def pausar(self, chave: tuple, segundos: float):
+        """Ninguém usa esta chave pelos próximos `segundos` (retry-after de um 429)."""
+        with self._lock:
+            limite = self._obter(chave)
+            ate = time.monotonic() + segundos
+            # Vale também antes de os limites serem conhecidos (sem baldes)
+            limite.pausado_ate = max(limite.pausado_ate, ate)
+            for balde in limite.baldes():
+                balde.pausar(ate)
+            limite.pausas += 1
+
+    def atualizar_limites(self, chave: tuple, headers) -> bool:
+        """
+        Ajusta os baldes com os limites da conta informados nos headers x-ratelimit-*.
+        Limites fixados por variável de ambiente têm prioridade. Retorna se algo mudou.
+        """
+        informados = limites_dos_headers(headers)
+        configurados = limites_configurados()
+        with self._lock:
+            limite = self._obter(chave)
+            mudou = False
+            for campo, atributo, restante in (
+                ("rpm", "requisicoes", informados["requisicoes_restantes"]),
+                ("tpm", "tokens", informados["tokens_restantes"]),
+            ):
+                valor = informados[campo]
+                if not valor or configurados[campo]:
+                    continue
+                balde = getattr(limite, atributo)
+                if balde is None or getattr(limite, campo) != valor:
+                    if balde is None:
+                        setattr(limite, atributo, _Balde(valor, valor / 60))
+                    else:
+                        balde.redimensionar(valor)
+                    setattr(limite, campo, valor)
+                    limite.origem = "api"
+                    mudou = True
+                if restante is not None:
+                    getattr(limite, atributo).redimensionar(valor, restante)
+            return mudou
+
+    def estatisticas(self) -> dict:
+        """Fila, esperas (média, p95, máxima) e ocupação dos baldes de cada modelo/credencial."""
+        with self._lock:
+            agora = time.monotonic()
+            resultado = {}
+            for (modelo, credencial), limite in self._limites.items():
+                for balde in limite.baldes():
+                    balde._encher(agora)
+                esperas = sorted(limite.esperas)
+                resultado[f"{modelo}/{credencial}"] = {
+                    "rpm": limite.rpm,
+                    "tpm": limite.tpm,
+                    "origem_limites": limite.origem,
+                    "requisicoes_disponiveis": round(limite.requisicoes.nivel, 1) if limite.requisicoes else None,
+                    "tokens_disponiveis": round(limite.tokens.nivel) if limite.tokens else None,
+                    "na_fila": limite.na_fila,
+                    "chamadas": limite.total_chamadas,
+                    "esperas": limite.total_esperas,
+                    "espera_media_s": round(limite.espera_total_s / limite.total_esperas, 3) if limite.total_esperas else 0.0,
+                    "espera_p95_s": round(esperas[int(0.95 * (len(esperas) - 1))], 3) if esperas else 0.0,
+                    "espera_max_s": round(esperas[-1], 3) if esperas else 0.0,
+                    "pausas_retry_after": limite.pausas,
+                }
+            return resultado
+
+
+# Limitador único do processo
+limitador_ia = LimitadorTaxa()
+
+
+# ============================================
+# ESPERA DO TENACITY GUIADA PELO RETRY-AFTER
+# ============================================
+
+class EsperaRetryAfter:
+    """
+    Estratégia de espera do tenacity: quando o 429 traz retry-after, a pausa já
+    foi agendada no limitador (que segura a próxima tentativa e todas as outras
+    chamadas), então não dorme de novo; sem o header, usa a espera de reserva.
+    """
+
+    def __init__(self, reserva):
+        self.reserva = reserva
+
+    def __call__(self, retry_state) -> float:
+        resultado = retry_state.outcome
+        if resultado is not None and resultado.failed:
+            if segundos_retry_after(resultado.exception()) is not None:
+                return 0.0
+        return self.reserva(retry_state)
@@ -0,0 +1,481 @@
+import random
+import hashlib
+import threading
+from collections import deque
+
+# ============================================
+# BANCO DE FRASES POR PERSONA
+# ============================================
+# Placeholders: {nome}, {valor} (já no formato "R$ 85.00"), {comida}, {dias}
+
+PERSONAS = {
+    "sincerao": {
+        "titulo": "Churrasqueiro Sincerão",
+        "saudacao": [
+            "Fala {nome}, meu consagrado!",
+            "E aí {nome}, chefia!",
+            "Grande {nome}!",
+            "Opa {nome}, campeão!",
+            "Salve {nome}, meu patrão!",
+            "Ô {nome}, figura!",
+            "Fala tu, {nome}!",
+            "{nome}, meu querido!",
+            "Bom dia {nome}, lenda do churrasco!",
+            "Alô {nome}, craque!",
+        ],
+        "bebeu": [
+            "Ontem tu bebeu como se não houvesse amanhã, mas o amanhã chegou e a conta também!",
+            "Sei que a ressaca tá brava hoje, mas a conta tá mais brava ainda.",
+            "Tu secou o isopor sozinho e ainda pediu pra abrir a reserva.",
+            "A cervejaria mandou agradecer pela tua dedicação de ontem.",
+            "Quem bebeu igual camelo no deserto agora paga igual gente grande.",
+            "Teu fígado pediu férias, mas o Pix não pode tirar folga.",
+            "Foi tanta latinha que o pessoal da reciclagem quer te contratar.",
+            "Tu brindou com todo mundo umas quatro vezes, agora brinda comigo no Pix.",
+            "A ressaca passa, a dívida não.",
+            "Lembra da saideira? Pois é, foram umas oito saideiras.",
+        ],
+        "nao_bebeu": [
+            "Mandou bem na {comida} ontem hein, prejuízo puro!",
+            "Como tu não bebeu, sobrou espaço pra {comida}, né?",
+            "Tu comeu por três e ainda levou marmita pra casa.",
+            "Ser sóbrio custa caro também, meu amigo.",
+            "Tava com a lombriga solta, a {comida} nem viu de onde veio a mordida.",
+            "Não bebeu nada, mas a grelha sentiu tua presença.",
+            "Tu ficou de guarda do lado da churrasqueira igual segurança de balada.",
+            "Água com gás e três pratos de {comida}: o combo mais caro da festa.",
+            "Zero álcool, cem por cento carne. Respeito, mas cobro.",
+            "Tu foi o único sóbrio e mesmo assim ninguém viu a {comida} sobrar.",
+        ],
+        "valor": [
+            "O prejuízo ficou em {valor}.",
+            "A tua parte deu {valor}.",
+            "A conta desse banquete ficou em {valor}.",
+            "São {valor}, nem um centavo a menos.",
+            "Fica {valor} pra tu, preço de amigo.",
+            "Teu boleto da alegria: {valor}.",
+            "Deu {valor} certinho.",
+            "Manda {valor} que tá tudo certo.",
+        ],
+        "fechamento": [
+            "Faz esse Pix cair logo senão na próxima tua cerveja vem quente!",
+            "Manda o Pix pra garantir a vaga no próximo!",
+            "Paga logo senão na próxima tu bebe no copo de requeijão!",
+            "Pix na conta e amizade renovada!",
+            "Quem paga rápido ganha o primeiro pedaço da picanha na próxima!",
+            "Não me faz virar cobrador chato, hein!",
+            "Cai o Pix e cai a consciência pesada!",
+            "Pagou, tá convidado pro próximo!",
+        ],
+        "emojis": ["🍺", "🥩", "🔥", "🤡", "😉", "💸", "🍖", "😂", "🙏", "🤝"],
+        "caloteiro_leve": [
+            "Já faz {dias} dia(s) e o Pix ainda não caiu, tá tudo bem aí?",
+            "A picanha já foi digerida e virou saudade, mas o Pix ainda não caiu...",
+            "Passou {dias} dia(s) e eu aqui olhando o extrato igual novela.",
+            "Sei que tu tá ocupado, mas o Pix leva 3 segundos.",
+            "Tô achando que teu banco saiu do ar faz {dias} dia(s).",
+        ],
+        "caloteiro_medio": [
+            "Já são {dias} dias! A carne já virou história e tu virou lenda... de caloteiro.",
+            "{dias} dias sem Pix. Tô quase criando um grupo só pra falar de ti.",
+            "Olha, {dias} dias é tempo suficiente pra fazer outro churrasco. Sem tu.",
+            "A galera já tá perguntando se tu mudou de país. Faz {dias} dias!",
+            "Tua foto já tá na parede da churrasqueira com a legenda 'procura-se'.",
+        ],
+        "caloteiro_pesado": [
+            "{dias} DIAS! Já tô preparando o Powerpoint pra apresentar tua dívida no próximo encontro.",
+            "Faz {dias} dias. Teu nome já tá no Serasa do churrasco, categoria ouro.",
+            "{dias} dias sem pagar: tu oficialmente virou o assunto do grupo.",
+            "Depois de {dias} dias eu já aceito até pagamento em carvão.",
+            "{dias} dias, parceiro. O boi que tu comeu já reencarnou.",
+        ],
+        "valor_caloteiro": [
+            "Continuo esperando os {valor}.",
+            "São só {valor}, não é um rim.",
+            "A dívida segue firme: {valor}.",
+            "{valor}. Só isso. Tô esperando.",
+            "Os {valor} tão com saudade de sair da tua conta.",
+        ],
+        "fechamento_caloteiro": [
+            "Paga hoje ou eu conto pra galera no grupo!",
+            "Se não cair até amanhã, próxima tu só come pão de alho!",
+            "Paga ou vou marcar tua mãe na cobrança!",
+            "Última chance antes do print ir pro grupo!",
+            "Não me obriga a mandar áudio de 5 minutos!",
+        ],
+    },
+    "tiozao": {
+        "titulo": "Tiozão do Pavê",
+        "saudacao": [
+            "Ô {nome}, é pavê ou pacumê?",
+            "Fala {nome}, sobrinho!",
+            "{nome}! Senta aqui que o tio quer conversar.",
+            "E aí {nome}, tudo em cima? Embaixo tá a conta!",
+            "Ô {nome}, quanto tempo! Desde o churrasco, né?",
+            "Bom dia {nome}! Bom mesmo vai ser quando tu pagar.",
+        ],
+        "bebeu": [
+            "Tu bebeu tanto que a cerveja que tinha era pouca, agora pouca é a paciência do tio.",
+            "Sabe o que o copo falou pra ti? 'Me larga, que eu tô vazio!'",
+            "Tu tomou todas e agora vai tomar uma: a conta!",
+            "Cerveja gelada, conta quentinha.",
+            "Tu não bebeu, tu fez degustação profissional.",
+        ],
+        "nao_bebeu": [
+            "Tu não bebeu nada, mas comeu a {comida} com gosto de 'tira o olho que é meu'.",
+            "Sabe por que a {comida} sumiu? Porque alguém deu um 'pega' nela. Tu!",
+            "Tu tava tão sóbrio que lembra de tudo, inclusive quanto comeu.",
+            "Suco de laranja não paga picanha, sobrinho.",
+            "Pra quem não bebe, tu mastiga rápido demais, hein!",
+        ],
+        "valor": [
+            "Tua parte deu {valor}.",
+            "O tio fez as contas: {valor}.",
+            "São {valor}, e o troco é um abraço.",
+            "Ficou {valor}. Nem pavê nem pacumê: pagá!",
+        ],
+        "fechamento": [
+            "Manda o Pix que o tio faz piada nova no próximo!",
+            "Paga logo que o tio não tem paciência de pavê!",
+            "Pix caiu, piada do pavê liberada!",
+            "Quem paga em dia ganha o lugar na mesa dos adultos!",
+        ],
+        "emojis": ["😂", "🥩", "🍺", "👴", "🍰", "😎"],
+        "caloteiro_leve": [
+            "Já tem {dias} dia(s), sobrinho. O Pix tá de férias?",
+            "O tio tá esperando o Pix igual espera o pavê: com ansiedade.",
+            "Tu sumiu há {dias} dia(s) igual a última fatia do pavê.",
+        ],
+        "caloteiro_medio": [
+            "{dias} dias! Até a piada do pavê é mais rápida que teu Pix.",
+            "Já faz {dias} dias, e o tio já contou essa dívida no almoço de domingo.",
+            "Tua dívida já tem mais tempo que minhas piadas, e olha que elas são antigas.",
+        ],
+        "caloteiro_pesado": [
+            "{dias} dias, sobrinho. Vou contar pra tua vó.",
+            "Depois de {dias} dias, no Natal tu vai sentar do lado da tia que pergunta do namoro.",
+            "{dias} dias! Já tô ensaiando o discurso no aniversário da família.",
+        ],
+        "valor_caloteiro": [
+            "São {valor}, lembra?",
+            "Os {valor} continuam te esperando, igual o tio no portão.",
+            "{valor}, sobrinho. Sem desconto de parente.",
+        ],
+        "fechamento_caloteiro": [
+            "Paga senão o tio conta a piada do pavê no teu casamento!",
+            "Paga hoje e o tio esquece essa história. Talvez.",
+            "Se não pagar, vai ouvir 'é pavê ou pacumê' pelo resto da vida!",
+        ],
+    },
+    "corporativo": {
+        "titulo": "Gerente do Churrasco",
+        "saudacao": [
+            "Prezado(a) {nome},",
+            "Olá {nome}, tudo bem?",
+            "Bom dia {nome}, espero que esteja bem.",
+            "Caro(a) {nome},",
+        ],
+        "bebeu": [
+            "Identificamos uma performance acima da meta no consumo de cerveja.",
+            "Seu engajamento com o setor de bebidas foi exemplar.",
+            "Registramos consumo etílico de alta produtividade no evento.",
+            "Sua contribuição para zerar o estoque de cerveja foi reconhecida pela diretoria.",
+        ],
+        "nao_bebeu": [
+            "Sua participação no consumo de {comida} superou o forecast.",
+            "Mesmo sem bebidas alcoólicas, seu KPI de proteína foi notável.",
+            "Constatamos alocação eficiente de {comida} no seu prato.",
+            "Seu perfil sóbrio não impactou negativamente o consumo de carnes.",
+        ],
+        "valor": [
+            "Segue o valor do rateio: {valor}.",
+            "O centro de custo atribuído a você é de {valor}.",
+            "Conforme planilha, sua cota é de {valor}.",
+            "O valor a ser reembolsado é {valor}.",
+        ],
+        "fechamento": [
+            "Solicitamos a gentileza de efetuar o Pix. Fico no aguardo.",
+            "Favor efetuar o pagamento até o fim do expediente.",
+            "Qualquer dúvida, estou à disposição. Pix abaixo.",
+            "Agradecemos a colaboração e contamos com o pagamento.",
+        ],
+        "emojis": ["📊", "📈", "🤝", "📎", "✅"],
+        "caloteiro_leve": [
+            "Consta pendência em aberto há {dias} dia(s).",
+            "Verificamos que o pagamento ainda não foi identificado.",
+            "Estamos fazendo o follow-up da cobrança enviada há {dias} dia(s).",
+        ],
+        "caloteiro_medio": [
+            "A pendência completa {dias} dias e foi escalada para a diretoria.",
+            "Reforçamos o e-mail anterior: pendência de {dias} dias.",
+            "Sua dívida foi incluída na pauta da próxima reunião de alinhamento.",
+        ],
+        "caloteiro_pesado": [
+            "Após {dias} dias, seu caso foi encaminhado ao jurídico do churrasco.",
+            "Com {dias} dias de atraso, seu acesso à picanha foi revogado até a regularização.",
+            "{dias} dias de inadimplência: seu nome consta no relatório trimestral.",
+        ],
+        "valor_caloteiro": [
+            "Valor em aberto: {valor}.",
+            "Saldo devedor atualizado: {valor}.",
+            "Montante pendente: {valor}.",
+        ],
+        "fechamento_caloteiro": [
+            "Solicitamos regularização imediata para evitar exposição no grupo.",
+            "Sem retorno, a pendência será apresentada em reunião geral (o grupo).",
+            "Aguardamos o pagamento para encerrar o chamado.",
+        ],
+    },
+}
+
+PERSONA_PADRAO = "sincerao"
+
+# Comida usada nas piadas quando não se sabe o que a pessoa comeu
+COMIDA_PADRAO = "picanha"
+
+
+def faixa_atraso(dias_atraso: int) -> str:
+    """Faixa de atraso do caloteiro: leve (até 2 dias), medio (até 6) ou pesado."""
+    if dias_atraso <= 2:
+        return "leve"
+    if dias_atraso <= 6:
+        return "medio"
+    return "pesado"
+
+
+def formatar_valor(valor: float) -> str:
+    """Valor exatamente como nas mensagens da IA: 'R$ 85.00'."""
+    return f"R$ {valor:.2f}"
+
+
+def _semente_estavel(*partes) -> int:
+    """Semente que não muda entre execuções (hash() do Python é aleatório por processo)."""
+    bruto = "|".join(str(p) for p in partes)
+    return int.from_bytes(hashlib.blake2b(bruto.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+# ============================================
+# COMPOSIÇÃO DAS MENSAGENS
+# ============================================
+
+def compor_cobranca(
+    nome: str,
+    valor: float,
+    pix_key: str,
+    bebeu: bool = False,
+    itens_consumidos: list | None = None,
+    persona: str = PERSONA_PADRAO,
+    semente: int | None = None
+) -> str:
+    """
+    Monta a mensagem de cobrança combinando frases do banco da persona.
+    O mesmo (nome, valor, caso, semente) sempre gera o mesmo texto; mude a semente para variar.
+    """
+    banco = PERSONAS.get(persona, PERSONAS[PERSONA_PADRAO])
+    caso = "bebeu" if bebeu else "nao_bebeu"
+    rng = random.Random(_semente_estavel(persona, caso, nome, f"{valor:.2f}", semente))
+    dados = {
+        "nome": nome,
+        "valor": formatar_valor(valor),
+        "comida": rng.choice(itens_consumidos[:5]).lower() if itens_consumidos else COMIDA_PADRAO,
+    }
+    emojis = rng.sample(banco["emojis"], 2)
+    corpo = " ".join([
+        f"{rng.choice(banco['saudacao'])} {emojis[0]}",
+        rng.choice(banco[caso]),
+        rng.choice(banco["valor"]),
+        f"{rng.choice(banco['fechamento'])} {emojis[1]}",
+    ]).format(**dados)
+    return f"{corpo}\n💸 Pix: {pix_key}"
+
+
+def compor_caloteiro(
+    nome: str,
+    valor: float,
+    dias_atraso: int = 3,
+    pix_key: str | None = None,
+    persona: str = PERSONA_PADRAO,
+    semente: int | None = None
+) -> str:
+    """Mensagem para o caloteiro, mais pesada quanto maior o atraso (ver faixa_atraso)."""
+    banco = PERSONAS.get(persona, PERSONAS[PERSONA_PADRAO])
+    faixa = faixa_atraso(dias_atraso)
+    rng = random.Random(_semente_estavel(persona, "caloteiro", faixa, nome, f"{valor:.2f}", dias_atraso, semente))
+    dados = {"nome": nome, "valor": formatar_valor(valor), "dias": dias_atraso}
+    emojis = rng.sample(banco["emojis"], 2)
+    corpo = " ".join([
+        f"{rng.choice(banco['saudacao'])} {emojis[0]}",
+        rng.choice(banco[f"caloteiro_{faixa}"]),
+        rng.choice(banco["valor_caloteiro"]),
+        f"{rng.choice(banco['fechamento_caloteiro'])} {emojis[1]}",
+    ]).format(**dados)
+    if pix_key:
+        corpo += f"\n💸 Pix: {pix_key}"
+    return corpo
+
+
+# ============================================
+# POOL DE MENSAGENS PRÉ-GERADAS PELA IA
+# ============================================
+# Modelos escritos pela IA com lacunas ({nome}, {valor}, {pix}, {dias}) que
+# são preenchidas na hora da cobrança.
+
+CATEGORIAS_POOL = ("bebeu", "nao_bebeu", "caloteiro_leve", "caloteiro_medio", "caloteiro_pesado")
+
+# Lacunas que cada modelo precisa ter; caloteiro recebe a linha do Pix no final, se houver
+LACUNAS_OBRIGATORIAS = {
+    "bebeu": ("{nome}", "{valor}", "{pix}"),
+    "nao_bebeu": ("{nome}", "{valor}", "{pix}"),
+    "caloteiro_leve": ("{nome}", "{valor}"),
+    "caloteiro_medio": ("{nome}", "{valor}"),
+    "caloteiro_pesado": ("{nome}", "{valor}"),
+}
+
+
+def categoria_pool(bebeu: bool = False, dias_atraso: int | None = None) -> str:
+    """Categoria do pool: caloteiro_<faixa> quando há dias de atraso, senão bebeu/nao_bebeu."""
+    if dias_atraso is not None:
+        return f"caloteiro_{faixa_atraso(dias_atraso)}"
+    return "bebeu" if bebeu else "nao_bebeu"
+
+
+def modelo_valido(modelo: str, categoria: str) -> bool:
+    """O modelo tem as lacunas obrigatórias e nenhuma lacuna desconhecida."""
+    if not isinstance(modelo, str):
+        return False
+    if any(lacuna not in modelo for lacuna in LACUNAS_OBRIGATORIAS[categoria]):
+        return False
+    if categoria.startswith("caloteiro") and "{pix}" in modelo:
+        return False
+    try:
+        modelo.format(nome="x", valor="x", pix="x", dias=0)
+    except (KeyError, IndexError, ValueError):
+        return False
+    return True
+
+
+def preencher_modelo(modelo: str, nome: str, valor: float, pix_key: str | None = None,
+                     dias_atraso: int = 0) -> str | None:
+    """
+    Preenche as lacunas e confere o resultado: o texto final precisa ter o valor
+    exato ('R$ 85.00') e a chave Pix. Retorna None se não passar na conferência.
+    """
+    valor_texto = formatar_valor(valor)
+    try:
+        texto = modelo.format(nome=nome, valor=valor_texto, pix=pix_key or "", dias=dias_atraso)
+    except (KeyError, IndexError, ValueError):
+        return None
+    if "{pix}" not in modelo and pix_key:
+        texto += f"\n💸 Pix: {pix_key}"
+    if valor_texto not in texto or (pix_key and pix_key not in texto):
+        return None
+    return texto
+
+
+class PoolMensagens:
+    """
+    Estoque de modelos de mensagem por categoria. Servir uma mensagem é só tirar
+    um modelo da fila e preencher as lacunas; quando a fila de uma categoria fica
+    abaixo de `minimo`, uma thread pede mais modelos à IA (via `gerador`) até `alvo`.
+    O estoque é salvo no cache em disco a cada reabastecimento, para um restart
+    não começar vazio (modelos já servidos podem voltar, o que é inofensivo).
+    `chave_cache` pode ser uma função, calculada a cada leitura/gravação (ex.: para
+    incluir o modelo que o roteador está usando no momento).
+    """
+
+    def __init__(self, gerador, cache=None, chave_cache="pool", minimo: int = 5, alvo: int = 20):
+        self.gerador = gerador  # (categoria, quantidade) -> lista de modelos
+        self.cache = cache
+        self.chave_cache = chave_cache
+        self.minimo = minimo
+        self.alvo = alvo
+        self._filas: dict | None = None
+        self._reabastecendo: set = set()
+        self._lock = threading.Lock()
+        self._estatisticas = {"servidas": 0, "vazias": 0, "reprovadas": 0, "geradas": 0, "falhas_geracao": 0}
+
+    def _chave(self) -> str:
+        return self.chave_cache() if callable(self.chave_cache) else self.chave_cache
+
+    def _carregar(self):
+        if self._filas is not None:
+            return
+        salvo = self.cache.obter(self._chave()) if self.cache is not None else None
+        self._filas = {
+            categoria: deque(m for m in (salvo or {}).get(categoria, []) if modelo_valido(m, categoria))
+            for categoria in CATEGORIAS_POOL
+        }
+
+    def _salvar(self):
+        if self.cache is not None:
+            self.cache.guardar(self._chave(), {c: list(fila) for c, fila in self._filas.items()})
+
+    def servir(self, categoria: str, nome: str, valor: float, pix_key: str | None = None,
+               dias_atraso: int = 0) -> str | None:
+        """Mensagem pronta a partir do pool, ou None se a categoria estiver vazia."""
+        texto = None
+        with self._lock:
+            self._carregar()
+            fila = self._filas[categoria]
+            while fila and texto is None:
+                texto = preencher_modelo(fila.popleft(), nome, valor, pix_key, dias_atraso)
+                if texto is None:
+                    self._estatisticas["reprovadas"] += 1
+            self._estatisticas["servidas" if texto else "vazias"] += 1
+            baixo = len(fila) < self.minimo
+        if baixo:
+            self.reabastecer_em_segundo_plano(categoria)
+        return texto
+
+    def reabastecer(self, categoria: str) -> int:
+        """Pede um lote de modelos à IA para levar a categoria até o alvo. Retorna quantos entraram."""
+        with self._lock:
+            self._carregar()
+            faltam = self.alvo - len(self._filas[categoria])
+        if faltam <= 0:
+            return 0
+        try:
+            novos = [m for m in self.gerador(categoria, faltam) if modelo_valido(m, categoria)]
+        except Exception:
+            with self._lock:
+                self._estatisticas["falhas_geracao"] += 1
+            return 0
+        with self._lock:
+            self._filas[categoria].extend(novos)
+            self._estatisticas["geradas"] += len(novos)
+            self._salvar()
+        return len(novos)
+
+    def reabastecer_em_segundo_plano(self, categoria: str) -> bool:
+        """Dispara o reabastecimento numa thread, se ainda não houver um rodando para a categoria."""
+        with self._lock:
+            if categoria in self._reabastecendo:
+                return False
+            self._reabastecendo.add(categoria)
+
+        def rodar():
+            try:
+                self.reabastecer(categoria)
+            finally:
+                with self._lock:
+                    self._reabastecendo.discard(categoria)
+
+        threading.Thread(target=rodar, daemon=True, name=f"pool-{categoria}").start()
+        return True
+
+    def aquecer(self):
+        """Reabastece em segundo plano todas as categorias abaixo do mínimo."""
+        with self._lock:
+            self._carregar()
+            baixas = [c for c, fila in self._filas.items() if len(fila) < self.minimo]
+        for categoria in baixas:
+            self.reabastecer_em_segundo_plano(categoria)
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            self._carregar()
+            return {
+                **self._estatisticas,
+                "estoque": {c: len(fila) for c, fila in self._filas.items()},
+                "reabastecendo": sorted(self._reabastecendo),
+            }
@@ -0,0 +1,207 @@
+import json
+import time
+import threading
+from collections import deque
+
+# ============================================
+# PREÇOS DOS MODELOS (USD POR 1M DE TOKENS)
+# ============================================
+
+PRECOS_POR_MILHAO = {
+    "gpt-4o": {"entrada": 2.50, "saida": 10.00},
+    "gpt-4o-mini": {"entrada": 0.15, "saida": 0.60},
+}
+
+
+def estimar_custo(modelo: str, tokens_entrada: int, tokens_saida: int) -> float:
+    """Custo estimado em USD de uma chamada (0 para modelos fora da tabela)."""
+    precos = PRECOS_POR_MILHAO.get(modelo)
+    if precos is None:
+        return 0.0
+    return (tokens_entrada * precos["entrada"] + tokens_saida * precos["saida"]) / 1_000_000
+
+
+# ============================================
+# HISTOGRAMA
+# ============================================
+
+# Limites dos buckets de latência em segundos (chamadas de Vision passam fácil de 10s)
+BUCKETS_LATENCIA = (0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 32, 64)
+
+
+class Histograma:
+    """
+    Histograma no formato do Prometheus (buckets cumulativos, soma e contagem),
+    mais as últimas amostras para calcular p50/p95 sem depender de interpolação.
+    """
+
+    def __init__(self, buckets: tuple = BUCKETS_LATENCIA, amostras: int = 1000):
+        self.buckets = buckets
+        self.contagens = [0] * len(buckets)
+        self.soma = 0.0
+        self.total = 0
+        self.recentes = deque(maxlen=amostras)
+
+    def observar(self, valor: float):
+        for i, limite in enumerate(self.buckets):
+            if valor <= limite:
+                self.contagens[i] += 1
+        self.soma += valor
+        self.total += 1
+        self.recentes.append(valor)
+
+    def percentil(self, p: float) -> float:
+        if not self.recentes:
+            return 0.0
+        ordenados = sorted(self.recentes)
+        return ordenados[int(p * (len(ordenados) - 1))]
+
+    def resumo(self) -> dict:
+        return {
+            "contagem": self.total,
+            "media": round(self.soma / self.total, 3) if self.total else 0.0,
+            "p50": round(self.percentil(0.5), 3),
+            "p95": round(self.percentil(0.95), 3),
+            "max": round(max(self.recentes), 3) if self.recentes else 0.0,
+        }
+
+
+# ============================================
+# MÉTRICAS DAS CHAMADAS DE IA
+# ============================================
+
+_CONTADORES = (
+    "chamadas", "erros", "retries", "tokens_entrada", "tokens_saida",
+    "custo_usd", "cache_hits", "cache_misses", "respostas_locais",
+)
+
+
+class _MetricasFuncao:
+    def __init__(self):
+        self.latencia = Histograma()
+        self.primeiro_token = Histograma()
+        self.contadores = dict.fromkeys(_CONTADORES, 0)
+        self.rotas: dict = {}  # (modelo, motivo) -> decisões do roteador
+
+
+class MetricasIA:
+    """
+    Métricas em memória das chamadas de IA, agrupadas pela função do utils
+    (gerar_lista_churrasco, extrair_itens_nota, ...): latência, tempo até o
+    primeiro token (streaming), tokens, retries, acertos de cache e custo estimado.
+    """
+
+    def __init__(self):
+        self._funcoes: dict = {}
+        self._lock = threading.Lock()
+        self.inicio = time.time()
+
+    def _obter(self, funcao: str) -> _MetricasFuncao:
+        metricas = self._funcoes.get(funcao)
+        if metricas is None:
+            metricas = self._funcoes[funcao] = _MetricasFuncao()
+        return metricas
+
+    def registrar_chamada(self, funcao: str, modelo: str, latencia_s: float, tentativas: int = 1,
+                          tokens_entrada: int = 0, tokens_saida: int = 0, primeiro_token_s: float | None = None,
+                          erro: bool = False):
+        with self._lock:
+            metricas = self._obter(funcao)
+            metricas.latencia.observar(latencia_s)
+            if primeiro_token_s is not None:
+                metricas.primeiro_token.observar(primeiro_token_s)
+            contadores = metricas.contadores
+            contadores["chamadas"] += 1
+            contadores["retries"] += max(0, tentativas - 1)
+            contadores["tokens_entrada"] += tokens_entrada
+            contadores["tokens_saida"] += tokens_saida
+            contadores["custo_usd"] += estimar_custo(modelo, tokens_entrada, tokens_saida)
+            if erro:
+                contadores["erros"] += 1
+
+    def registrar_cache(self, funcao: str, acerto: bool):
+        with self._lock:
+            self._obter(funcao).contadores["cache_hits" if acerto else "cache_misses"] += 1
+
+    def registrar_local(self, funcao: str):
+        """Resposta calculada localmente, sem chamar a IA."""
+        with self._lock:
+            self._obter(funcao).contadores["respostas_locais"] += 1
+
+    def registrar_rota(self, funcao: str, modelo: str, motivo: str):
+        """Decisão do roteador de modelos (roteamento_utils) para uma chamada."""
+        with self._lock:
+            rotas = self._obter(funcao).rotas
+            rotas[(modelo, motivo)] = rotas.get((modelo, motivo), 0) + 1
+
+    def snapshot(self) -> dict:
+        """Fotografia das métricas em dict (serializável em JSON)."""
+        with self._lock:
+            return {
+                "desde": self.inicio,
+                "funcoes": {
+                    funcao: {
+                        **{k: round(v, 6) if isinstance(v, float) else v for k, v in m.contadores.items()},
+                        "latencia_s": m.latencia.resumo(),
+                        "primeiro_token_s": m.primeiro_token.resumo(),
+                        "rotas": {f"{modelo}/{motivo}": n for (modelo, motivo), n in m.rotas.items()},
+                    }
+                    for funcao, m in self._funcoes.items()
+                },
+            }
+
+    def exportar_json(self) -> str:
+        return json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+
+    def exportar_prometheus(self) -> str:
+        """Métricas no formato texto de exposição do Prometheus."""
+        linhas = []
+        with self._lock:
+            for nome, descricao in (
+                ("chamadas", "Chamadas de IA"),
+                ("erros", "Chamadas de IA que falharam"),
+                ("retries", "Novas tentativas após rate limit"),
+                ("tokens_entrada", "Tokens de entrada (prompt)"),
+                ("tokens_saida", "Tokens de saída (completion)"),
+                ("custo_usd", "Custo estimado em USD"),
+                ("cache_hits", "Respostas servidas pelo cache"),
+                ("cache_misses", "Consultas ao cache sem resposta"),
+                ("respostas_locais", "Respostas calculadas sem IA"),
+            ):
+                metrica = f"churrasco_ia_{nome}_total"
+                linhas.append(f"# HELP {metrica} {descricao}")
+                linhas.append(f"# TYPE {metrica} counter")
+                for funcao, m in self._funcoes.items():
+                    linhas.append(f'{metrica}{{funcao="{funcao}"}} {m.contadores[nome]}')
+
+            metrica = "churrasco_ia_roteamento_total"
+            linhas.append(f"# HELP {metrica} Decisões do roteador de modelos")
+            linhas.append(f"# TYPE {metrica} counter")
+            for funcao, m in self._funcoes.items():
+                for (modelo, motivo), n in m.rotas.items():
+                    linhas.append(f'{metrica}{{funcao="{funcao}",modelo="{modelo}",motivo="{motivo}"}} {n}')
+
+            for nome, atributo, descricao in (
+                ("latencia_segundos", "latencia", "Latência total da chamada"),
+                ("primeiro_token_segundos", "primeiro_token", "Tempo até o primeiro token no streaming"),
+            ):
+                metrica = f"churrasco_ia_{nome}"
+                linhas.append(f"# HELP {metrica} {descricao}")
+                linhas.append(f"# TYPE {metrica} histogram")
+                for funcao, m in self._funcoes.items():
+                    histograma = getattr(m, atributo)
+                    for limite, contagem in zip(histograma.buckets, histograma.contagens):
+                        linhas.append(f'{metrica}_bucket{{funcao="{funcao}",le="{limite}"}} {contagem}')
+                    linhas.append(f'{metrica}_bucket{{funcao="{funcao}",le="+Inf"}} {histograma.total}')
+                    linhas.append(f'{metrica}_sum{{funcao="{funcao}"}} {histograma.soma}')
+                    linhas.append(f'{metrica}_count{{funcao="{funcao}"}} {histograma.total}')
+        return "\n".join(linhas) + "\n"
+
+    def limpar(self):
+        with self._lock:
+            self._funcoes.clear()
+            self.inicio = time.time()
+
+
+# Métricas únicas do processo (todas as sessões)
+metricas_ia = MetricasIA()
@@ -0,0 +1,336 @@
+import os
+import re
+import sys
+import time
+import secrets
+import argparse
+import binascii
+from functools import lru_cache
+
+# ============================================
+# CAMPOS EMV DO PIX (BR CODE)
+# ============================================
+
+# Campos fixos do BR Code: formato do payload, QR dinâmico, MCC e moeda (986 = BRL)
+_INDICADOR_FORMATO = "000201"
+_PONTO_INICIACAO = "010212"
+_CATEGORIA_E_MOEDA = "52040000" + "5303986"
+_GUI_PIX = "0014br.gov.bcb.pix"
+_PAIS = "5802BR"
+_TXID_PADRAO = "***"
+_ID_CRC = "6304"
+
+
+class PayloadPixInvalido(ValueError):
+    """Payload Pix que não segue o BR Code (tamanhos, campos obrigatórios ou CRC)."""
+
+
+def formatar_campo(id_campo: str, valor_campo: str) -> str:
+    """Campo TLV do EMV: id (2 dígitos) + tamanho (2 dígitos) + valor."""
+    if len(valor_campo) > 99:
+        raise PayloadPixInvalido(
+            f"campo {id_campo} com {len(valor_campo)} caracteres (máximo 99)"
+            + (": chave Pix longa demais" if id_campo in ("01", "26") else "")
+        )
+    return f"{id_campo}{len(valor_campo):02d}{valor_campo}"
+
+
+# txid: até 25 caracteres alfanuméricos; o nosso tem 12 (36^12 combinações)
+_ALFABETO_TXID = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+_TXID_VALIDO = re.compile(r"^[A-Za-z0-9]{1,25}$")
+TAMANHO_TXID = 12
+
+
+def gerar_txid() -> str:
+    """Identificador curto e único da cobrança, que volta no extrato quando a pessoa paga."""
+    return "CH" + "".join(secrets.choice(_ALFABETO_TXID) for _ in range(TAMANHO_TXID - 2))
+
+
+def validar_txid(txid: str) -> str:
+    if txid != _TXID_PADRAO and not _TXID_VALIDO.match(txid):
+        raise ValueError(f"txid inválido: {txid!r} (até 25 letras ou números)")
+    return txid
+
+
+def _campo_txid(txid: str) -> bytes:
+    return (formatar_campo("62", formatar_campo("05", validar_txid(txid))) + _ID_CRC).encode("utf-8")
+
+
+def calcular_crc16(payload: str) -> str:
+    """
+    CRC16-CCITT (polinômio 0x1021, início 0xFFFF) do payload Pix.
+    binascii.crc_hqx é exatamente esse CRC, com a tabela de 256 entradas em C.
+    """
+    return format(binascii.crc_hqx(payload.encode("utf-8"), 0xFFFF), "04X")
+
+
+# Textos livres que o BR Code limita: são cortados ao gerar o payload (ver textos_cortados)
+LIMITE_DESCRICAO = 25
+LIMITE_NOME = 25
+LIMITE_CIDADE = 15
+
+
+def textos_cortados(nome_recebedor: str, cidade: str, descricao: str = "") -> list:
+    """
+    Avisos para os textos que não cabem no BR Code e vão cortados no payload
+    (o app mostra antes de gerar as cobranças). Lista vazia se tudo couber.
+    """
+    avisos = []
+    for rotulo, texto, limite in (
+        ("nome do recebedor", nome_recebedor, LIMITE_NOME),
+        ("cidade", cidade, LIMITE_CIDADE),
+        ("descrição", descricao, LIMITE_DESCRICAO),
+    ):
+        texto = (texto or "").strip()
+        if len(texto) > limite:
+            avisos.append(f"{rotulo} com {len(texto)} caracteres vai como {texto[:limite]!r} (máximo {limite})")
+    return avisos
+
+
+@lru_cache(maxsize=1024)
+def _cabecalho(chave_pix: str, descricao: str) -> tuple:
+    """
+    Início do payload até a moeda (campos 00, 01, 26, 52 e 53), que não depende do
+    valor, e o CRC parcial dele, para cada cobrança só continuar o CRC dali.
+    """
+    if not chave_pix.strip():
+        raise PayloadPixInvalido("chave Pix vazia")
+    mai = _GUI_PIX + formatar_campo("01", chave_pix)
+    descricao = descricao.strip()
+    if descricao:
+        mai += formatar_campo("02", descricao[:LIMITE_DESCRICAO])
+    cabecalho = _INDICADOR_FORMATO + _PONTO_INICIACAO + formatar_campo("26", mai) + _CATEGORIA_E_MOEDA
+    return cabecalho, binascii.crc_hqx(cabecalho.encode("utf-8"), 0xFFFF)
+
+
+@lru_cache(maxsize=256)
+def _rodape(nome_recebedor: str, cidade: str) -> bytes:
+    """Campos depois do valor que não mudam por cobrança (58, 59 e 60)."""
+    # Confere antes de cortar: um nome só de espaços viraria um campo 59 vazio
+    nome_recebedor, cidade = nome_recebedor.strip(), cidade.strip()
+    if not nome_recebedor or not cidade:
+        raise PayloadPixInvalido("nome do recebedor e cidade são obrigatórios")
+    rodape = (
+        _PAIS
+        + formatar_campo("59", nome_recebedor[:LIMITE_NOME].upper())
+        + formatar_campo("60", cidade[:LIMITE_CIDADE].upper())
+    )
+    return rodape.encode("utf-8")
+
+
+def gerar_payload_pix(chave_pix: str, nome_recebedor: str, cidade: str, valor: float, descricao: str = "",
+                      txid: str = _TXID_PADRAO) -> str:
+    """
+    Gera payload do Pix no formato EMV.
+    Baseado na especificação do Banco Central do Brasil.
+    txid (campo 62-05) identifica a cobrança no extrato; "***" é o Pix sem identificador.
+    Descrição, nome e cidade além do limite do BR Code são cortados (textos_cortados
+    diz quais); chave, nome ou cidade vazios levantam PayloadPixInvalido.
+    """
+    cabecalho, crc = _cabecalho(chave_pix, descricao)
+    resto = formatar_campo("54", f"{valor:.2f}").encode("utf-8") + _rodape(nome_recebedor, cidade) + _campo_txid(txid)
+    crc = binascii.crc_hqx(resto, crc)
+    payload = f"{cabecalho}{resto.decode('utf-8')}{crc:04X}"
+    if validar_ao_gerar():
+        verificar_payload_pix(payload)
+    return payload
+
+
+def gerar_payloads_pix(chave_pix: str, nome_recebedor: str, cidade: str, valores: dict,
+                       descricoes: dict | str | None = None, txids: dict | None = None) -> dict:
+    """
+    Gera os payloads de várias cobranças de uma vez (ex.: {pessoa: valor} da divisão).
+    descricoes pode ser um dict {pessoa: descrição}, uma descrição única para todos
+    ou None para a descrição padrão "Churras-<pessoa>" usada pelo app.
+    txids é o dict {pessoa: txid} (sem ele, "***").
+    Os campos fixos e o CRC deles são calculados uma vez por descrição, não por pessoa.
+    """
+    rodape = _rodape(nome_recebedor, cidade)
+    sem_txid = _campo_txid(_TXID_PADRAO)
+    crc_hqx = binascii.crc_hqx
+    validar = validar_ao_gerar()
+    payloads = {}
+    for pessoa, valor in valores.items():
+        if descricoes is None:
+            descricao = f"Churras-{str(pessoa)[:10]}"
+        elif isinstance(descricoes, str):
+            descricao = descricoes
+        else:
+            descricao = descricoes.get(pessoa, "")
+        cabecalho, crc = _cabecalho(chave_pix, descricao)
+        valor_formatado = f"{valor:.2f}"
+        campo_txid = _campo_txid(txids[pessoa]) if txids and pessoa in txids else sem_txid
+        resto = f"54{len(valor_formatado):02d}{valor_formatado}".encode("utf-8") + rodape + campo_txid
+        payload = payloads[pessoa] = f"{cabecalho}{resto.decode('utf-8')}{crc_hqx(resto, crc):04X}"
+        if validar:
+            verificar_payload_pix(payload)
+    return payloads
+
+
+# ============================================
+# DECODIFICAÇÃO E VALIDAÇÃO
+# ============================================
+
+# Campos que são templates, com subcampos TLV dentro (contas do recebedor, dados adicionais, reservados)
+_TEMPLATES = {f"{i:02d}" for i in range(26, 52)} | {"62"} | {f"{i:02d}" for i in range(80, 100)}
+
+# Tamanho máximo do valor de cada campo pelo manual do BR Code
+LIMITES_CAMPOS = {"52": 4, "53": 3, "54": 13, "58": 2, "59": 25, "60": 15, "61": 99}
+_OBRIGATORIOS = ("00", "26", "52", "53", "58", "59", "60", "62", "63")
+TAMANHO_MAXIMO_PAYLOAD = 512
+_VALOR_VALIDO = re.compile(r"^\d{1,10}\.\d{2}$")
+
+
+def validar_ao_gerar() -> bool:
+    """CHURRASCO_VALIDAR_PIX=0 desliga a conferência de cada payload gerado."""
+    return os.environ.get("CHURRASCO_VALIDAR_PIX", "1") != "0"
+
+
+def iterar_tlv(texto: str, inicio: int = 0, fim: int | None = None):
+    """
+    Percorre os campos TLV de texto[inicio:fim] sem copiar o texto, um campo por vez:
+    gera (id, início do valor, fim do valor). Tamanho inválido ou campo que passa
+    do fim levanta PayloadPixInvalido quando a leitura chega nele.
+    """
+    fim = len(texto) if fim is None else fim
+    i = inicio
+    while i < fim:
+        id_campo, tamanho = texto[i:i + 2], texto[i + 2:i + 4]
+        if not (tamanho.isdigit() and id_campo.isdigit()) or len(tamanho) < 2:
+            raise PayloadPixInvalido(f"campo malformado na posição {i}")
+        proximo = i + 4 + int(tamanho)
+        if proximo > fim:
+            raise PayloadPixInvalido(f"campo {id_campo} (posição {i}) passa do fim do payload")
+        yield id_campo, i + 4, proximo
+        i = proximo
+
+
+def _campos_tlv(texto: str, inicio: int, fim: int) -> list:
+    """Todos os campos de uma vez (a validação precisa da ordem e do último campo)."""
+    return list(iterar_tlv(texto, inicio, fim))
+
+
+def decodificar_payload_pix(payload: str) -> dict:
+    """Payload em dict {id: valor}; templates (26, 62, ...) viram dicts de subcampos."""
+    campos = {}
+    for id_campo, inicio, fim in _campos_tlv(payload, 0, len(payload)):
+        if id_campo in _TEMPLATES:
+            campos[id_campo] = {sub: payload[a:b] for sub, a, b in _campos_tlv(payload, inicio, fim)}
+        else:
+            campos[id_campo] = payload[inicio:fim]
+    return campos
+
+
+def validar_payload_pix(payload: str) -> list:
+    """
+    Confere um payload (ou copia e cola colado) contra o BR Code: estrutura TLV,
+    subcampos, campos obrigatórios, limites de tamanho, valor e CRC.
+    Retorna a lista de problemas (vazia se estiver tudo certo).
+    """
+    payload = payload.strip()
+    if len(payload) > TAMANHO_MAXIMO_PAYLOAD:
+        return [f"payload com {len(payload)} caracteres (máximo {TAMANHO_MAXIMO_PAYLOAD})"]
+    problemas = []
+    campos = {}
+    try:
+        ordem = _campos_tlv(payload, 0, len(payload))
+        for id_campo, inicio, fim in ordem:
+            if id_campo in campos:
+                problemas.append(f"campo {id_campo} repetido")
+            if id_campo in _TEMPLATES:
+                campos[id_campo] = {sub: payload[a:b] for sub, a, b in _campos_tlv(payload, inicio, fim)}
+            else:
+                campos[id_campo] = payload[inicio:fim]
+    except PayloadPixInvalido as e:
+        return [str(e)]
+
+    if not ordem or ordem[0][0] != "00" or campos["00"] != "01":
+        problemas.append("o payload deve começar com o campo 00 = 01")
+    if not ordem or ordem[-1][0] != "63" or len(campos["63"]) != 4:
+        problemas.append("o CRC (campo 63, 4 caracteres) deve ser o último campo")
+    else:
+        crc = calcular_crc16(payload[:-4])
+        if crc != payload[-4:].upper():
+            problemas.append(f"CRC não confere (esperado {crc}, veio {payload[-4:]})")
+    faltando = [id_campo for id_campo in _OBRIGATORIOS if id_campo not in campos]
+    if faltando:
+        problemas.append(f"campos obrigatórios ausentes: {', '.join(faltando)}")
+
+    for id_campo, limite in LIMITES_CAMPOS.items():
+        if id_campo in campos and len(campos[id_campo]) > limite:
+            problemas.append(f"campo {id_campo} com {len(campos[id_campo])} caracteres (máximo {limite})")
+    if campos.get("01") not in (None, "11", "12"):
+        problemas.append("campo 01 (ponto de iniciação) deve ser 11 ou 12")
+    if "53" in campos and campos["53"] != "986":
+        problemas.append("moeda (campo 53) deve ser 986 (BRL)")
+    if "58" in campos and campos["58"] != "BR":
+        problemas.append("país (campo 58) deve ser BR")
+    if "54" in campos and not _VALOR_VALIDO.match(campos["54"]):
+        problemas.append(f"valor (campo 54) inválido: {campos['54']!r}")
+
+    conta = campos.get("26")
+    if isinstance(conta, dict):
+        if conta.get("00", "").lower() != "br.gov.bcb.pix":
+            problemas.append("campo 26 sem o GUI br.gov.bcb.pix")
+        if not conta.get("01") and not conta.get("25"):
+            problemas.append("campo 26 sem chave Pix (01) nem URL (25)")
+        elif len(conta.get("01", "")) > 77:
+            problemas.append("chave Pix com mais de 77 caracteres")
+    adicionais = campos.get("62")
+    if isinstance(adicionais, dict):
+        txid = adicionais.get("05")
+        if txid is None:
+            problemas.append("campo 62 sem txid (05)")
+        elif txid != _TXID_PADRAO and not _TXID_VALIDO.match(txid):
+            problemas.append(f"txid inválido: {txid!r}")
+    return problemas
+
+
+def verificar_payload_pix(payload: str) -> str:
+    """Guarda: devolve o payload se for válido, senão levanta PayloadPixInvalido com os problemas."""
+    problemas = validar_payload_pix(payload)
+    if problemas:
+        raise PayloadPixInvalido("; ".join(problemas))
+    return payload
+
+
+# ============================================
+# LINHA DE COMANDO
+# ============================================
+
+def main(argumentos: list | None = None) -> int:
+    """
+    Confere um arquivo com um payload (copia e cola) por linha:
+        python -m pix_utils payloads.txt
+        cat payloads.txt | python -m pix_utils -
+    """
+    parser = argparse.ArgumentParser(description="Valida payloads Pix (BR Code), um por linha")
+    parser.add_argument("arquivo", nargs="?", default="-", help="Arquivo de payloads ('-' = entrada padrão)")
+    parser.add_argument("--quieto", action="store_true", help="Só o resumo, sem listar os inválidos")
+    args = parser.parse_args(argumentos)
+
+    entrada = sys.stdin if args.arquivo == "-" else open(args.arquivo, encoding="utf-8")
+    total = invalidos = 0
+    inicio = time.perf_counter()
+    try:
+        for numero, linha in enumerate(entrada, start=1):
+            linha = linha.strip()
+            if not linha:
+                continue
+            total += 1
+            problemas = validar_payload_pix(linha)
+            if problemas:
+                invalidos += 1
+                if not args.quieto:
+                    print(f"linha {numero}: {'; '.join(problemas)}")
+    finally:
+        if entrada is not sys.stdin:
+            entrada.close()
+    duracao = time.perf_counter() - inicio
+    por_segundo = total / duracao if duracao else 0.0
+    print(f"{total} payloads, {total - invalidos} válidos, {invalidos} inválidos ({por_segundo:,.0f}/s)")
+    return 1 if invalidos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
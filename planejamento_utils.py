@@ -0,0 +1,447 @@
+import re
+import math
+
+from texto_utils import normalizar_texto
+
+# ============================================
+# REGRAS DE CÁLCULO (AS MESMAS DO PROMPT DA IA)
+# ============================================
+
+CARNE_KG_HOMEM = 0.4
+CARNE_KG_MULHER = 0.3
+CARNE_KG_CRIANCA = 0.2
+ACRESCIMO_EVENTO_LONGO = 0.2      # +20% se durar mais de 4 horas
+HORAS_EVENTO_LONGO = 4
+CERVEJA_L_POR_BEBEDOR = 1.0
+CERVEJA_L_BEBEM_MUITO = 1.5
+REFRIGERANTE_L_POR_PESSOA = 0.5
+AGUA_L_POR_PESSOA = 0.5
+CARVAO_KG_POR_KG_CARNE = 0.5      # 1kg de carvão para cada 2kg de carne
+PAO_DE_ALHO_POR_PESSOA = 2
+GELO_KG_POR_5_PESSOAS = 2
+
+# Divisão da carne entre os cortes (soma 1.0) e preço médio por kg
+CORTES_PADRAO = {
+    "Picanha": 0.35,
+    "Linguiça Toscana": 0.25,
+    "Fraldinha": 0.20,
+    "Coração de Frango": 0.20,
+}
+
+PRECOS_POR_KG = {
+    "Picanha": 75.00,
+    "Linguiça Toscana": 25.00,
+    "Fraldinha": 50.00,
+    "Coração de Frango": 35.00,
+    "Queijo Coalho": 60.00,
+    "Legumes para grelha": 12.00,
+    "Farofa pronta": 16.00,
+    "Carvão": 5.00,
+    "Gelo": 4.00,
+}
+PRECO_POR_KG_CORTE_DESCONHECIDO = 50.00
+
+PRECO_CERVEJA_LATA = 4.00          # 350ml
+PRECO_REFRIGERANTE_2L = 10.00
+PRECO_AGUA_500ML = 2.50
+PRECO_PAO_DE_ALHO = 1.25
+
+# Vegetarianos não entram na carne; ganham queijo coalho e legumes
+QUEIJO_COALHO_KG_VEGETARIANO = 0.2
+LEGUMES_KG_VEGETARIANO = 0.3
+
+
+# ============================================
+# FORMATAÇÃO
+# ============================================
+
+def _formatar_kg(kg: float) -> str:
+    """Ex: 2.0 -> '2kg', 1.25 -> '1,3kg'."""
+    arredondado = round(kg, 1)
+    if arredondado == int(arredondado):
+        return f"{int(arredondado)}kg"
+    return f"{arredondado:.1f}kg".replace(".", ",")
+
+
+def _item(nome: str, quantidade: str, preco: float, **extras) -> dict:
+    return {"item": nome, "quantidade": quantidade, "preco_estimado": round(preco, 2), **extras}
+
+
+# ============================================
+# MOTOR DE PLANEJAMENTO
+# ============================================
+
+def normalizar_espec(espec: dict) -> dict:
+    """
+    Completa a especificação do evento com os valores padrão.
+    Campos: homens, mulheres, criancas, duracao_horas, bebedores, bebem_muito,
+    vegetarianos, cortes (lista de nomes) e pessoas (se só o total for conhecido,
+    divide meio a meio entre homens e mulheres).
+    """
+    homens = int(espec.get("homens") or 0)
+    mulheres = int(espec.get("mulheres") or 0)
+    criancas = int(espec.get("criancas") or 0)
+
+    pessoas = int(espec.get("pessoas") or 0)
+    if pessoas and not (homens or mulheres):
+        adultos = max(0, pessoas - criancas)
+        homens = math.ceil(adultos / 2)
+        mulheres = adultos - homens
+
+    adultos = homens + mulheres
+    bebedores = espec.get("bebedores")
+    bebedores = adultos if bebedores is None else min(int(bebedores), adultos)
+
+    return {
+        "homens": homens,
+        "mulheres": mulheres,
+        "criancas": criancas,
+        "pessoas": adultos + criancas,
+        "duracao_horas": float(espec.get("duracao_horas") or HORAS_EVENTO_LONGO),
+        "bebedores": bebedores,
+        "bebem_muito": bool(espec.get("bebem_muito", False)),
+        "vegetarianos": min(int(espec.get("vegetarianos") or 0), adultos + criancas),
+        "cortes": list(espec.get("cortes") or CORTES_PADRAO),
+    }
+
+
+def calcular_quantidades(espec: dict) -> dict:
+    """Aplica as regras de cálculo e devolve as quantidades brutas (kg, litros, unidades)."""
+    e = normalizar_espec(espec)
+
+    carne_kg = CARNE_KG_HOMEM * e["homens"] + CARNE_KG_MULHER * e["mulheres"] + CARNE_KG_CRIANCA * e["criancas"]
+    if e["vegetarianos"] and e["pessoas"]:
+        # Tira a parte média de quem não come carne
+        carne_kg -= carne_kg / e["pessoas"] * e["vegetarianos"]
+    fator = 1 + ACRESCIMO_EVENTO_LONGO if e["duracao_horas"] > HORAS_EVENTO_LONGO else 1.0
+    carne_kg *= fator
+
+    cerveja_l = e["bebedores"] * (CERVEJA_L_BEBEM_MUITO if e["bebem_muito"] else CERVEJA_L_POR_BEBEDOR)
+
+    return {
+        **e,
+        "fator_duracao": fator,
+        "carne_kg": carne_kg,
+        "cerveja_l": cerveja_l,
+        "refrigerante_l": REFRIGERANTE_L_POR_PESSOA * e["pessoas"],
+        "agua_l": AGUA_L_POR_PESSOA * e["pessoas"],
+        "carvao_kg": math.ceil(carne_kg * CARVAO_KG_POR_KG_CARNE) if carne_kg else 0,
+        "pao_de_alho": PAO_DE_ALHO_POR_PESSOA * e["pessoas"],
+        "gelo_kg": GELO_KG_POR_5_PESSOAS * math.ceil(e["pessoas"] / 5),
+        "queijo_coalho_kg": QUEIJO_COALHO_KG_VEGETARIANO * e["vegetarianos"] * fator,
+        "legumes_kg": LEGUMES_KG_VEGETARIANO * e["vegetarianos"] * fator,
+    }
+
+
+def planejar_churrasco(espec: dict) -> dict:
+    """
+    Monta a lista de compras localmente, no mesmo formato JSON que gerar_lista_churrasco
+    devolve, sem chamar a IA. resumo e dicas saem com textos padrão.
+    """
+    q = calcular_quantidades(espec)
+
+    # Cortes escolhidos: usa a proporção padrão quando conhecida; corte fora da tabela
+    # recebe a média das proporções conhecidas (ou divide igual se nenhum for conhecido)
+    conhecidos = [CORTES_PADRAO[corte] for corte in q["cortes"] if corte in CORTES_PADRAO]
+    peso_desconhecido = sum(conhecidos) / len(conhecidos) if conhecidos else 1
+    pesos = {corte: CORTES_PADRAO.get(corte, peso_desconhecido) for corte in q["cortes"]}
+    soma_pesos = sum(pesos.values())
+
+    carnes = []
+    for corte, peso in pesos.items():
+        if not q["carne_kg"]:
+            continue
+        kg = q["carne_kg"] * peso / soma_pesos
+        carnes.append(_item(corte, _formatar_kg(kg), kg * PRECOS_POR_KG.get(corte, PRECO_POR_KG_CORTE_DESCONHECIDO)))
+
+    bebidas = []
+    if q["cerveja_l"]:
+        latas = math.ceil(q["cerveja_l"] / 0.35)
+        bebidas.append(_item("Cerveja Lata 350ml", f"{latas} unidades", latas * PRECO_CERVEJA_LATA, alcoolica=True))
+    if q["refrigerante_l"]:
+        garrafas = math.ceil(q["refrigerante_l"] / 2)
+        bebidas.append(_item("Refrigerante 2L", f"{garrafas} unidades", garrafas * PRECO_REFRIGERANTE_2L, alcoolica=False))
+    if q["agua_l"]:
+        garrafas = math.ceil(q["agua_l"] / 0.5)
+        bebidas.append(_item("Água 500ml", f"{garrafas} unidades", garrafas * PRECO_AGUA_500ML, alcoolica=False))
+
+    acompanhamentos = []
+    if q["pao_de_alho"]:
+        acompanhamentos.append(_item("Pão de Alho", f"{q['pao_de_alho']} unidades", q["pao_de_alho"] * PRECO_PAO_DE_ALHO))
+        farofa_kg = 0.5 * math.ceil(q["pessoas"] / 10)
+        acompanhamentos.append(_item("Farofa pronta", _formatar_kg(farofa_kg), farofa_kg * PRECOS_POR_KG["Farofa pronta"]))
+    if q["queijo_coalho_kg"]:
+        acompanhamentos.append(_item("Queijo Coalho", _formatar_kg(q["queijo_coalho_kg"]),
+                                     q["queijo_coalho_kg"] * PRECOS_POR_KG["Queijo Coalho"]))
+        acompanhamentos.append(_item("Legumes para grelha", _formatar_kg(q["legumes_kg"]),
+                                     q["legumes_kg"] * PRECOS_POR_KG["Legumes para grelha"]))
+
+    carvao_gelo = []
+    if q["carvao_kg"]:
+        carvao_gelo.append(_item("Carvão", f"{q['carvao_kg']}kg", q["carvao_kg"] * PRECOS_POR_KG["Carvão"]))
+    if q["gelo_kg"]:
+        carvao_gelo.append(_item("Gelo", f"{q['gelo_kg']}kg", q["gelo_kg"] * PRECOS_POR_KG["Gelo"]))
+
+    total = sum(item["preco_estimado"] for item in carnes + bebidas + acompanhamentos + carvao_gelo)
+    horas = q["duracao_horas"]
+
+    return {
+        "resumo": _resumo_padrao(q),
+        "pessoas": q["pessoas"],
+        "duracao_estimada": f"{int(horas) if horas == int(horas) else horas} horas",
+        "carnes": carnes,
+        "bebidas": bebidas,
+        "acompanhamentos": acompanhamentos,
+        "carvao_gelo": carvao_gelo,
+        "total_estimado": round(total, 2),
+        "dicas": _dicas_padrao(q),
+    }
+
+
+def _resumo_padrao(q: dict) -> str:
+    if q["bebem_muito"]:
+        return f"Churrasco raiz pra {q['pessoas']} pessoas com a galera do copo cheio. Capricha no gelo!"
+    return f"Churrasco pra {q['pessoas']} pessoas, {_formatar_kg(q['carne_kg'])} de carne na brasa e ninguém passa fome."
+
+
+def _dicas_padrao(q: dict) -> list:
+    dicas = ["Acenda o carvão uns 40 minutos antes de a galera chegar."]
+    if q["fator_duracao"] > 1:
+        dicas.append("Evento longo: já contamos 20% a mais de carne, solta aos poucos na grelha.")
+    if q["vegetarianos"]:
+        dicas.append("Grelhe o queijo coalho e os legumes antes da carne, numa parte limpa da grelha.")
+    if q["bebem_muito"]:
+        dicas.append("Coloque a cerveja no gelo pelo menos 2 horas antes.")
+    return dicas
+
+
+# ============================================
+# INTERPRETAÇÃO LOCAL DA DESCRIÇÃO
+# ============================================
+
+# Descrições interpretadas com pelo menos esta confiança dispensam a IA
+CONFIANCA_MINIMA_LOCAL = 0.75
+
+_GRUPOS = r"pessoas?|amigos?|amigas?|convidados?|adultos?|parceiros?|colegas?|primos?|brothers?|manos?"
+_HOMENS = r"homens?|caras?|marmanjos?|rapazes|moleques?"
+_MULHERES = r"mulheres|mulher|minas?|meninas?|garotas?|moças?|mocas?"
+_CRIANCAS = r"criancas?|filhos?|filhas?|kids|pirralhos?|pequenos?|bebes?"
+_VEGETARIANOS = r"vegetarian[oa]s?|vegan[oa]s?"
+# Cada casal conta como um homem e uma mulher
+_CASAIS = r"casais|casal"
+
+BEBEM_MUITO = [
+    r"bebe\w* muito", r"bebe\w* (?:pra|para) caramba", r"bebe\w* demais", r"cachaceir", r"pinguc",
+    r"bebuns?", r"muita cerveja", r"open bar", r"copo cheio", r"enche a cara",
+]
+NINGUEM_BEBE = [r"ninguem bebe", r"(?<!\d )nao bebem", r"sem alcool", r"sem bebida alcoolica", r"so refri"]
+BEBEM_POUCO = [r"bebe\w* pouco", r"bebe\w* normal", r"bebe\w* moderad"]
+
+# Coisas que o motor local não sabe tratar: se aparecerem, melhor perguntar à IA
+PEDIDOS_ESPECIAIS = [
+    r"orcamento", r"r\$", r"\breais\b", r"barat", r"economic", r"premium", r"sem gluten", r"celiac",
+    r"alergi", r"intoleran", r"kosher", r"halal", r"frutos do mar", r"peixe", r"sobremesa", r"drink",
+]
+
+CORTES_CONHECIDOS = {
+    "picanha": "Picanha",
+    "linguica": "Linguiça Toscana",
+    "fraldinha": "Fraldinha",
+    "coracao": "Coração de Frango",
+    "costela": "Costela",
+    "maminha": "Maminha",
+    "alcatra": "Alcatra",
+    "cupim": "Cupim",
+    "contra file": "Contra-filé",
+    "contrafile": "Contra-filé",
+    "ancho": "Ancho",
+    "asinha": "Asinha de Frango",
+    "frango": "Frango",
+    "cordeiro": "Cordeiro",
+}
+
+# Números que não mudam as quantidades: horário ("as 13h", "as 13 30") e dia ("dia 15")
+NUMEROS_IGNORADOS = [r"\b(?:as|das|partir das) (\d{1,2})(?:h| \d{2})?\b", r"\bdia (\d{1,2})\b"]
+_UNIDADES = r"kg|kgs|quilos?|kilos?|g|gramas?|l|litros?|ml"
+# "1 kg de picanha por pessoa": quantidade explícita que o motor local não aplica
+QUANTIDADE_POR_PESSOA = rf"\d+(?:[.,]\d+)? ?(?:{_UNIDADES})\b.*?\bpor (?:pessoa|cabeca|convidado)"
+
+# Gente a mais sem número ("10 amigos e suas esposas", "+1"): o total real é desconhecido
+ACOMPANHANTES = [
+    r"\b(?:e|com) (?:as |os )?(?:suas?|seus?) (?:esposas?|maridos?|namoradas?|namorados?|mulheres|parceir[oa]s|"
+    r"acompanhantes|familias?|filhos)\b",
+    r"\b(?:com|mais) (?:as |os )?(?:esposas|maridos|namoradas|namorados|acompanhantes|familias)\b",
+    r"\bacompanhantes?\b", r"\bmais um cada\b",
+]
+# Negações que mudam a lista inteira ("sem carne", "sem cerveja"): o motor local não as aplica
+NEGACOES = {
+    r"\bsem carnes?\b": "sem carne",
+    r"\bnao com\w* carne": "sem carne",
+    r"\bninguem come carne": "sem carne",
+    r"\b(?:todos|todo mundo|so) (?:vegetarian|vegan)": "sem carne",
+    r"\bsem cervejas?\b": "sem cerveja",
+    r"\bnao bebe\w* cerveja": "sem cerveja",
+}
+
+DURACOES_POR_EXPRESSAO = {r"dia (?:todo|inteiro)": 8, r"tarde (?:toda|inteira)": 5, r"noite (?:toda|inteira)": 6}
+
+
+def _somar(padrao: str, texto: str, usados: set | None = None) -> int | None:
+    """
+    Soma todos os '<número> <palavra do grupo>' encontrados (ex: '2 homens e 3 caras').
+    A posição de cada número aproveitado vai para `usados`.
+    """
+    achados = list(re.finditer(rf"(\d+) (?:[a-z]+ )?(?:{padrao})\b", texto))
+    if usados is not None:
+        usados.update(achado.start(1) for achado in achados)
+    return sum(int(achado.group(1)) for achado in achados) if achados else None
+
+
+def _duracao(texto: str, usados: set | None = None) -> float | None:
+    usados = usados if usados is not None else set()
+    intervalo = re.search(r"\bdas (\d{1,2})h? (?:as|ate) (\d{1,2})h?\b", texto)
+    if intervalo:
+        usados.update((intervalo.start(1), intervalo.start(2)))
+        inicio, fim = int(intervalo.group(1)), int(intervalo.group(2))
+        return float((fim - inicio) % 24) or None
+
+    # "6 horas", "umas 6h" (mas não "as 13h", que é horário)
+    for achado in re.finditer(r"(\d+(?:,\d+)?) ?(horas?|h)\b", texto):
+        antes = texto[:achado.start()].split()[-1:] or [""]
+        if achado.group(2) == "h" and antes[0] in ("as", "das", "a", "partir"):
+            continue
+        usados.add(achado.start(1))
+        return float(achado.group(1).replace(",", "."))
+
+    for padrao, horas in DURACOES_POR_EXPRESSAO.items():
+        if re.search(padrao, texto):
+            return float(horas)
+    return None
+
+
+def interpretar_descricao(descricao: str) -> dict:
+    """
+    Extrai da descrição livre do churrasco os campos do motor local:
+    quantas pessoas (homens/mulheres/crianças), duração, quanto bebem e vegetarianos.
+    Retorna {"espec": {...}, "confianca": 0.0-1.0, "encontrados": [...], "pendencias": [...]}.
+    Com confiança >= CONFIANCA_MINIMA_LOCAL a descrição pode dispensar a IA.
+    """
+    texto = normalizar_texto(descricao)
+    espec = {}
+    encontrados = []
+    pendencias = []
+    usados = set()  # posição de cada número que entrou na espec
+
+    casais = _somar(_CASAIS, texto, usados)
+    homens = _somar(_HOMENS, texto, usados)
+    mulheres = _somar(_MULHERES, texto, usados)
+    if casais is not None:
+        homens = (homens or 0) + casais
+        mulheres = (mulheres or 0) + casais
+    criancas = _somar(_CRIANCAS, texto, usados)
+    total = _somar(_GRUPOS, texto, usados)
+    if total is None:
+        # "pra 6 casais": o 6 já entrou como casais
+        pra = re.search(r"\b(?:pra|para) (\d+)\b", texto)
+        if pra and pra.start(1) not in usados:
+            total = int(pra.group(1))
+            usados.add(pra.start(1))
+
+    if homens is not None or mulheres is not None:
+        espec["homens"] = homens or 0
+        espec["mulheres"] = mulheres or 0
+        # "10 amigos, 6 homens e 4 mulheres": o total manda se for maior
+        if total and total > espec["homens"] + espec["mulheres"] + (criancas or 0):
+            espec["pessoas"] = total
+            espec.pop("homens")
+            espec.pop("mulheres")
+        encontrados.append("pessoas")
+    elif total:
+        espec["pessoas"] = total
+        encontrados.append("pessoas")
+    if criancas is not None:
+        espec["criancas"] = criancas
+        # Em "10 amigos e 1 criança" a criança costuma estar fora dos 10
+        if "pessoas" in espec and not re.search(rf"(?:{_GRUPOS}),? (?:sendo|dos quais|das quais)", texto):
+            espec["pessoas"] += criancas
+
+    duracao = _duracao(texto, usados)
+    if duracao:
+        espec["duracao_horas"] = duracao
+        encontrados.append("duracao")
+
+    if any(re.search(p, texto) for p in NINGUEM_BEBE):
+        espec["bebedores"] = 0
+        encontrados.append("bebida")
+    elif any(re.search(p, texto) for p in BEBEM_MUITO):
+        espec["bebem_muito"] = True
+        encontrados.append("bebida")
+    elif any(re.search(p, texto) for p in BEBEM_POUCO):
+        espec["bebem_muito"] = False
+        encontrados.append("bebida")
+    nao_bebem = _somar(r"nao bebem|nao bebe", texto, usados)
+    if nao_bebem is not None and "bebedores" not in espec:
+        espec["bebedores_excluidos"] = nao_bebem
+        encontrados.append("bebida")
+
+    vegetarianos = _somar(_VEGETARIANOS, texto, usados)
+    if vegetarianos is not None:
+        espec["vegetarianos"] = vegetarianos
+        encontrados.append("restricoes")
+    elif re.search(rf"\b(?:{_VEGETARIANOS})\b", texto):
+        pendencias.append("vegetarianos sem quantidade")
+
+    cortes = [nome for chave, nome in CORTES_CONHECIDOS.items() if re.search(rf"\b{chave}", texto)]
+    if cortes:
+        espec["cortes"] = list(dict.fromkeys(cortes))
+        encontrados.append("cortes")
+
+    pendencias += [p for p in PEDIDOS_ESPECIAIS if re.search(p, texto)]
+    # O "+" some na normalização: "+1" é conferido no texto original
+    if any(re.search(p, texto) for p in ACOMPANHANTES) or re.search(r"\+ ?\d", descricao):
+        pendencias.append("acompanhantes sem quantidade")
+    pendencias += list(dict.fromkeys(nome for p, nome in NEGACOES.items() if re.search(p, texto)))
+    if re.search(QUANTIDADE_POR_PESSOA, texto):
+        pendencias.append("quantidade por pessoa")
+    pendencias += [f"numero nao interpretado: {n}" for n in _numeros_sobrando(texto, usados)]
+
+    confianca = 0.0
+    if "pessoas" in encontrados:
+        confianca += 0.6
+        confianca += 0.15 if "duracao" in encontrados else 0.0
+        confianca += 0.15 if "bebida" in encontrados else 0.0
+        confianca += 0.1 if ("restricoes" in encontrados or "cortes" in encontrados) else 0.0
+    confianca -= 0.3 * len(pendencias)
+
+    return {
+        "espec": _resolver_bebedores(espec),
+        "confianca": round(max(0.0, min(1.0, confianca)), 2),
+        "encontrados": encontrados,
+        "pendencias": pendencias,
+    }
+
+
+def _numeros_sobrando(texto: str, usados: set) -> list:
+    """
+    Números da descrição que não entraram na espec ("2 famílias de 4 pessoas": o 2).
+    Um número sobrando quer dizer que a descrição tem algo que o motor local não entendeu.
+    O "1" solto é quase sempre o artigo ("um churrasco") e só conta seguido de unidade.
+    """
+    ignorados = {achado.start(1) for padrao in NUMEROS_IGNORADOS for achado in re.finditer(padrao, texto)}
+    sobrando = []
+    for achado in re.finditer(r"(?<![\d.,])\d+(?:[.,]\d+)?", texto):
+        if achado.start() in usados or achado.start() in ignorados:
+            continue
+        if achado.group() == "1" and not re.match(rf" ?(?:{_UNIDADES})\b", texto[achado.end():]):
+            continue
+        sobrando.append(achado.group())
+    return sobrando
+
+
+def _resolver_bebedores(espec: dict) -> dict:
+    """Troca 'N não bebem' pelo número de quem bebe, já com os adultos conhecidos."""
+    excluidos = espec.pop("bebedores_excluidos", None)
+    if excluidos is not None:
+        completa = normalizar_espec(espec)
+        espec["bebedores"] = max(0, completa["homens"] + completa["mulheres"] - excluidos)
+    return espec
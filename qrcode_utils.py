@@ -0,0 +1,231 @@
+import io
+import time
+import threading
+from collections import OrderedDict
+
+from PIL import Image
+
+# qrcode é opcional: sem ele o app só não mostra o QR (o copia e cola continua)
+try:
+    import qrcode
+    HAS_QRCODE = True
+except ImportError:  # pragma: no cover
+    qrcode = None  # type: ignore[assignment]
+    HAS_QRCODE = False
+
+# ============================================
+# OPÇÕES DE RENDERIZAÇÃO
+# ============================================
+
+FORMATOS = ("png", "svg")
+
+# Os mesmos valores que o app sempre usou no QR Pix
+CORRECAO_PADRAO = "L"
+TAMANHO_MODULO_PADRAO = 10
+BORDA_PADRAO = 4
+
+# Limites do cache compartilhado (um QR Pix em PNG tem ~1,3 KB; em SVG, ~5 KB)
+MAX_ITENS_CACHE = 4096
+LIMITE_BYTES_CACHE = 16 * 1024 * 1024
+
+
+def _nivel_correcao(correcao: str) -> int:
+    return {
+        "L": qrcode.constants.ERROR_CORRECT_L,
+        "M": qrcode.constants.ERROR_CORRECT_M,
+        "Q": qrcode.constants.ERROR_CORRECT_Q,
+        "H": qrcode.constants.ERROR_CORRECT_H,
+    }[correcao]
+
+
+# ============================================
+# MATRIZ (VERSÃO E MÁSCARA PRÉ-CALCULADAS)
+# ============================================
+
+# Cada molde (recebedor) e cada formato de payload ocupam uma entrada; o LRU evita
+# que um processo de longa duração acumule uma por recebedor que já passou por ele
+MAX_ITENS_MATRIZ = 1024
+
+# (modos e tamanhos dos blocos de dados, correção) -> versão
+_versoes: OrderedDict = OrderedDict()
+# (versão, correção, molde) -> máscara
+_mascaras: OrderedDict = OrderedDict()
+_matriz_lock = threading.Lock()
+
+
+def _consultar_lru(cache: OrderedDict, chave):
+    with _matriz_lock:
+        valor = cache.get(chave)
+        if valor is not None:
+            cache.move_to_end(chave)
+        return valor
+
+
+def _guardar_lru(cache: OrderedDict, chave, valor):
+    """Guarda sem sobrescrever (a primeira máscara de um molde vale para os seguintes)."""
+    with _matriz_lock:
+        valor = cache.setdefault(chave, valor)
+        cache.move_to_end(chave)
+        while len(cache) > MAX_ITENS_MATRIZ:
+            cache.popitem(last=False)
+        return valor
+
+
+def calcular_matriz(payload: str, correcao: str = CORRECAO_PADRAO, molde: str | None = None) -> list:
+    """
+    Matriz de módulos do QR (sem borda), True = escuro.
+
+    A versão depende só dos modos e tamanhos dos blocos de dados, então é calculada
+    uma vez por formato de payload. A máscara é a etapa cara do qrcode (monta a matriz
+    oito vezes para pontuar cada uma); com `molde`, a máscara escolhida para o primeiro
+    payload daquele molde é reaproveitada pelos seguintes. Cobranças Pix do mesmo
+    recebedor diferem só em valor, descrição e txid, e qualquer uma das oito máscaras
+    é lida pelos leitores.
+    """
+    nivel = _nivel_correcao(correcao)
+    qr = qrcode.QRCode(error_correction=nivel, border=0)
+    qr.add_data(payload)
+    assinatura = (tuple((dados.mode, len(dados)) for dados in qr.data_list), correcao)
+    versao = _consultar_lru(_versoes, assinatura)
+    if versao is None:
+        versao = _guardar_lru(_versoes, assinatura, qr.best_fit())
+    qr.version = versao
+
+    mascara = _consultar_lru(_mascaras, (versao, correcao, molde)) if molde is not None else None
+    if mascara is None:
+        mascara = qr.best_mask_pattern()
+        if molde is not None:
+            mascara = _guardar_lru(_mascaras, (versao, correcao, molde), mascara)
+    qr.makeImpl(False, mascara)
+    return qr.modules
+
+
+# ============================================
+# DESENHO (PNG DIRETO DA MATRIZ E SVG)
+# ============================================
+
+def desenhar_png(matriz: list, tamanho_modulo: int = TAMANHO_MODULO_PADRAO, borda: int = BORDA_PADRAO) -> bytes:
+    """PNG 1 bit: um pixel por módulo, ampliado sem interpolação (em vez de um retângulo por módulo)."""
+    lado = len(matriz) + 2 * borda
+    margem = b"\xff" * lado
+    linhas = [margem] * borda
+    lateral = b"\xff" * borda
+    for linha in matriz:
+        linhas.append(lateral + bytes(0 if escuro else 255 for escuro in linha) + lateral)
+    linhas.extend([margem] * borda)
+    imagem = Image.frombytes("L", (lado, lado), b"".join(linhas)).convert("1")
+    if tamanho_modulo != 1:
+        imagem = imagem.resize((lado * tamanho_modulo, lado * tamanho_modulo), Image.NEAREST)
+    # optimize=True custa o dobro do tempo para economizar ~5% de um arquivo de ~1 KB
+    saida = io.BytesIO()
+    imagem.save(saida, format="PNG")
+    return saida.getvalue()
+
+
+def desenhar_svg(matriz: list, tamanho_modulo: int = TAMANHO_MODULO_PADRAO, borda: int = BORDA_PADRAO) -> bytes:
+    """SVG com um único path: cada sequência de módulos escuros de uma linha vira um retângulo."""
+    lado = len(matriz) + 2 * borda
+    trechos = []
+    for y, linha in enumerate(matriz, start=borda):
+        x, largura = 0, len(linha)
+        while x < largura:
+            if linha[x]:
+                inicio = x
+                while x < largura and linha[x]:
+                    x += 1
+                trechos.append(f"M{inicio + borda} {y}h{x - inicio}v1h-{x - inicio}z")
+            else:
+                x += 1
+    pixels = lado * tamanho_modulo
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{pixels}" height="{pixels}" '
+        f'viewBox="0 0 {lado} {lado}" shape-rendering="crispEdges">'
+        f'<rect width="{lado}" height="{lado}" fill="#fff"/>'
+        f'<path fill="#000" d="{"".join(trechos)}"/></svg>'
+    ).encode("utf-8")
+
+
+# ============================================
+# RENDERIZADOR COM CACHE COMPARTILHADO
+# ============================================
+
+class RenderizadorQR:
+    """
+    Renderiza QR codes (PNG ou SVG) guardando o resultado num LRU do processo,
+    limitado por itens e bytes e compartilhado entre as sessões do Streamlit.
+    A chave é o payload mais as opções de desenho, então a sessão só precisa
+    guardar o payload: o QR volta do cache a cada rerun sem ocupar a memória dela.
+    """
+
+    def __init__(self, max_itens: int = MAX_ITENS_CACHE, limite_bytes: int = LIMITE_BYTES_CACHE):
+        self.max_itens = max_itens
+        self.limite_bytes = limite_bytes
+        self._cache: OrderedDict = OrderedDict()  # (payload, opções) -> bytes
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._estatisticas = {"hits": 0, "misses": 0, "descartados": 0, "tempo_render_s": 0.0}
+
+    def renderizar(self, payload: str, formato: str = "png", tamanho_modulo: int = TAMANHO_MODULO_PADRAO,
+                   borda: int = BORDA_PADRAO, correcao: str = CORRECAO_PADRAO, molde: str | None = None) -> bytes:
+        """Bytes do QR de `payload` no formato pedido ("png" ou "svg"), do cache quando possível."""
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato de QR desconhecido: {formato}")
+        chave = (payload, formato, tamanho_modulo, borda, correcao)
+        with self._lock:
+            conteudo = self._cache.get(chave)
+            if conteudo is not None:
+                self._cache.move_to_end(chave)
+                self._estatisticas["hits"] += 1
+                return conteudo
+            self._estatisticas["misses"] += 1
+
+        # Desenha fora do lock: sessões diferentes renderizam em paralelo
+        inicio = time.perf_counter()
+        matriz = calcular_matriz(payload, correcao, molde)
+        desenhar = desenhar_svg if formato == "svg" else desenhar_png
+        conteudo = desenhar(matriz, tamanho_modulo, borda)
+        with self._lock:
+            self._estatisticas["tempo_render_s"] += time.perf_counter() - inicio
+            self._guardar(chave, conteudo)
+        return conteudo
+
+    def renderizar_lote(self, payloads: list, formato: str = "png", molde: str | None = None, **opcoes) -> list:
+        """Renderiza vários payloads (ex.: o grupo todo) de uma vez, na mesma ordem."""
+        return [self.renderizar(payload, formato, molde=molde, **opcoes) for payload in payloads]
+
+    def _guardar(self, chave: tuple, conteudo: bytes):
+        antigo = self._cache.pop(chave, None)
+        if antigo is not None:
+            self._bytes -= len(antigo)
+        self._cache[chave] = conteudo
+        self._bytes += len(conteudo)
+        while self._cache and (len(self._cache) > self.max_itens or self._bytes > self.limite_bytes):
+            _, descartado = self._cache.popitem(last=False)
+            self._bytes -= len(descartado)
+            self._estatisticas["descartados"] += 1
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._bytes = 0
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            consultas = self._estatisticas["hits"] + self._estatisticas["misses"]
+            renderizados = self._estatisticas["misses"]
+            return {
+                "hits": self._estatisticas["hits"],
+                "misses": self._estatisticas["misses"],
+                "descartados": self._estatisticas["descartados"],
+                "itens": len(self._cache),
+                "bytes": self._bytes,
+                "taxa_acerto": round(self._estatisticas["hits"] / consultas, 3) if consultas else 0.0,
+                "render_medio_ms": round(self._estatisticas["tempo_render_s"] / renderizados * 1000, 2)
+                if renderizados else 0.0,
+                "versoes_conhecidas": len(_versoes),
+                "mascaras_conhecidas": len(_mascaras),
+            }
+
+
+# Renderizador único do processo (compartilhado entre sessões)
+renderizador_qr = RenderizadorQR()
@@ -0,0 +1,159 @@
+import os
+import time
+import threading
+from collections import deque
+
+# ============================================
+# ROTAS POR TAREFA
+# ============================================
+
+# Cada tarefa tem um modelo principal e um reserva. Se o principal passar do SLO de
+# latência (p95) ou errar demais, o tráfego vai para o reserva até ele se recuperar.
+ROTAS = {
+    "gerar_lista_churrasco": {"primario": "gpt-4o", "reserva": "gpt-4o-mini", "slo_p95_s": 20.0},
+    "gerar_lista_churrasco_local": {"primario": "gpt-4o-mini", "reserva": "gpt-4o", "slo_p95_s": 5.0},
+    "extrair_itens_nota": {"primario": "gpt-4o", "reserva": "gpt-4o-mini", "slo_p95_s": 25.0},
+    "gerar_cobranca_whatsapp": {"primario": "gpt-4o-mini", "reserva": "gpt-4o", "slo_p95_s": 5.0},
+    "gerar_cobranca_caloteiro": {"primario": "gpt-4o-mini", "reserva": "gpt-4o", "slo_p95_s": 5.0},
+    "pool_mensagens": {"primario": "gpt-4o-mini", "reserva": "gpt-4o", "slo_p95_s": 30.0},
+}
+
+# Taxa de erro acima da qual o modelo é considerado degradado
+TAXA_ERRO_MAXIMA = 0.2
+# Só julga um modelo com pelo menos esta quantidade de chamadas na janela
+AMOSTRAS_MINIMAS = 10
+# Janela das estatísticas: chamadas mais antigas não contam
+JANELA_SEGUNDOS = 300
+# Fração do tráfego que continua indo para o principal degradado, para notar quando ele melhora
+FRACAO_SONDAGEM = 0.1
+
+
+def slo_da_tarefa(tarefa: str, rota: dict) -> float:
+    """SLO de p95 da tarefa; CHURRASCO_SLO_<TAREFA> (em segundos) sobrescreve o padrão."""
+    valor = os.environ.get(f"CHURRASCO_SLO_{tarefa.upper()}")
+    try:
+        return float(valor) if valor else rota["slo_p95_s"]
+    except ValueError:
+        return rota["slo_p95_s"]
+
+
+def roteamento_ativo() -> bool:
+    """CHURRASCO_ROTEAMENTO=0 desliga o roteamento (todas as chamadas usam o modelo configurado)."""
+    return os.environ.get("CHURRASCO_ROTEAMENTO", "1") != "0"
+
+
+# ============================================
+# ROTEADOR
+# ============================================
+
+class RoteadorModelos:
+    """
+    Escolhe o modelo de cada chamada a partir da latência (p50/p95) e da taxa de erro
+    recentes, medidas no processo inteiro por (tarefa, modelo): uma nota fiscal com
+    Vision demora muito mais que uma cobrança curta no mesmo modelo, então cada tarefa
+    só é julgada pelas próprias chamadas.
+    """
+
+    def __init__(self, rotas: dict = ROTAS):
+        self.rotas = rotas
+        self._chamadas: dict = {}  # (tarefa, modelo) -> deque[(instante, latencia_s, erro)]
+        self._sondagens: dict = {}  # tarefa -> contador para a fração de sondagem
+        self._lock = threading.Lock()
+
+    def registrar(self, tarefa: str, modelo: str, latencia_s: float, erro: bool = False):
+        with self._lock:
+            self._chamadas.setdefault((tarefa, modelo), deque(maxlen=500)).append((time.monotonic(), latencia_s, erro))
+
+    def _janela(self, chave: tuple) -> list:
+        chamadas = self._chamadas.get(chave)
+        if not chamadas:
+            return []
+        limite = time.monotonic() - JANELA_SEGUNDOS
+        while chamadas and chamadas[0][0] < limite:
+            chamadas.popleft()
+        return list(chamadas)
+
+    def _saude(self, chave: tuple) -> dict:
+        chamadas = self._janela(chave)
+        latencias = sorted(latencia for _, latencia, erro in chamadas if not erro)
+        erros = sum(1 for _, _, erro in chamadas if erro)
+        return {
+            "chamadas": len(chamadas),
+            "p50_s": round(latencias[int(0.5 * (len(latencias) - 1))], 3) if latencias else 0.0,
+            "p95_s": round(latencias[int(0.95 * (len(latencias) - 1))], 3) if latencias else 0.0,
+            "taxa_erro": round(erros / len(chamadas), 3) if chamadas else 0.0,
+        }
+
+    def _motivo_degradado(self, tarefa: str, modelo: str, slo_p95_s: float) -> str | None:
+        saude = self._saude((tarefa, modelo))
+        if saude["chamadas"] < AMOSTRAS_MINIMAS:
+            return None
+        if saude["taxa_erro"] > TAXA_ERRO_MAXIMA:
+            return "erros_primario"
+        if saude["p95_s"] > slo_p95_s:
+            return "slo_primario"
+        return None
+
+    def escolher(self, tarefa: str, modelo_configurado: str) -> tuple:
+        """Retorna (modelo, motivo) para a chamada da tarefa."""
+        rota = self.rotas.get(tarefa)
+        if rota is None or not roteamento_ativo():
+            return modelo_configurado, "fixo"
+        with self._lock:
+            modelo, motivo = self._rota_atual(tarefa, rota)
+            if motivo in ("primario", "ambos_degradados"):
+                return modelo, motivo
+            contador = self._sondagens.get(tarefa, 0) + 1
+            self._sondagens[tarefa] = contador
+            if contador % round(1 / FRACAO_SONDAGEM) == 0:
+                return rota["primario"], "sondagem"
+            return modelo, motivo
+
+    def _rota_atual(self, tarefa: str, rota: dict) -> tuple:
+        slo = slo_da_tarefa(tarefa, rota)
+        motivo = self._motivo_degradado(tarefa, rota["primario"], slo)
+        if motivo is None:
+            return rota["primario"], "primario"
+        # O reserva também pode estar mal: só troca se ele estiver dentro do SLO
+        if self._motivo_degradado(tarefa, rota["reserva"], slo) is not None:
+            return rota["primario"], "ambos_degradados"
+        return rota["reserva"], motivo
+
+    def modelo_atual(self, tarefa: str, modelo_configurado: str) -> str:
+        """Modelo que a tarefa usa agora (sem contar a sondagem), para consultar caches por modelo."""
+        rota = self.rotas.get(tarefa)
+        if rota is None or not roteamento_ativo():
+            return modelo_configurado
+        with self._lock:
+            return self._rota_atual(tarefa, rota)[0]
+
+    def reserva(self, tarefa: str, modelo_usado: str) -> str | None:
+        """Modelo para tentar de novo depois de uma falha com `modelo_usado`."""
+        rota = self.rotas.get(tarefa)
+        if rota is None or not roteamento_ativo():
+            return None
+        for modelo in (rota["primario"], rota["reserva"]):
+            if modelo != modelo_usado:
+                return modelo
+        return None
+
+    def estatisticas(self) -> dict:
+        """Saúde de cada modelo em cada tarefa e a escolha atual de cada tarefa."""
+        with self._lock:
+            modelos: dict = {}
+            for tarefa, modelo in list(self._chamadas):
+                modelos.setdefault(tarefa, {})[modelo] = self._saude((tarefa, modelo))
+            tarefas = {}
+            for tarefa, rota in self.rotas.items():
+                atual, motivo = self._rota_atual(tarefa, rota)
+                tarefas[tarefa] = {
+                    **rota,
+                    "slo_p95_s": slo_da_tarefa(tarefa, rota),
+                    "atual": atual,
+                    "motivo": motivo,
+                }
+        return {"ativo": roteamento_ativo(), "modelos": modelos, "tarefas": tarefas}
+
+
+# Roteador único do processo
+roteador_ia = RoteadorModelos()
@@ -0,0 +1,93 @@
+import cache_utils
+from cache_utils import CacheRespostas, hash_arquivo
+from utils import chave_cache_nota
+
+
+class Relogio:
+    def __init__(self, agora: float = 1_000_000.0):
+        self.agora = agora
+
+    def __call__(self) -> float:
+        return self.agora
+
+
+def test_item_expira_na_memoria_e_no_disco(tmp_path, monkeypatch):
+    relogio = Relogio()
+    monkeypatch.setattr(cache_utils.time, "time", relogio)
+    caminho = str(tmp_path / "cache.sqlite3")
+    cache = CacheRespostas("teste", ttl_segundos=60, caminho=caminho)
+    cache.guardar("a", {"resumo": "ok"})
+    relogio.agora += 59
+    assert cache.obter("a") == {"resumo": "ok"}
+
+    relogio.agora += 2
+    assert cache.obter("a") is None
+    assert CacheRespostas("teste", ttl_segundos=60, caminho=caminho).obter("a") is None
+    assert cache.estatisticas()["misses"] == 1
+
+
+def test_lru_descarta_o_menos_usado():
+    cache = CacheRespostas("teste", max_itens=2, caminho=None)
+    cache.guardar("a", 1)
+    cache.guardar("b", 2)
+    assert cache.obter("a") == 1
+    cache.guardar("c", 3)
+    assert cache.obter("b") is None
+    assert (cache.obter("a"), cache.obter("c")) == (1, 3)
+
+
+def test_limite_de_bytes_conta_utf8():
+    cache = CacheRespostas("teste", caminho=None, limite_bytes=20)
+    cache.guardar("a", "çççç")  # 6 caracteres em JSON, 10 bytes
+    assert cache.estatisticas()["bytes_memoria"] == 10
+    cache.guardar("b", "ãããã")
+    assert cache.estatisticas()["itens_memoria"] == 2
+    cache.guardar("c", "x")
+    # 10 + 10 + 3 passa de 20: sai o menos usado
+    assert cache.obter("a") is None
+    assert cache.estatisticas()["bytes_memoria"] == 13
+
+
+def test_limite_de_bytes_no_disco(tmp_path, monkeypatch):
+    relogio = Relogio()
+    monkeypatch.setattr(cache_utils.time, "time", relogio)
+    caminho = str(tmp_path / "cache.sqlite3")
+    cache = CacheRespostas("teste", max_itens=1, caminho=caminho, limite_bytes=25)
+    for chave in ("a", "b", "c"):
+        relogio.agora += 1
+        cache.guardar(chave, "0123456789")  # 12 bytes em JSON
+    reaberto = CacheRespostas("teste", caminho=caminho, limite_bytes=25)
+    assert reaberto.obter("a") is None
+    assert (reaberto.obter("b"), reaberto.obter("c")) == ("0123456789", "0123456789")
+
+
+def test_restart_le_do_disco_e_aquece_a_memoria(tmp_path):
+    caminho = str(tmp_path / "cache.sqlite3")
+    CacheRespostas("teste", caminho=caminho).guardar("a", {"itens": [1, 2]})
+
+    novo = CacheRespostas("teste", caminho=caminho)
+    assert novo.obter("a") == {"itens": [1, 2]}
+    assert novo.obter("a") == {"itens": [1, 2]}
+    estatisticas = novo.estatisticas()
+    assert (estatisticas["hits_disco"], estatisticas["hits_memoria"]) == (1, 1)
+    # Outro namespace no mesmo arquivo não enxerga a chave
+    assert CacheRespostas("outro", caminho=caminho).obter("a") is None
+
+
+def test_disco_indisponivel_segue_so_em_memoria(tmp_path):
+    arquivo = tmp_path / "arquivo"
+    arquivo.write_text("")
+    cache = CacheRespostas("teste", caminho=str(arquivo / "cache.sqlite3"))
+    cache.guardar("a", 1)
+    assert cache.obter("a") == 1
+    assert cache.estatisticas()["disco"] is False
+
+
+def test_chave_da_nota_vem_do_conteudo_e_nao_do_nome():
+    foto = b"\xff\xd8\xff" + b"nota" * 100
+    assert hash_arquivo(foto) == hash_arquivo(bytes(foto))
+    assert hash_arquivo(foto) != hash_arquivo(foto + b"\x00")
+    chave = chave_cache_nota(hash_arquivo(foto), "economia", "gpt-4o")
+    assert chave == chave_cache_nota(hash_arquivo(foto), "economia", "gpt-4o")
+    assert chave != chave_cache_nota(hash_arquivo(foto), "detalhe", "gpt-4o")
+    assert chave != chave_cache_nota(hash_arquivo(foto), "economia", "gpt-4o-mini")
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+from cassete_utils import Cassete, GravacaoAusente
+
+PARAMS = {
+    "model": "gpt-4o",
+    "messages": [{"role": "user", "content": "churrasco para 10 pessoas"}],
+    "response_format": {"type": "json_object"},
+}
+
+
+def _resposta(conteudo: str) -> ChatCompletion:
+    return ChatCompletion.model_validate({
+        "id": "chatcmpl-1", "object": "chat.completion", "created": 1700000000, "model": "gpt-4o",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": conteudo}}],
+        "usage": {"prompt_tokens": 20, "completion_tokens": 10, "total_tokens": 30},
+    })
+
+
+def _chunk(texto: str) -> ChatCompletionChunk:
+    return ChatCompletionChunk.model_validate({
+        "id": "chatcmpl-2", "object": "chat.completion.chunk", "created": 1700000000, "model": "gpt-4o",
+        "choices": [{"index": 0, "delta": {"content": texto}, "finish_reason": None}],
+    })
+
+
+@pytest.fixture
+def fita(tmp_path, monkeypatch):
+    monkeypatch.setenv("CHURRASCO_CASSETE_ARQUIVO", str(tmp_path / "fita.jsonl.gz"))
+    monkeypatch.setenv("CHURRASCO_CASSETE_LATENCIA", "zero")
+
+    def modo(nome: str) -> Cassete:
+        monkeypatch.setenv("CHURRASCO_CASSETE", nome)
+        return Cassete()  # fita nova a cada modo, como num restart do app
+
+    return modo
+
+
+def test_gravar_e_reproduzir_devolvem_o_mesmo_resultado(fita):
+    gravada = fita("gravar").chamar(PARAMS, "gerar_lista_churrasco", lambda: _resposta('{"pessoas": 10}'))
+
+    def sem_rede():
+        raise AssertionError("reproduzir não pode chamar a API")
+
+    # Outro modelo para a mesma tarefa (roteador) continua achando a gravação
+    reproduzida = fita("reproduzir").chamar({**PARAMS, "model": "gpt-4o-mini"}, "gerar_lista_churrasco", sem_rede)
+    assert isinstance(reproduzida, ChatCompletion)
+    assert reproduzida.choices[0].message.content == gravada.choices[0].message.content
+    assert reproduzida.usage.total_tokens == 30
+
+
+def test_gravacoes_repetidas_saem_na_ordem(fita):
+    gravador = fita("gravar")
+    for conteudo in ("primeira", "segunda"):
+        gravador.chamar(PARAMS, "gerar_lista_churrasco", lambda: _resposta(conteudo))
+
+    reprodutor = fita("reproduzir")
+    conteudos = [
+        reprodutor.chamar(PARAMS, "gerar_lista_churrasco", None).choices[0].message.content for _ in range(3)
+    ]
+    assert conteudos == ["primeira", "segunda", "segunda"]
+
+
+def test_impressao_desconhecida_falha_no_modo_reproduzir(fita):
+    fita("gravar").chamar(PARAMS, "gerar_lista_churrasco", lambda: _resposta("{}"))
+    reprodutor = fita("reproduzir")
+    outra = {**PARAMS, "messages": [{"role": "user", "content": "churrasco para 20 pessoas"}]}
+    with pytest.raises(GravacaoAusente):
+        reprodutor.chamar(outra, "gerar_lista_churrasco", None)
+    # A mesma requisição de outra função também é outra impressão digital
+    with pytest.raises(GravacaoAusente):
+        reprodutor.chamar(PARAMS, "gerar_cobranca_whatsapp", None)
+    assert reprodutor.estatisticas()["ausentes"] == 2
+
+
+def test_stream_e_async(fita):
+    params_stream = {**PARAMS, "stream": True}
+    gravador = fita("gravar")
+    assert [c.choices[0].delta.content for c in gravador.chamar(
+        params_stream, "gerar_cobranca_whatsapp", lambda: iter([_chunk("Fala "), _chunk("Zé!")])
+    )] == ["Fala ", "Zé!"]
+
+    async def chamada():
+        return _resposta("async")
+
+    asyncio.run(gravador.chamar_async(PARAMS, "extrair_itens_nota", chamada))
+
+    reprodutor = fita("reproduzir")
+    chunks = list(reprodutor.chamar(params_stream, "gerar_cobranca_whatsapp", None))
+    assert all(isinstance(c, ChatCompletionChunk) for c in chunks)
+    assert "".join(c.choices[0].delta.content for c in chunks) == "Fala Zé!"
+    resposta = asyncio.run(reprodutor.chamar_async(PARAMS, "extrair_itens_nota", None))
+    assert resposta.choices[0].message.content == "async"
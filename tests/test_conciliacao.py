@@ -0,0 +1,126 @@
+import io
+from datetime import date
+
+from conciliacao_utils import LivroCobrancas, ler_extrato, conciliar
+
+OFX_SGML = """OFXHEADER:100
+DATA:OFXSGML
+
+<OFX>
+<BANKMSGSRSV1><STMTTRNRS><STMTRS>
+<BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>CREDIT
+<DTPOSTED>20240510120000[-3:BRT]
+<TRNAMT>45.50
+<FITID>111
+<MEMO>PIX RECEBIDO CHABC123XYZ9
+</STMTTRN>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20240511
+<TRNAMT>-10,00
+<FITID>112
+<NAME>PADARIA
+</STMTTRN>
+</BANKTRANLIST>
+</STMTRS></STMTTRNRS></BANKMSGSRSV1>
+</OFX>
+"""
+
+OFX_MINIFICADO = (
+    '<?xml version="1.0"?><OFX><BANKTRANLIST>'
+    "<STMTTRN><DTPOSTED>20240510</DTPOSTED><TRNAMT>45.50</TRNAMT><FITID>1</FITID>"
+    "<MEMO>PIX A</MEMO></STMTTRN>"
+    "<STMTTRN><DTPOSTED>20240511</DTPOSTED><TRNAMT>30.00</TRNAMT><FITID>2</FITID>"
+    "<MEMO>PIX B</MEMO></STMTTRN>"
+    "<STMTTRN><DTPOSTED>20240512</DTPOSTED><TRNAMT>12.25</TRNAMT><FITID>3</FITID>"
+    "<MEMO>PIX C</MEMO></STMTTRN>"
+    "</BANKTRANLIST></OFX>"
+)
+
+
+def test_csv_com_ponto_e_virgula_e_valor_brasileiro():
+    extrato = "Data;Histórico;Valor;Documento\n10/05/2024;PIX RECEBIDO JOAO;1.234,56;A1\n11/05/2024;linha ruim;;A2\n"
+    lancamentos = list(ler_extrato(extrato.encode("utf-8")))
+    assert lancamentos == [
+        {"id": "A1", "data": date(2024, 5, 10), "valor_centavos": 123456, "descricao": "PIX RECEBIDO JOAO"}
+    ]
+
+
+def test_csv_com_virgula_sem_coluna_de_id():
+    extrato = "date,description,amount\n2024-05-10,Pix Maria,45.5\n"
+    lancamentos = list(ler_extrato(extrato.encode("utf-8"), formato="csv"))
+    assert lancamentos == [
+        {"id": "linha-2", "data": date(2024, 5, 10), "valor_centavos": 4550, "descricao": "Pix Maria"}
+    ]
+
+
+def test_ofx_sgml_uma_tag_por_linha():
+    lancamentos = list(ler_extrato(OFX_SGML.encode("utf-8")))
+    assert [(l["id"], l["data"], l["valor_centavos"]) for l in lancamentos] == [
+        ("111", date(2024, 5, 10), 4550),
+        ("112", date(2024, 5, 11), -1000),
+    ]
+    assert lancamentos[0]["descricao"] == "PIX RECEBIDO CHABC123XYZ9"
+
+
+def test_ofx_xml_minificado_numa_linha_so():
+    lancamentos = list(ler_extrato(OFX_MINIFICADO.encode("utf-8")))
+    assert [(l["id"], l["valor_centavos"], l["descricao"]) for l in lancamentos] == [
+        ("1", 4550, "PIX A"),
+        ("2", 3000, "PIX B"),
+        ("3", 1225, "PIX C"),
+    ]
+
+
+def test_ofx_com_valor_quebrado_entre_linhas():
+    quebrado = OFX_MINIFICADO.replace("<TRNAMT>30.00", "<TRNAMT>\n30.00\n").replace("</STMTTRN>", "</STMTTRN>\n")
+    lancamentos = list(ler_extrato(io.StringIO(quebrado), formato="ofx"))
+    assert [l["valor_centavos"] for l in lancamentos] == [4550, 3000, 1225]
+
+
+def test_txid_colado_no_historico():
+    livro = LivroCobrancas(None)
+    txid = livro.registrar("chave@pix.com", "Ana", 45.5)
+    lancamentos = [{"id": "9", "data": date.today(), "valor_centavos": 9999, "descricao": f"PIX{txid}ANA"}]
+    resultado = conciliar(lancamentos, livro.em_aberto())
+    assert [(c["txid"], c["via"]) for c in resultado["conciliados"]] == [(txid, "txid")]
+
+
+def test_valor_novo_substitui_a_cobranca_anterior():
+    livro = LivroCobrancas(None)
+    antigo = livro.registrar("chave@pix.com", "Ana", 45.5)
+    assert livro.registrar("chave@pix.com", "Ana", 45.5) == antigo
+    novo = livro.registrar("chave@pix.com", "Ana", 50.0)
+    assert novo != antigo
+    assert [c["txid"] for c in livro.em_aberto()] == [novo]
+    substituida = {c["txid"]: c for c in livro.em_aberto(incluir_substituidas=True)}[antigo]
+    assert substituida["substituida_por"] == novo
+    assert livro.estatisticas() == {"em_aberto": 1, "pagas": 0, "substituidas": 1}
+
+    # O QR antigo ainda é reconhecido pelo txid, mas não casa por valor e data
+    lancamentos = [
+        {"id": "1", "data": date.today(), "valor_centavos": 4550, "descricao": f"PIX {antigo}"},
+        {"id": "2", "data": date.today(), "valor_centavos": 4550, "descricao": "PIX SEM TXID"},
+    ]
+    resultado = conciliar(lancamentos, livro.em_aberto(incluir_substituidas=True))
+    assert [c["txid"] for c in resultado["conciliados"]] == [antigo]
+    assert [l["id"] for l in resultado["nao_identificados"]] == ["2"]
+    assert [c["txid"] for c in resultado["em_aberto"]] == [novo]
+
+
+def test_cobranca_de_outro_evento_nao_e_substituida():
+    livro = LivroCobrancas(None)
+    churrasco_10 = livro.registrar("chave@pix.com", "Ana", 30.0, "Churrasco 10/10", evento="churras_10")
+    churrasco_17 = livro.registrar("chave@pix.com", "Ana", 50.0, "Churrasco 17/10", evento="churras_17")
+    assert sorted(c["txid"] for c in livro.em_aberto()) == sorted([churrasco_10, churrasco_17])
+
+    # A dívida antiga ainda casa por valor e data
+    lancamentos = [{"id": "1", "data": date.today(), "valor_centavos": 3000, "descricao": "PIX ANA"}]
+    resultado = conciliar(lancamentos, livro.em_aberto(incluir_substituidas=True))
+    assert [(c["txid"], c["via"]) for c in resultado["conciliados"]] == [(churrasco_10, "valor_data")]
+
+    # Dentro do mesmo evento, o valor novo continua substituindo o anterior
+    corrigido = livro.registrar("chave@pix.com", "Ana", 55.0, "Churrasco 17/10", evento="churras_17")
+    assert sorted(c["txid"] for c in livro.em_aberto()) == sorted([churrasco_10, corrigido])
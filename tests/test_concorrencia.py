@@ -0,0 +1,162 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from concorrencia_utils import SemaforoGlobal, VooUnico
+
+
+class Contador:
+    """Quantas tarefas estão dentro do semáforo agora e o máximo já visto."""
+
+    def __init__(self):
+        self.agora = 0
+        self.maximo = 0
+        self._lock = threading.Lock()
+
+    def entrar(self):
+        with self._lock:
+            self.agora += 1
+            self.maximo = max(self.maximo, self.agora)
+
+    def sair(self):
+        with self._lock:
+            self.agora -= 1
+
+
+def test_semaforo_limita_threads_com_loops_diferentes():
+    semaforo = SemaforoGlobal(2)
+    contador = Contador()
+
+    async def chamada():
+        async with semaforo:
+            contador.entrar()
+            await asyncio.sleep(0.01)
+            contador.sair()
+
+    async def sessao():
+        await asyncio.gather(*(chamada() for _ in range(3)))
+
+    # Uma thread por sessão do Streamlit, cada uma com seu event loop
+    threads = [threading.Thread(target=asyncio.run, args=(sessao(),)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert contador.maximo == 2
+    assert semaforo.estatisticas() == {"limite": 2, "em_uso": 0, "na_fila": 0}
+
+
+def test_espera_cancelada_nao_consome_vaga():
+    semaforo = SemaforoGlobal(1)
+
+    async def cenario():
+        await semaforo.adquirir()
+        esperando = asyncio.ensure_future(semaforo.adquirir())
+        await asyncio.sleep(0)
+        assert semaforo.estatisticas()["na_fila"] == 1
+        esperando.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await esperando
+        semaforo.liberar()
+        # A vaga volta livre, sem ficar reservada para a espera cancelada
+        await asyncio.wait_for(semaforo.adquirir(), timeout=1)
+        semaforo.liberar()
+
+    asyncio.run(cenario())
+    assert semaforo.estatisticas() == {"limite": 1, "em_uso": 0, "na_fila": 0}
+
+
+def _esperar_passageiros(voo_unico: VooUnico, quantidade: int):
+    """Segura a líder até todas as outras chamadas estarem esperando por ela."""
+    limite = time.monotonic() + 5
+    while voo_unico.estatisticas()["aguardando"] < quantidade:
+        assert time.monotonic() < limite, "as chamadas não se juntaram ao voo"
+        time.sleep(0.001)
+
+
+def _em_threads(quantidade: int, alvo) -> list:
+    resultados = [None] * quantidade
+
+    def rodar(indice):
+        try:
+            resultados[indice] = alvo()
+        except Exception as e:
+            resultados[indice] = e
+
+    threads = [threading.Thread(target=rodar, args=(i,)) for i in range(quantidade)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+    return resultados
+
+
+def test_chamadas_identicas_viram_uma_so():
+    voo_unico = VooUnico()
+    chamadas = []
+
+    def consultar_ia():
+        chamadas.append(1)
+        _esperar_passageiros(voo_unico, 4)
+        return {"itens": ["picanha"]}
+
+    resultados = _em_threads(5, lambda: voo_unico.executar("lista", consultar_ia))
+
+    assert len(chamadas) == 1
+    assert resultados == [{"itens": ["picanha"]}] * 5
+    # Cada uma recebe a sua cópia: mexer numa não altera as outras
+    assert len({id(resultado) for resultado in resultados}) == 5
+    assert voo_unico.estatisticas() == {"chamadas": 5, "coalescidas": 4, "em_andamento": 0, "aguardando": 0}
+
+
+def test_erro_da_lider_chega_a_quem_esperava():
+    voo_unico = VooUnico()
+    chamadas = []
+
+    def consultar_ia():
+        chamadas.append(1)
+        _esperar_passageiros(voo_unico, 2)
+        raise ValueError("Resposta JSON inválida")
+
+    resultados = _em_threads(3, lambda: voo_unico.executar("lista", consultar_ia))
+
+    assert len(chamadas) == 1
+    assert [type(resultado) for resultado in resultados] == [ValueError] * 3
+    assert {str(resultado) for resultado in resultados} == {"Resposta JSON inválida"}
+
+
+def test_voo_entre_event_loops_e_lider_cancelada():
+    voo_unico = VooUnico()
+    chamadas = []
+    primeira_no_ar = threading.Event()
+
+    async def consultar_ia():
+        chamadas.append(1)
+        if len(chamadas) == 1:
+            primeira_no_ar.set()
+            await asyncio.sleep(10)  # cancelada pelo "rerun" abaixo
+        return "cobrança"
+
+    async def lider():
+        tarefa = asyncio.ensure_future(voo_unico.executar_async("cobranca", consultar_ia))
+        await asyncio.get_running_loop().run_in_executor(None, _esperar_passageiros, voo_unico, 1)
+        tarefa.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await tarefa
+
+    async def seguidora():
+        await asyncio.get_running_loop().run_in_executor(None, primeira_no_ar.wait, 5)
+        return await voo_unico.executar_async("cobranca", consultar_ia)
+
+    resultado = {}
+    thread = threading.Thread(target=lambda: resultado.setdefault("valor", asyncio.run(seguidora())))
+    thread.start()
+    asyncio.run(lider())
+    thread.join(timeout=5)
+
+    # A seguidora não herda o cancelamento: assume o voo e refaz a chamada
+    assert resultado["valor"] == "cobrança"
+    assert len(chamadas) == 2
@@ -0,0 +1,80 @@
+from types import SimpleNamespace
+
+import utils
+from esquemas_utils import converter_numero, validar_itens_nota, validar_lista
+
+
+def _resposta(conteudo: str):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=conteudo), finish_reason="stop")])
+
+
+def test_precos_em_formatos_brasileiros():
+    assert converter_numero("R$ 1.234,56") == 1234.56
+    assert converter_numero("1,234.56") == 1234.56
+    assert converter_numero("89,90") == 89.9
+    assert converter_numero(True) is None
+    assert converter_numero("grátis") is None
+
+
+def test_tipos_errados_sao_convertidos_ou_descartados():
+    lista, faltando = validar_lista({
+        "pessoas": "12 pessoas",
+        "resumo": None,
+        "carnes": [{"item": "Picanha", "preco_estimado": "R$ 150,00"}, {"quantidade": "2kg"}, "Linguiça"],
+        "bebidas": [{"item": "Cerveja", "preco_estimado": -5, "alcoolica": "sim"}],
+        "acompanhamentos": "farofa",
+        "carvao_gelo": [],
+        "total_estimado": 9999,
+    })
+    assert lista["pessoas"] == 12
+    assert lista["resumo"] == "Lista pronta!"
+    assert [item["item"] for item in lista["carnes"]] == ["Picanha", "Linguiça"]
+    assert lista["carnes"][0]["preco_estimado"] == 150.0
+    assert lista["bebidas"][0] == {"item": "Cerveja", "quantidade": "", "preco_estimado": 0.0, "alcoolica": True}
+    # Categoria com tipo errado conta como faltando; o total é sempre recalculado
+    assert faltando == ["acompanhamentos"]
+    assert lista["total_estimado"] == 150.0
+
+
+def test_alcoolica_so_por_palavra_inteira():
+    itens, sem_preco = validar_itens_nota([
+        {"nome": "Ginger Ale", "preco": 8},
+        {"nome": "Suco Original", "preco": 7},
+        {"nome": "Pao de Alho Original", "preco": 12},
+        {"nome": "Gin Tanqueray", "preco": 120},
+        {"nome": "CACHAÇA 51", "preco": 15},
+        {"nome": "Cervejas Lata", "preco": "R$ 45,90"},
+        {"nome": "Carvão", "preco": None},
+    ])
+    assert {item["nome"]: item["alcoolica"] for item in itens} == {
+        "Ginger Ale": False,
+        "Suco Original": False,
+        "Pao de Alho Original": False,
+        "Gin Tanqueray": True,
+        "CACHAÇA 51": True,
+        "Cervejas Lata": True,
+    }
+    assert sem_preco == ["Carvão"]
+
+
+def test_categoria_faltando_e_pedida_sozinha(monkeypatch):
+    pedidos = []
+
+    def criar_resposta(params, funcao, rota=None):
+        pedidos.append(params["messages"][-1]["content"])
+        return _resposta('{"carvao_gelo": [{"item": "Carvão", "quantidade": "5kg", "preco_estimado": 25}]}')
+
+    monkeypatch.setattr(utils, "_criar_resposta", criar_resposta)
+    cortada = {
+        "pessoas": 10,
+        "carnes": [{"item": "Picanha", "quantidade": "2kg", "preco_estimado": 150}],
+        "bebidas": [],
+        "acompanhamentos": [],
+    }
+    lista = utils._completar_lista(cortada, "churrasco para 10 pessoas")
+
+    assert len(pedidos) == 1
+    assert "Complete APENAS estas categorias: carvao_gelo." in pedidos[0]
+    assert lista["carvao_gelo"] == [{"item": "Carvão", "quantidade": "5kg", "preco_estimado": 25.0}]
+    assert lista["carnes"][0]["item"] == "Picanha"
+    assert lista["total_estimado"] == 175.0
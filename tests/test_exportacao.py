@@ -0,0 +1,78 @@
+import csv
+import io
+import re
+import zipfile
+
+import pytest
+from PIL import Image
+
+from exportacao_utils import exportar_cobrancas
+from pix_utils import gerar_payload_pix
+from qrcode_utils import calcular_matriz, desenhar_png
+
+PESSOAS = {"João da Silva": 45.5, "Márcia (Tia)": 30.0, "Zé": 12.25}
+
+
+@pytest.fixture(autouse=True)
+def um_processo(monkeypatch):
+    monkeypatch.setenv("CHURRASCO_EXPORTACAO_PROCESSOS", "1")
+
+
+def _cobrancas() -> list:
+    return [
+        {
+            "pessoa": pessoa, "valor": valor, "txid": f"TX{i}",
+            "payload": gerar_payload_pix("chave@pix.com", "Churrasqueiro", "Sao Paulo", valor, txid=f"TX{i}"),
+            "mensagem": f"Fala {pessoa}! 🍺 Manda o Pix.",
+        }
+        for i, (pessoa, valor) in enumerate(PESSOAS.items(), start=1)
+    ]
+
+
+def test_zip_tem_um_png_por_pessoa_e_o_manifesto():
+    cobrancas = _cobrancas()
+    destino = io.BytesIO()
+    relatorio = exportar_cobrancas(cobrancas, destino, "zip", "png")
+    assert relatorio["cobrancas"] == 3
+    assert relatorio["bytes"] == len(destino.getvalue())
+
+    with zipfile.ZipFile(destino) as arquivo_zip:
+        nomes = arquivo_zip.namelist()
+        assert sorted(nomes) == [
+            "cobrancas.csv",
+            "qrcodes/001_joao_da_silva.png",
+            "qrcodes/002_marcia_tia.png",
+            "qrcodes/003_ze.png",
+        ]
+        manifesto = list(csv.DictReader(io.StringIO(arquivo_zip.read("cobrancas.csv").decode("utf-8-sig"))))
+        for linha, cobranca in zip(manifesto, cobrancas):
+            assert (linha["pessoa"], linha["pix_copia_cola"]) == (cobranca["pessoa"], cobranca["payload"])
+            png = arquivo_zip.read(linha["arquivo_qr"])
+            assert Image.open(io.BytesIO(png)).format == "PNG"
+            assert png == desenhar_png(calcular_matriz(cobranca["payload"]))
+    assert [linha["valor"] for linha in manifesto] == ["45.50", "30.00", "12.25"]
+
+
+def test_pdf_tem_uma_pagina_por_pessoa(tmp_path):
+    destino = tmp_path / "cobrancas.pdf"
+    relatorio = exportar_cobrancas(_cobrancas(), str(destino), "pdf")
+    pdf = destino.read_bytes()
+    assert relatorio["bytes"] == len(pdf)
+    assert pdf.startswith(b"%PDF-1.4") and pdf.endswith(b"%%EOF\n")
+
+    assert len(re.findall(rb"/Type /Page\b(?!s)", pdf)) == 3
+    assert re.search(rb"/Type /Pages /Kids \[[^\]]*\] /Count 3 >>", pdf)
+
+    # Cada entrada do xref aponta para o objeto certo
+    inicio_xref = int(re.search(rb"startxref\n(\d+)\n", pdf).group(1))
+    assert pdf[inicio_xref:].startswith(b"xref\n")
+    offsets = re.findall(rb"(\d{10}) 00000 n ", pdf[inicio_xref:])
+    for numero, offset in enumerate(offsets, start=1):
+        assert pdf[int(offset):].startswith(f"{numero} 0 obj\n".encode())
+
+
+def test_formato_desconhecido():
+    with pytest.raises(ValueError):
+        exportar_cobrancas(_cobrancas(), io.BytesIO(), "docx")
+    with pytest.raises(ValueError):
+        exportar_cobrancas(_cobrancas(), io.BytesIO(), "zip", "jpg")
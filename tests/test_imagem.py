@@ -0,0 +1,35 @@
+import io
+
+from PIL import Image, ImageDraw
+
+from imagem_utils import preparar_nota
+
+
+def _foto(tamanho: tuple, papel: tuple) -> bytes:
+    """Mesa escura com o papel claro em `papel` (caixa) e algumas linhas de texto."""
+    imagem = Image.new("L", tamanho, 40)
+    desenho = ImageDraw.Draw(imagem)
+    desenho.rectangle(papel, fill=235)
+    esquerda, topo, direita, base = papel
+    for y in range(topo + 20, base - 20, 30):
+        desenho.line((esquerda + 15, y, direita - 15, y), fill=60, width=3)
+    saida = io.BytesIO()
+    imagem.save(saida, format="JPEG", quality=90)
+    return saida.getvalue()
+
+
+def test_cupom_comprido_numa_foto_larga_vai_em_faixas():
+    # Foto 4:3 (deitada), mas o papel recortado tem proporção 3:1
+    conteudo = _foto((1600, 1200), (600, 50, 960, 1150))
+    imagens, relatorio = preparar_nota(conteudo)
+    assert relatorio["recorte"] is not None
+    assert relatorio["faixas"] == len(imagens) > 1
+
+
+def test_nota_comum_numa_foto_alta_vai_inteira():
+    # Foto 1:3 (em pé e estreita), mas o papel recortado é quase quadrado
+    conteudo = _foto((600, 1800), (50, 600, 550, 1200))
+    imagens, relatorio = preparar_nota(conteudo)
+    assert relatorio["recorte"] is not None
+    assert "faixas" not in relatorio
+    assert len(imagens) == 1
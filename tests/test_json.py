@@ -0,0 +1,36 @@
+import pytest
+
+from json_utils import ParserCamposJson, reparar_json
+
+
+def test_objeto_cortado_no_meio_aproveita_os_campos_completos():
+    cortado = '{"resumo": "Churras", "carnes": [{"item": "Picanha", "quantidade": "2kg"}], "bebidas": [{"item": "Cer'
+    dados, reparado = reparar_json(cortado)
+    assert reparado
+    assert dados["resumo"] == "Churras"
+    assert dados["carnes"] == [{"item": "Picanha", "quantidade": "2kg"}]
+    # O campo cortado some e volta como categoria faltando na validação
+    assert "bebidas" not in dados
+
+
+def test_cercas_markdown_sao_removidas():
+    dados, reparado = reparar_json('```json\n{"pessoas": 10}\n```')
+    assert (dados, reparado) == ({"pessoas": 10}, False)
+
+
+def test_json_que_nao_e_objeto_levanta_erro():
+    for texto in ("[1, 2]", '"texto"', "null", "42"):
+        with pytest.raises(ValueError):
+            reparar_json(texto)
+
+
+def test_sem_nada_aproveitavel_levanta_erro():
+    with pytest.raises(ValueError):
+        reparar_json('{"resumo": "sem fim')
+
+
+def test_parser_em_streaming_entrega_cada_campo_ao_fechar():
+    parser = ParserCamposJson()
+    assert parser.alimentar('{"resumo": "oi", "carnes": [{"item": "Pi') == [("resumo", "oi")]
+    assert parser.alimentar('canha"}], "pessoas": 4') == [("carnes", [{"item": "Picanha"}])]
+    assert parser.alimentar("}") == [("pessoas", 4)]
@@ -0,0 +1,79 @@
+import types
+
+import pytest
+
+from limite_utils import LimitadorTaxa, _Balde, limites_dos_headers, segundos_retry_after
+
+CHAVE = ("gpt-4o", "credencial")
+
+
+@pytest.fixture(autouse=True)
+def sem_limites_fixos(monkeypatch):
+    monkeypatch.delenv("CHURRASCO_LIMITE_RPM", raising=False)
+    monkeypatch.delenv("CHURRASCO_LIMITE_TPM", raising=False)
+
+
+def test_balde_enche_com_o_tempo_e_respeita_a_fila():
+    balde = _Balde(60, 1.0)
+    balde.atualizado_em = 100.0
+    assert balde.reservar(60, agora=100.0) == 0.0
+    # Sem saldo: a próxima espera 1 s e a seguinte espera atrás dela
+    assert balde.reservar(1, agora=100.0) == pytest.approx(1.0)
+    assert balde.reservar(1, agora=100.0) == pytest.approx(2.0)
+    # Dez segundos depois o balde repôs 10 unidades (e pagou as 2 devidas)
+    assert balde.reservar(8, agora=110.0) == 0.0
+    assert balde.nivel == pytest.approx(0.0)
+    # Nunca passa da capacidade, por mais tempo que fique parado
+    balde.reservar(0, agora=10_000.0)
+    assert balde.nivel == 60
+
+
+def test_sem_limite_conhecido_ninguem_espera():
+    limitador = LimitadorTaxa()
+    assert all(limitador.aguardar(CHAVE, 100_000) == 0.0 for _ in range(100))
+    assert limitador.estatisticas()["gpt-4o/credencial"]["origem_limites"] == "desconhecido"
+
+
+def test_limites_aprendidos_dos_headers():
+    limitador = LimitadorTaxa()
+    headers = {
+        "x-ratelimit-limit-requests": "60",
+        "x-ratelimit-remaining-requests": "0",
+        "x-ratelimit-limit-tokens": "30000",
+        "x-ratelimit-remaining-tokens": "29000",
+    }
+    assert limites_dos_headers(headers) == {
+        "rpm": 60, "tpm": 30000, "requisicoes_restantes": 0, "tokens_restantes": 29000,
+    }
+    assert limitador.atualizar_limites(CHAVE, headers) is True
+    assert limitador.atualizar_limites(CHAVE, headers) is False
+
+    estatisticas = limitador.estatisticas()["gpt-4o/credencial"]
+    assert (estatisticas["rpm"], estatisticas["tpm"], estatisticas["origem_limites"]) == (60, 30000, "api")
+    # A API disse que não sobra nenhuma requisição: a próxima espera ~1 s (60 por minuto)
+    assert limitador._reservar(CHAVE, 10) == pytest.approx(1.0, abs=0.05)
+
+
+def test_limite_configurado_tem_prioridade(monkeypatch):
+    monkeypatch.setenv("CHURRASCO_LIMITE_RPM", "10")
+    limitador = LimitadorTaxa()
+    assert limitador.atualizar_limites(CHAVE, {"x-ratelimit-limit-requests": "5000"}) is False
+    assert limitador.estatisticas()["gpt-4o/credencial"]["rpm"] == 10
+
+
+def test_retry_after_em_ms_segundos_ou_data():
+    def erro(headers):
+        return types.SimpleNamespace(response=types.SimpleNamespace(headers=headers))
+
+    assert segundos_retry_after(erro({"retry-after-ms": "1500"})) == 1.5
+    assert segundos_retry_after(erro({"retry-after": "3"})) == 3.0
+    assert segundos_retry_after(erro({"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"})) == 0.0
+    assert segundos_retry_after(erro({})) is None
+    assert segundos_retry_after(ValueError()) is None
+
+
+def test_pausa_do_429_segura_todo_mundo():
+    limitador = LimitadorTaxa()
+    limitador.pausar(CHAVE, 2.0)
+    assert limitador._reservar(CHAVE, 10) == pytest.approx(2.0, abs=0.05)
+    assert limitador._reservar(("gpt-4o-mini", "credencial"), 10) == 0.0
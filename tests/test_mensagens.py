@@ -0,0 +1,42 @@
+import pytest
+
+from mensagens_utils import PERSONAS, compor_caloteiro, compor_cobranca, preencher_modelo
+
+PIX = "churrasco.do.ze@pix.com"
+VALORES = (0.5, 45.5, 85.0, 123.456, 1999.99)
+
+
+@pytest.mark.parametrize("persona", sorted(PERSONAS))
+def test_cobranca_traz_o_valor_exato_e_a_chave(persona):
+    for valor in VALORES:
+        for bebeu in (True, False):
+            for semente in range(20):
+                texto = compor_cobranca("Zé", valor, PIX, bebeu, ["Picanha", "Linguiça"], persona, semente)
+                assert f"R$ {valor:.2f}" in texto
+                assert texto.endswith(f"\n💸 Pix: {PIX}")
+                assert "{" not in texto and "}" not in texto
+
+
+@pytest.mark.parametrize("persona", sorted(PERSONAS))
+def test_caloteiro_traz_o_valor_exato_e_a_chave(persona):
+    for dias in (1, 4, 30):
+        for semente in range(20):
+            texto = compor_caloteiro("Zé", 85.0, dias, PIX, persona, semente)
+            assert "R$ 85.00" in texto
+            assert texto.endswith(f"\n💸 Pix: {PIX}")
+            assert "{" not in texto and "}" not in texto
+    assert "Pix" not in compor_caloteiro("Zé", 85.0, 3, None)
+
+
+def test_mesma_semente_mesmo_texto():
+    assert compor_cobranca("Zé", 85.0, PIX, semente=1) == compor_cobranca("Zé", 85.0, PIX, semente=1)
+    assert len({compor_cobranca("Zé", 85.0, PIX, semente=s) for s in range(10)}) > 1
+
+
+def test_modelo_do_pool_sem_o_valor_exato_e_reprovado():
+    assert preencher_modelo("Fala {nome}! São {valor}. Pix: {pix}", "Zé", 85.0, PIX) == (
+        f"Fala Zé! São R$ 85.00. Pix: {PIX}"
+    )
+    # Sem a lacuna do valor o texto final não traz "R$ 85.00" e o modelo é descartado
+    assert preencher_modelo("Fala {nome}! Manda o Pix. {pix}", "Zé", 85.0, PIX) is None
+    assert preencher_modelo("Fala {nome}! São {valor}.", "Zé", 85.0, None, 3) == "Fala Zé! São R$ 85.00."
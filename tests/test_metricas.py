@@ -0,0 +1,85 @@
+import json
+import re
+
+import pytest
+
+from metricas_utils import Histograma, MetricasIA, estimar_custo
+
+# nome{rotulo="valor",...} número
+AMOSTRA = re.compile(r'^([a-z_]+)\{([a-z_]+="[^"]*"(?:,[a-z_]+="[^"]*")*)\} (-?[0-9.e+-]+)$')
+
+
+def _metricas() -> MetricasIA:
+    metricas = MetricasIA()
+    for latencia in (0.3, 0.8, 1.5, 3.0, 20.0):
+        metricas.registrar_chamada("gerar_lista_churrasco", "gpt-4o", latencia, tokens_entrada=1000, tokens_saida=500)
+    metricas.registrar_chamada("gerar_lista_churrasco", "gpt-4o", 0.5, tentativas=3, erro=True)
+    metricas.registrar_cache("gerar_lista_churrasco", True)
+    metricas.registrar_cache("gerar_lista_churrasco", False)
+    metricas.registrar_local("gerar_cobranca_whatsapp")
+    metricas.registrar_rota("gerar_lista_churrasco", "gpt-4o-mini", "slo_primario")
+    return metricas
+
+
+def test_percentis_das_amostras_recentes():
+    histograma = Histograma()
+    for valor in range(1, 101):
+        histograma.observar(float(valor))
+    assert histograma.percentil(0.5) == 50.0
+    assert histograma.percentil(0.95) == 95.0
+    assert histograma.resumo() == {"contagem": 100, "media": 50.5, "p50": 50.0, "p95": 95.0, "max": 100.0}
+    assert Histograma().resumo()["p95"] == 0.0
+
+
+def test_buckets_sao_cumulativos():
+    histograma = Histograma(buckets=(1, 2, 4))
+    for valor in (0.5, 1.5, 3.0, 10.0):
+        histograma.observar(valor)
+    assert histograma.contagens == [1, 2, 3]
+    assert histograma.total == 4
+
+
+def test_snapshot_soma_contadores_e_custo():
+    funcao = _metricas().snapshot()["funcoes"]["gerar_lista_churrasco"]
+    assert (funcao["chamadas"], funcao["erros"], funcao["retries"]) == (6, 1, 2)
+    assert (funcao["cache_hits"], funcao["cache_misses"]) == (1, 1)
+    assert funcao["custo_usd"] == pytest.approx(5 * estimar_custo("gpt-4o", 1000, 500))
+    assert funcao["latencia_s"]["p50"] == 0.8
+    assert funcao["rotas"] == {"gpt-4o-mini/slo_primario": 1}
+    assert estimar_custo("modelo-desconhecido", 1000, 1000) == 0.0
+    json.loads(_metricas().exportar_json())
+
+
+def test_formato_texto_do_prometheus():
+    texto = _metricas().exportar_prometheus()
+    assert texto.endswith("\n")
+
+    tipos, amostras = {}, []
+    for linha in texto.splitlines():
+        if linha.startswith("# HELP "):
+            continue
+        if linha.startswith("# TYPE "):
+            _, _, nome, tipo = linha.split(" ")
+            assert tipo in ("counter", "histogram")
+            tipos[nome] = tipo
+            continue
+        encontrada = AMOSTRA.match(linha)
+        assert encontrada, f"linha fora do formato: {linha!r}"
+        nome, rotulos, valor = encontrada.groups()
+        familia = re.sub(r"_(bucket|sum|count)$", "", nome) if nome not in tipos else nome
+        assert familia in tipos, f"amostra antes do # TYPE: {linha!r}"
+        amostras.append((nome, dict(re.findall(r'([a-z_]+)="([^"]*)"', rotulos)), float(valor)))
+
+    assert tipos["churrasco_ia_chamadas_total"] == "counter"
+    assert tipos["churrasco_ia_latencia_segundos"] == "histogram"
+    assert ("churrasco_ia_chamadas_total", {"funcao": "gerar_lista_churrasco"}, 6.0) in amostras
+    assert ("churrasco_ia_respostas_locais_total", {"funcao": "gerar_cobranca_whatsapp"}, 1.0) in amostras
+
+    buckets = [
+        (rotulos["le"], valor) for nome, rotulos, valor in amostras
+        if nome == "churrasco_ia_latencia_segundos_bucket" and rotulos["funcao"] == "gerar_lista_churrasco"
+    ]
+    contagens = [valor for _, valor in buckets]
+    assert contagens == sorted(contagens)
+    assert buckets[-1] == ("+Inf", 6.0)
+    assert ("churrasco_ia_latencia_segundos_count", {"funcao": "gerar_lista_churrasco"}, 6.0) in amostras
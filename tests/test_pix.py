@@ -0,0 +1,32 @@
+import types
+
+import pytest
+
+from pix_utils import (
+    PayloadPixInvalido, gerar_payload_pix, decodificar_payload_pix, iterar_tlv, textos_cortados, validar_payload_pix
+)
+
+
+def test_textos_longos_sao_avisados_e_cortados():
+    cidade = "Sao Jose dos Campos"
+    assert textos_cortados("Churrasqueiro Master", cidade) == [
+        "cidade com 19 caracteres vai como 'Sao Jose dos Ca' (máximo 15)"
+    ]
+    payload = gerar_payload_pix("chave@pix.com", "Churrasqueiro Master", cidade, 10.0)
+    assert validar_payload_pix(payload) == []
+    assert decodificar_payload_pix(payload)["60"] == "SAO JOSE DOS CA"
+
+
+def test_nome_em_branco_nao_vira_campo_vazio():
+    with pytest.raises(PayloadPixInvalido):
+        gerar_payload_pix("chave@pix.com", "   ", "Sao Paulo", 10.0)
+
+
+def test_iterar_tlv_le_um_campo_por_vez():
+    campos = iterar_tlv("0002010104abcd99")
+    assert isinstance(campos, types.GeneratorType)
+    assert next(campos) == ("00", 4, 6)
+    assert next(campos) == ("01", 10, 14)
+    # O campo quebrado só é descoberto quando a leitura chega nele
+    with pytest.raises(PayloadPixInvalido):
+        next(campos)
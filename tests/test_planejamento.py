@@ -0,0 +1,62 @@
+from planejamento_utils import interpretar_descricao, planejar_churrasco, CONFIANCA_MINIMA_LOCAL
+
+
+def test_numero_nao_usado_impede_pular_a_ia():
+    resultado = interpretar_descricao("churrasco para 2 familias de 4 pessoas, bebem muito")
+    assert "numero nao interpretado: 2" in resultado["pendencias"]
+    assert resultado["confianca"] < CONFIANCA_MINIMA_LOCAL
+
+
+def test_quantidade_por_pessoa_impede_pular_a_ia():
+    resultado = interpretar_descricao("10 pessoas bebem muito, 1 kg de picanha por pessoa")
+    assert "quantidade por pessoa" in resultado["pendencias"]
+    assert resultado["confianca"] < CONFIANCA_MINIMA_LOCAL
+
+
+def test_descricao_simples_continua_local():
+    resultado = interpretar_descricao("Churrasco para 15 pessoas, 6 horas, bebem muito")
+    assert resultado["pendencias"] == []
+    assert resultado["espec"] == {"pessoas": 15, "duracao_horas": 6.0, "bebem_muito": True}
+    assert resultado["confianca"] >= CONFIANCA_MINIMA_LOCAL
+
+
+def test_artigo_horario_e_dia_nao_contam_como_numero_sobrando():
+    resultado = interpretar_descricao("um churrasco sabado dia 15 as 13h pra 12 pessoas, bebem pouco")
+    assert resultado["pendencias"] == []
+    assert resultado["espec"]["pessoas"] == 12
+
+
+def test_corte_fora_da_tabela_recebe_parte_da_carne():
+    lista = planejar_churrasco({"pessoas": 10, "cortes": ["Picanha", "Costela"]})
+    cortes = {item["item"]: item["quantidade"] for item in lista["carnes"]}
+    assert set(cortes) == {"Picanha", "Costela"}
+    # Costela ganha a média das proporções conhecidas (só a Picanha): metade da carne para cada
+    assert cortes["Picanha"] == cortes["Costela"] == "1,8kg"
+
+
+def test_casais_contam_em_dobro():
+    resultado = interpretar_descricao("churrasco pra 6 casais, 5 horas, bebem muito")
+    assert resultado["espec"]["homens"] == resultado["espec"]["mulheres"] == 6
+    assert planejar_churrasco(resultado["espec"])["pessoas"] == 12
+
+    resultado = interpretar_descricao("5 casais e 4 criancas")
+    assert (resultado["espec"]["homens"], resultado["espec"]["mulheres"], resultado["espec"]["criancas"]) == (5, 5, 4)
+
+
+def test_acompanhantes_sem_numero_ficam_com_a_ia():
+    for descricao in ("10 amigos e suas esposas, 5 horas, bebem muito", "15 pessoas +1 cada, 5 horas, bebem pouco"):
+        resultado = interpretar_descricao(descricao)
+        assert "acompanhantes sem quantidade" in resultado["pendencias"]
+        assert resultado["confianca"] < CONFIANCA_MINIMA_LOCAL
+
+
+def test_sem_carne_ou_sem_cerveja_ficam_com_a_ia():
+    casos = {
+        "20 pessoas 5 horas bebem muito sem carne": "sem carne",
+        "20 pessoas, 5 horas, sem cerveja": "sem cerveja",
+        "10 pessoas, todo mundo vegetariano, 5 horas": "sem carne",
+    }
+    for descricao, pendencia in casos.items():
+        resultado = interpretar_descricao(descricao)
+        assert pendencia in resultado["pendencias"]
+        assert resultado["confianca"] < CONFIANCA_MINIMA_LOCAL
@@ -0,0 +1,53 @@
+import io
+import re
+
+import qrcode
+from PIL import Image
+
+import qrcode_utils
+from pix_utils import gerar_payload_pix
+from qrcode_utils import BORDA_PADRAO, TAMANHO_MODULO_PADRAO, calcular_matriz, desenhar_png, desenhar_svg
+
+PAYLOAD = gerar_payload_pix("chave@pix.com", "Churrasqueiro", "Sao Paulo", 45.5, "Churrasco de sabado")
+
+
+def _referencia() -> Image.Image:
+    """O QR como o app desenhava antes, pela imagem do próprio qrcode."""
+    return qrcode.make(
+        PAYLOAD, error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=TAMANHO_MODULO_PADRAO, border=BORDA_PADRAO,
+    ).get_image()
+
+
+def _matriz_do_svg(svg: bytes) -> list:
+    texto = svg.decode("utf-8")
+    lado = int(re.search(r'viewBox="0 0 (\d+) \d+"', texto).group(1))
+    matriz = [[False] * lado for _ in range(lado)]
+    for x, y, largura in re.findall(r"M(\d+) (\d+)h(\d+)", texto):
+        for coluna in range(int(x), int(x) + int(largura)):
+            matriz[int(y)][coluna] = True
+    return matriz
+
+
+def test_png_direto_igual_ao_do_qrcode():
+    png = Image.open(io.BytesIO(desenhar_png(calcular_matriz(PAYLOAD))))
+    referencia = _referencia()
+    assert png.size == referencia.size
+    assert png.convert("L").tobytes() == referencia.convert("L").tobytes()
+
+
+def test_svg_direto_igual_ao_do_qrcode():
+    referencia = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_L, border=BORDA_PADRAO)
+    referencia.add_data(PAYLOAD)
+    referencia.make()
+    assert _matriz_do_svg(desenhar_svg(calcular_matriz(PAYLOAD))) == referencia.get_matrix()
+
+
+def test_caches_de_versao_e_mascara_sao_limitados(monkeypatch):
+    monkeypatch.setattr(qrcode_utils, "MAX_ITENS_MATRIZ", 3)
+    monkeypatch.setattr(qrcode_utils, "_mascaras", qrcode_utils.OrderedDict())
+    for recebedor in range(10):
+        calcular_matriz(PAYLOAD, molde=f"recebedor-{recebedor}")
+    # Só os moldes usados mais recentemente ficam guardados
+    assert [molde for _, _, molde in qrcode_utils._mascaras] == ["recebedor-7", "recebedor-8", "recebedor-9"]
+    assert len(qrcode_utils._versoes) <= 3
@@ -0,0 +1,29 @@
+from roteamento_utils import RoteadorModelos, AMOSTRAS_MINIMAS
+
+ROTAS = {
+    "extrair_itens_nota": {"primario": "gpt-4o", "reserva": "gpt-4o-mini", "slo_p95_s": 25.0},
+    "gerar_cobranca_whatsapp": {"primario": "gpt-4o", "reserva": "gpt-4o-mini", "slo_p95_s": 5.0},
+}
+
+
+def test_latencia_de_uma_tarefa_nao_degrada_outra():
+    roteador = RoteadorModelos(ROTAS)
+    # Notas com Vision levam ~15 s no gpt-4o: dentro do SLO delas, fora do SLO da cobrança
+    for _ in range(AMOSTRAS_MINIMAS):
+        roteador.registrar("extrair_itens_nota", "gpt-4o", 15.0)
+        roteador.registrar("gerar_cobranca_whatsapp", "gpt-4o", 1.0)
+    assert roteador.escolher("gerar_cobranca_whatsapp", "gpt-4o") == ("gpt-4o", "primario")
+    assert roteador.escolher("extrair_itens_nota", "gpt-4o") == ("gpt-4o", "primario")
+
+
+def test_tarefa_fora_do_slo_vai_para_o_reserva():
+    roteador = RoteadorModelos(ROTAS)
+    for _ in range(AMOSTRAS_MINIMAS):
+        roteador.registrar("gerar_cobranca_whatsapp", "gpt-4o", 9.0)
+        roteador.registrar("gerar_cobranca_whatsapp", "gpt-4o-mini", 1.0)
+    assert roteador.escolher("gerar_cobranca_whatsapp", "gpt-4o") == ("gpt-4o-mini", "slo_primario")
+    assert roteador.modelo_atual("gerar_cobranca_whatsapp", "gpt-4o") == "gpt-4o-mini"
+    assert roteador.modelo_atual("extrair_itens_nota", "gpt-4o") == "gpt-4o"
+    estatisticas = roteador.estatisticas()
+    assert set(estatisticas["modelos"]["gerar_cobranca_whatsapp"]) == {"gpt-4o", "gpt-4o-mini"}
+    assert estatisticas["tarefas"]["gerar_cobranca_whatsapp"]["atual"] == "gpt-4o-mini"
@@ -0,0 +1,77 @@
+import re
+import unicodedata
+
+# ============================================
+# NÚMEROS POR EXTENSO
+# ============================================
+
+UNIDADES = {
+    "zero": 0, "um": 1, "uma": 1, "dois": 2, "duas": 2, "tres": 3, "quatro": 4,
+    "cinco": 5, "seis": 6, "sete": 7, "oito": 8, "nove": 9, "dez": 10,
+    "onze": 11, "doze": 12, "treze": 13, "quatorze": 14, "catorze": 14,
+    "quinze": 15, "dezesseis": 16, "dezessete": 17, "dezoito": 18, "dezenove": 19,
+}
+
+DEZENAS = {
+    "vinte": 20, "trinta": 30, "quarenta": 40, "cinquenta": 50,
+    "sessenta": 60, "setenta": 70, "oitenta": 80, "noventa": 90,
+}
+
+CENTENAS = {"cem": 100, "cento": 100, "duzentos": 200, "duzentas": 200, "trezentos": 300, "trezentas": 300}
+
+NUMEROS_POR_EXTENSO = {**UNIDADES, **DEZENAS, **CENTENAS}
+
+EXPRESSOES_NUMERICAS = [
+    (r"\bmeia duzia\b", "6"),
+    (r"\b(?:uma )?duzia\b", "12"),
+    (r"\bduas duzias\b", "24"),
+]
+
+
+def remover_acentos(texto: str) -> str:
+    """Remove acentos mantendo as letras base (ex: 'São' -> 'Sao')."""
+    decomposto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in decomposto if not unicodedata.combining(c))
+
+
+def _converter_numeros_por_extenso(palavras: list) -> list:
+    """Troca sequências como 'vinte e cinco' por '25'."""
+    resultado = []
+    i = 0
+    while i < len(palavras):
+        palavra = palavras[i]
+        if palavra not in NUMEROS_POR_EXTENSO:
+            resultado.append(palavra)
+            i += 1
+            continue
+
+        total = NUMEROS_POR_EXTENSO[palavra]
+        ultimo = total
+        i += 1
+        # Junta "e <número menor>" (ex: "cento e vinte e dois")
+        while (
+            i + 1 < len(palavras)
+            and palavras[i] == "e"
+            and palavras[i + 1] in NUMEROS_POR_EXTENSO
+            and NUMEROS_POR_EXTENSO[palavras[i + 1]] < ultimo
+        ):
+            ultimo = NUMEROS_POR_EXTENSO[palavras[i + 1]]
+            total += ultimo
+            i += 2
+        resultado.append(str(total))
+    return resultado
+
+
+def normalizar_texto(texto: str) -> str:
+    """
+    Normaliza um texto livre para comparação:
+    minúsculas, sem acentos, sem pontuação, espaços simples e números por extenso como dígitos.
+    """
+    texto = remover_acentos(texto.lower())
+    # Mantém vírgula/ponto só entre dígitos (ex: "1,5")
+    texto = re.sub(r"(?<!\d)[.,]|[.,](?!\d)", " ", texto)
+    texto = re.sub(r"[^\w.,]+", " ", texto)
+    for padrao, numero in EXPRESSOES_NUMERICAS:
+        texto = re.sub(padrao, numero, texto)
+    palavras = texto.split()
+    return " ".join(_converter_numeros_por_extenso(palavras))
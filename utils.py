@@ -3,50 +3,173 @@ import base64
 import json
 import io
 import hashlib
+import time
+import asyncio
+import threading
+import weakref
+import difflib
 from datetime import datetime
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception
 
+from cache_utils import CacheRespostas, gerar_chave_cache, hash_arquivo
+from concorrencia_utils import semaforo_ia, executar_async, reunir, voo_unico_ia, VooCancelado
+from limite_utils import limitador_ia, estimar_tokens, segundos_retry_after, EsperaRetryAfter
+from metricas_utils import metricas_ia
+from roteamento_utils import roteador_ia
+from cassete_utils import cassete_ia
+from json_utils import ParserCamposJson, reparar_json
+from esquemas_utils import (
+    CATEGORIAS_LISTA, validar_lista, validar_itens_lista, validar_nota, validar_itens_nota, converter_numero
+)
+from mensagens_utils import (
+    compor_cobranca, compor_caloteiro, PERSONA_PADRAO, PoolMensagens, categoria_pool
+)
+from planejamento_utils import planejar_churrasco, interpretar_descricao, CONFIANCA_MINIMA_LOCAL
+from texto_utils import normalizar_texto
+from pix_utils import (
+    gerar_payload_pix, gerar_payloads_pix, calcular_crc16, decodificar_payload_pix, PayloadPixInvalido, textos_cortados
+)
+from qrcode_utils import renderizador_qr, HAS_QRCODE
+from exportacao_utils import exportar_cobrancas
+from conciliacao_utils import livro_cobrancas, ler_extrato, conciliar
+
 # OpenAI é opcional para permitir que o app suba mesmo sem a lib instalada
 try:
-    from openai import OpenAI  # type: ignore
+    from openai import OpenAI, AsyncOpenAI  # type: ignore
 except ImportError:  # pragma: no cover
     OpenAI = None  # type: ignore[assignment]
+    AsyncOpenAI = None  # type: ignore[assignment]
 
-# Tentar importar qrcode, se não existir, criar fallback
-try:
-    import qrcode
-    HAS_QRCODE = True
-except ImportError:
-    HAS_QRCODE = False
 
 
-def get_openai_client():
-    """Obtém cliente OpenAI com fallback para diferentes fontes de API key."""
-    if OpenAI is None:
-        raise ImportError(
-            "Pacote 'openai' não instalado. Instale com `pip install -r requirements.txt` "
-            "ou `uv sync` antes de usar as funções de IA."
-        )
+# ============================================
+# CLIENTES OPENAI (POOL DE CONEXÕES)
+# ============================================
+
+# Um cliente por fonte de credencial ("custom", "env", "replit"), compartilhado
+# entre reruns e sessões do Streamlit para reaproveitar as conexões keep-alive.
+_clientes_openai: dict = {}
+# Clientes assíncronos ficam presos ao event loop onde foram criados: um pool por loop
+_clientes_async = weakref.WeakKeyDictionary()
+_clientes_lock = threading.Lock()
+_estatisticas_clientes = {"criados": 0, "reutilizados": 0, "descartados": 0}
 
+
+def _resolver_credencial() -> tuple:
+    """Retorna (fonte, api_key, base_url) seguindo a ordem de prioridade das chaves."""
     # Primeiro, tenta chave customizada do usuário
     custom_key = os.environ.get("CUSTOM_OPENAI_API_KEY")
     if custom_key:
-        return OpenAI(api_key=custom_key)
-    
-    # Segundo, tenta variável de ambiente padrão
+        return "custom", custom_key, None
+
+    # Segundo, tenta variável de ambiente padrão (OPENAI_BASE_URL aponta para outro
+    # servidor compatível, ex.: o servidor falso do bench/)
     env_key = os.environ.get("OPENAI_API_KEY")
     if env_key:
-        return OpenAI(api_key=env_key)
-    
+        return "env", env_key, os.environ.get("OPENAI_BASE_URL") or None
+
     # Terceiro, tenta Replit AI Integrations
     ai_key = os.environ.get("AI_INTEGRATIONS_OPENAI_API_KEY")
     ai_base = os.environ.get("AI_INTEGRATIONS_OPENAI_BASE_URL")
     if ai_key and ai_base:
-        return OpenAI(api_key=ai_key, base_url=ai_base)
-    
+        return "replit", ai_key, ai_base
+
     raise ValueError("Nenhuma API key configurada. Configure OPENAI_API_KEY ou use a sidebar.")
 
 
+def _assinatura_credencial(api_key: str, base_url: str | None) -> str:
+    """Hash da credencial, para detectar troca de chave sem guardar a chave em claro."""
+    return hashlib.sha256(f"{api_key}|{base_url or ''}".encode()).hexdigest()[:16]
+
+
+def _exigir_openai():
+    if OpenAI is None:
+        raise ImportError(
+            "Pacote 'openai' não instalado. Instale com `pip install -r requirements.txt` "
+            "ou `uv sync` antes de usar as funções de IA."
+        )
+
+
+def _obter_do_pool(registro: dict, fabrica):
+    """Devolve o cliente da fonte atual no registro, criando (ou trocando) se preciso."""
+    fonte, api_key, base_url = _resolver_credencial()
+    assinatura = _assinatura_credencial(api_key, base_url)
+
+    with _clientes_lock:
+        entrada = registro.get(fonte)
+        if entrada and entrada["assinatura"] == assinatura:
+            entrada["usos"] += 1
+            _estatisticas_clientes["reutilizados"] += 1
+            return entrada["cliente"]
+
+        if entrada:
+            # Chave trocada na sidebar: o cliente antigo sai do pool e é fechado
+            # pelo coletor quando as requisições em andamento terminarem.
+            _estatisticas_clientes["descartados"] += 1
+
+        # max_retries=0: o SDK não repete 429/5xx por conta própria, quem repete é o
+        # tenacity, passando pelo limitador (retry-after compartilhado) e pelas métricas
+        if base_url:
+            cliente = fabrica(api_key=api_key, base_url=base_url, max_retries=0)
+        else:
+            cliente = fabrica(api_key=api_key, max_retries=0)
+
+        registro[fonte] = {
+            "cliente": cliente,
+            "assinatura": assinatura,
+            "criado_em": time.time(),
+            "usos": 1,
+        }
+        _estatisticas_clientes["criados"] += 1
+        return cliente
+
+
+def get_openai_client():
+    """Obtém cliente OpenAI reaproveitado do pool, com fallback para diferentes fontes de API key."""
+    _exigir_openai()
+    return _obter_do_pool(_clientes_openai, OpenAI)
+
+
+def get_async_openai_client():
+    """Obtém cliente AsyncOpenAI do pool do event loop atual (mesma ordem de chaves)."""
+    _exigir_openai()
+    loop = asyncio.get_running_loop()
+    with _clientes_lock:
+        registro = _clientes_async.setdefault(loop, {})
+    return _obter_do_pool(registro, AsyncOpenAI)
+
+
+def descartar_clientes_openai(fonte: str | None = None) -> int:
+    """Remove clientes do pool (todos ou só de uma fonte). Retorna quantos saíram."""
+    with _clientes_lock:
+        removidos = 0
+        for registro in [_clientes_openai, *_clientes_async.values()]:
+            for f in ([fonte] if fonte else list(registro)):
+                if registro.pop(f, None) is not None:
+                    removidos += 1
+        _estatisticas_clientes["descartados"] += removidos
+        return removidos
+
+
+def estatisticas_clientes_openai() -> dict:
+    """Estatísticas do pool de clientes OpenAI."""
+    agora = time.time()
+    with _clientes_lock:
+        return {
+            **_estatisticas_clientes,
+            "ativos": len(_clientes_openai),
+            "ativos_async": sum(len(registro) for registro in _clientes_async.values()),
+            "clientes": {
+                fonte: {
+                    "usos": entrada["usos"],
+                    "idade_s": round(agora - entrada["criado_em"], 1),
+                    "assinatura": entrada["assinatura"][:8],
+                }
+                for fonte, entrada in _clientes_openai.items()
+            },
+        }
+
+
 def is_rate_limit_error(exception: BaseException) -> bool:
     """Verifica se é erro de rate limit para retry."""
     error_msg = str(exception)
@@ -59,18 +182,559 @@ def is_rate_limit_error(exception: BaseException) -> bool:
     )
 
 
-# ============================================
-# FUNÇÕES DE GERAÇÃO DE LISTA DE CHURRASCO
-# ============================================
+def is_falha_do_modelo(exception: BaseException) -> bool:
+    """
+    Erro que indica modelo sobrecarregado ou fora do ar (rate limit, 5xx, timeout,
+    conexão): conta no roteador e justifica tentar o modelo reserva. Erros de
+    configuração ou de requisição inválida não mudariam trocando de modelo.
+    """
+    status = getattr(exception, "status_code", None)
+    nome = type(exception).__name__
+    return (
+        is_rate_limit_error(exception)
+        or (isinstance(status, int) and status >= 500)
+        or "Timeout" in nome
+        or "Connection" in nome
+    )
+
+
+def _chave_limite(params: dict) -> tuple:
+    """Chave do limitador de taxa: (modelo, credencial), sem a chave em claro."""
+    fonte, api_key, base_url = _resolver_credencial()
+    return params.get("model", MODELO_PADRAO), f"{fonte}:{_assinatura_credencial(api_key, base_url)[:8]}"
+
+
+def _registrar_resposta(chave: tuple, tokens_estimados: int, response):
+    """Corrige o TPM do limitador com o uso real (respostas em streaming não trazem usage)."""
+    uso = getattr(response, "usage", None)
+    if uso is not None and getattr(uso, "total_tokens", None):
+        limitador_ia.ajustar_tokens(chave, tokens_estimados, uso.total_tokens)
+
+
+def _registrar_rate_limit(chave: tuple, exception: BaseException):
+    """429 com retry-after: pausa a chave no limitador para todas as sessões."""
+    resposta = getattr(exception, "response", None)
+    if resposta is not None:
+        limitador_ia.atualizar_limites(chave, getattr(resposta, "headers", None))
+    if is_rate_limit_error(exception):
+        segundos = segundos_retry_after(exception)
+        if segundos is not None:
+            limitador_ia.pausar(chave, segundos)
+
+
+@retry(
+    stop=stop_after_attempt(5),
+    wait=EsperaRetryAfter(wait_exponential(multiplier=1, min=2, max=64)),
+    retry=retry_if_exception(is_rate_limit_error),
+    reraise=True
+)
+def _chamar_com_retry(params: dict, estado: dict):
+    """Chama chat.completions com retry em rate limit, respeitando o limitador de taxa global."""
+    estado["tentativas"] += 1
+    client = get_openai_client()
+    chave = _chave_limite(params)
+    tokens = estimar_tokens(params)
+    limitador_ia.aguardar(chave, tokens)
+    try:
+        # Resposta crua para ler os limites da conta nos headers x-ratelimit-*
+        bruta = client.chat.completions.with_raw_response.create(**params)
+    except Exception as e:
+        _registrar_rate_limit(chave, e)
+        raise
+    limitador_ia.atualizar_limites(chave, bruta.headers)
+    response = bruta.parse()
+    _registrar_resposta(chave, tokens, response)
+    return response
+
 
 @retry(
     stop=stop_after_attempt(5),
-    wait=wait_exponential(multiplier=1, min=2, max=64),
+    wait=EsperaRetryAfter(wait_exponential(multiplier=1, min=2, max=64)),
     retry=retry_if_exception(is_rate_limit_error),
     reraise=True
 )
-def gerar_lista_churrasco(descricao: str) -> dict:
-    """Gera lista de compras inteligente baseada na descrição do churrasco."""
+async def _chamar_com_retry_async(params: dict, estado: dict):
+    """
+    Versão assíncrona: a espera no limitador acontece antes de pegar a vaga do semáforo
+    global, e a vaga só fica ocupada durante a chamada, não no back-off.
+    """
+    estado["tentativas"] += 1
+    chave = _chave_limite(params)
+    tokens = estimar_tokens(params)
+    await limitador_ia.aguardar_async(chave, tokens)
+    async with semaforo_ia:
+        client = get_async_openai_client()
+        try:
+            bruta = await client.chat.completions.with_raw_response.create(**params)
+        except Exception as e:
+            _registrar_rate_limit(chave, e)
+            raise
+    limitador_ia.atualizar_limites(chave, bruta.headers)
+    response = bruta.parse()
+    _registrar_resposta(chave, tokens, response)
+    return response
+
+
+def _tokens_usados(response) -> tuple:
+    uso = getattr(response, "usage", None)
+    if uso is None:
+        return 0, 0
+    return getattr(uso, "prompt_tokens", 0) or 0, getattr(uso, "completion_tokens", 0) or 0
+
+
+def _criar_resposta(params: dict, funcao: str, rota: dict | None = None):
+    """
+    Ponto único das chamadas síncronas à IA: o roteador escolhe o modelo da tarefa
+    (com uma nova tentativa no modelo reserva se a chamada falhar) e _chamar_modelo
+    cuida de retry, limitador de taxa e métricas. Com `rota`, rota["modelo"] recebe
+    o modelo que respondeu, para o cache guardar a resposta com o modelo certo.
+    """
+    rota = {} if rota is None else rota
+    modelo, motivo = roteador_ia.escolher(funcao, params.get("model", MODELO_PADRAO))
+    metricas_ia.registrar_rota(funcao, modelo, motivo)
+    rota["modelo"] = modelo
+    try:
+        return _chamar_modelo({**params, "model": modelo}, funcao)
+    except Exception as e:
+        reserva = roteador_ia.reserva(funcao, modelo)
+        if reserva is None or not is_falha_do_modelo(e):
+            raise
+        metricas_ia.registrar_rota(funcao, reserva, "falha_anterior")
+        rota["modelo"] = reserva
+        return _chamar_modelo({**params, "model": reserva}, funcao)
+
+
+def _chamar_modelo(params: dict, funcao: str):
+    """
+    Chamada síncrona com retry e limitador de taxa (ou gravada/reproduzida pela fita
+    do cassete_utils); registra latência, tentativas, tokens e custo em nome de
+    `funcao` e a latência do modelo no roteador.
+    """
+    modelo = params.get("model", MODELO_PADRAO)
+    estado = {"tentativas": 0}
+    inicio = time.perf_counter()
+    try:
+        response = cassete_ia.chamar(params, funcao, lambda: _chamar_com_retry(params, estado))
+    except Exception as e:
+        latencia = time.perf_counter() - inicio
+        metricas_ia.registrar_chamada(funcao, modelo, latencia, estado["tentativas"], erro=True)
+        if is_falha_do_modelo(e):
+            roteador_ia.registrar(funcao, modelo, latencia, erro=True)
+        raise
+    if params.get("stream"):
+        return _medir_stream(response, funcao, modelo, inicio, estado["tentativas"])
+    latencia = time.perf_counter() - inicio
+    entrada, saida = _tokens_usados(response)
+    metricas_ia.registrar_chamada(funcao, modelo, latencia, estado["tentativas"], entrada, saida)
+    roteador_ia.registrar(funcao, modelo, latencia)
+    return response
+
+
+def _medir_stream(stream, funcao: str, modelo: str, inicio: float, tentativas: int):
+    """Repassa os chunks do streaming medindo o tempo até o primeiro token e o uso final."""
+    primeiro_token = None
+    entrada = saida = 0
+    erro = falha_do_modelo = False
+    try:
+        for chunk in stream:
+            if primeiro_token is None and chunk.choices and chunk.choices[0].delta.content:
+                primeiro_token = time.perf_counter() - inicio
+            if getattr(chunk, "usage", None) is not None:
+                entrada, saida = _tokens_usados(chunk)
+            yield chunk
+    except Exception as e:
+        erro = True
+        falha_do_modelo = is_falha_do_modelo(e)
+        raise
+    finally:
+        latencia = time.perf_counter() - inicio
+        metricas_ia.registrar_chamada(funcao, modelo, latencia, tentativas, entrada, saida, primeiro_token, erro)
+        if not erro or falha_do_modelo:
+            roteador_ia.registrar(funcao, modelo, latencia, erro)
+
+
+async def _criar_resposta_async(params: dict, funcao: str, rota: dict | None = None):
+    """Versão assíncrona de _criar_resposta."""
+    rota = {} if rota is None else rota
+    modelo, motivo = roteador_ia.escolher(funcao, params.get("model", MODELO_PADRAO))
+    metricas_ia.registrar_rota(funcao, modelo, motivo)
+    rota["modelo"] = modelo
+    try:
+        return await _chamar_modelo_async({**params, "model": modelo}, funcao)
+    except Exception as e:
+        reserva = roteador_ia.reserva(funcao, modelo)
+        if reserva is None or not is_falha_do_modelo(e):
+            raise
+        metricas_ia.registrar_rota(funcao, reserva, "falha_anterior")
+        rota["modelo"] = reserva
+        return await _chamar_modelo_async({**params, "model": reserva}, funcao)
+
+
+async def _chamar_modelo_async(params: dict, funcao: str):
+    """Versão assíncrona de _chamar_modelo."""
+    modelo = params.get("model", MODELO_PADRAO)
+    estado = {"tentativas": 0}
+    inicio = time.perf_counter()
+    try:
+        response = await cassete_ia.chamar_async(params, funcao, lambda: _chamar_com_retry_async(params, estado))
+    except Exception as e:
+        latencia = time.perf_counter() - inicio
+        metricas_ia.registrar_chamada(funcao, modelo, latencia, estado["tentativas"], erro=True)
+        if is_falha_do_modelo(e):
+            roteador_ia.registrar(funcao, modelo, latencia, erro=True)
+        raise
+    latencia = time.perf_counter() - inicio
+    entrada, saida = _tokens_usados(response)
+    metricas_ia.registrar_chamada(funcao, modelo, latencia, estado["tentativas"], entrada, saida)
+    roteador_ia.registrar(funcao, modelo, latencia)
+    return response
+
+
+def estatisticas_limite_taxa() -> dict:
+    """Fila e tempos de espera do limitador de taxa, por modelo/credencial."""
+    return limitador_ia.estatisticas()
+
+
+def estatisticas_roteamento() -> dict:
+    """Latência p50/p95 e taxa de erro de cada modelo em cada tarefa e o modelo escolhido para cada tarefa."""
+    return roteador_ia.estatisticas()
+
+
+def estatisticas_cassete() -> dict:
+    """Modo da fita de gravação/reprodução e quantas chamadas foram gravadas ou reproduzidas."""
+    return cassete_ia.estatisticas()
+
+
+def estatisticas_voo_unico() -> dict:
+    """Quantas chamadas idênticas foram atendidas por uma chamada já em andamento."""
+    return voo_unico_ia.estatisticas()
+
+
+def metricas_chamadas_ia() -> dict:
+    """Snapshot das métricas de latência, tokens, retries, cache e custo por função."""
+    return metricas_ia.snapshot()
+
+
+def exportar_metricas_prometheus() -> str:
+    """Métricas das chamadas de IA no formato texto do Prometheus."""
+    return metricas_ia.exportar_prometheus()
+
+
+def exportar_metricas_json() -> str:
+    """Snapshot das métricas das chamadas de IA em JSON."""
+    return metricas_ia.exportar_json()
+
+
+def _ler_json(response) -> dict:
+    """Lê o JSON da resposta, aproveitando o que der se ela veio cortada ou com ```json."""
+    content = response.choices[0].message.content or "{}"
+    return reparar_json(content)[0]
+
+
+def _resposta_cortada(response) -> bool:
+    """A resposta parou no max_tokens (o JSON foi reparado e pode faltar o final)."""
+    return getattr(response.choices[0], "finish_reason", None) == "length"
+
+
+def _ler_texto(response) -> str:
+    return response.choices[0].message.content or ""
+
+
+# ============================================
+# CACHE DE RESPOSTAS DA IA
+# ============================================
+
+MODELO_PADRAO = "gpt-4o"
+
+# Mude a versão sempre que o prompt mudar, para não servir respostas antigas do cache
+PROMPT_VERSAO_LISTA = "lista-v2"
+
+PROMPT_VERSAO_NOTA = "nota-v2"
+
+PROMPT_VERSAO_POOL = "pool-v1"
+
+_cache_lista = CacheRespostas("lista_churrasco", max_itens=256, ttl_segundos=7 * 24 * 3600)
+
+# Resultados de notas são endereçados pelo hash do arquivo enviado e limitados por bytes
+_cache_notas = CacheRespostas(
+    "notas_fiscais", max_itens=512, ttl_segundos=30 * 24 * 3600, limite_bytes=20 * 1024 * 1024
+)
+
+
+def chave_cache_lista(descricao: str, modelo: str | None = None) -> str:
+    """
+    Chave do cache da lista: descrição normalizada + versão do prompt + modelo.
+    Sem `modelo`, usa o que o roteador escolheria agora para a tarefa; a resposta é
+    guardada com o modelo que de fato respondeu (ver _criar_resposta).
+    """
+    modelo = modelo or roteador_ia.modelo_atual("gerar_lista_churrasco", MODELO_PADRAO)
+    return gerar_chave_cache("lista_churrasco", PROMPT_VERSAO_LISTA, modelo, normalizar_texto(descricao))
+
+
+def chave_cache_nota(hash_original: str, perfil: str | None = None, modelo: str | None = None) -> str:
+    """
+    Chave do cache de notas: hash do arquivo original + perfil de pré-processamento +
+    versão do prompt + modelo (como na lista). O perfil entra porque o mesmo original
+    lido em "economia" e em "detalhe" manda imagens diferentes ao Vision: subir o perfil
+    para reler uma nota mal lida não pode devolver a leitura anterior.
+    """
+    modelo = modelo or roteador_ia.modelo_atual("extrair_itens_nota", MODELO_PADRAO)
+    return gerar_chave_cache("notas_fiscais", PROMPT_VERSAO_NOTA, modelo, perfil, hash_original)
+
+
+def buscar_nota_em_cache(hash_original: str, perfil: str | None = None) -> dict | None:
+    """Retorna a extração já feita para este arquivo neste perfil, se houver (sem chamar a IA)."""
+    return _cache_notas.obter(chave_cache_nota(hash_original, perfil))
+
+
+def _consultar_cache(cache: CacheRespostas, chave: str, funcao: str):
+    """Lê do cache registrando acerto/erro nas métricas de `funcao`."""
+    resultado = cache.obter(chave)
+    metricas_ia.registrar_cache(funcao, resultado is not None)
+    return resultado
+
+
+def estatisticas_cache() -> dict:
+    """Contadores de hit/miss de cada cache de IA."""
+    return {
+        "lista_churrasco": _cache_lista.estatisticas(),
+        "notas_fiscais": _cache_notas.estatisticas(),
+    }
+
+
+# ============================================
+# FUNÇÕES DE GERAÇÃO DE LISTA DE CHURRASCO
+# ============================================
+
+def _plano_local_confiavel(descricao: str) -> dict | None:
+    """Resolve a descrição localmente quando o interpretador tem confiança suficiente."""
+    interpretacao = interpretar_descricao(descricao)
+    if interpretacao["confianca"] < CONFIANCA_MINIMA_LOCAL:
+        return None
+    plano = planejar_churrasco(interpretacao["espec"])
+    plano["origem"] = "local"
+    metricas_ia.registrar_local("gerar_lista_churrasco")
+    return plano
+
+
+def gerar_lista_churrasco(descricao: str, usar_cache: bool = True, permitir_local: bool = True) -> dict:
+    """
+    Gera lista de compras inteligente baseada na descrição do churrasco.
+    Descrições simples (pessoas, duração, quanto bebem) são resolvidas pelo motor local
+    sem chamar a IA; use permitir_local=False para sempre consultar a IA.
+    Descrições equivalentes (caixa, acentos, números por extenso) reaproveitam o cache;
+    com usar_cache=False a IA é consultada de novo e a resposta nova substitui a do cache.
+    """
+    if permitir_local:
+        plano = _plano_local_confiavel(descricao)
+        if plano is not None:
+            return plano
+
+    chave = chave_cache_lista(descricao)
+    if usar_cache:
+        resultado = _consultar_cache(_cache_lista, chave, "gerar_lista_churrasco")
+        if resultado is not None:
+            return resultado
+
+    def consultar_ia():
+        rota = {}
+        resultado = _ler_json(_criar_resposta(_requisicao_lista(descricao), "gerar_lista_churrasco", rota))
+        resultado = _completar_lista(resultado, descricao)
+        _cache_lista.guardar(chave_cache_lista(descricao, rota["modelo"]), resultado)
+        return resultado
+
+    # Descrição idêntica já sendo calculada (template, clique duplo): espera a mesma resposta
+    return voo_unico_ia.executar(chave, consultar_ia)
+
+
+async def gerar_lista_churrasco_async(descricao: str, usar_cache: bool = True, permitir_local: bool = True) -> dict:
+    """Versão assíncrona de gerar_lista_churrasco."""
+    if permitir_local:
+        plano = _plano_local_confiavel(descricao)
+        if plano is not None:
+            return plano
+
+    chave = chave_cache_lista(descricao)
+    if usar_cache:
+        resultado = _consultar_cache(_cache_lista, chave, "gerar_lista_churrasco")
+        if resultado is not None:
+            return resultado
+
+    async def consultar_ia():
+        rota = {}
+        resultado = _ler_json(await _criar_resposta_async(_requisicao_lista(descricao), "gerar_lista_churrasco", rota))
+        resultado = await _completar_lista_async(resultado, descricao)
+        _cache_lista.guardar(chave_cache_lista(descricao, rota["modelo"]), resultado)
+        return resultado
+
+    return await voo_unico_ia.executar_async(chave, consultar_ia)
+
+
+def _completar_lista(resultado: dict, descricao: str) -> dict:
+    """
+    Valida a lista (preços como número, campos padrão, total recalculado) e, se alguma
+    categoria não veio, pede à IA só as categorias que faltaram.
+    """
+    lista, faltando = validar_lista(resultado)
+    if faltando:
+        try:
+            extra = _ler_json(_criar_resposta(
+                _requisicao_categorias_lista(descricao, faltando, lista), "gerar_lista_churrasco"
+            ))
+            lista = _juntar_categorias(lista, faltando, extra)
+        except Exception:
+            pass
+    return lista
+
+
+async def _completar_lista_async(resultado: dict, descricao: str) -> dict:
+    """Versão assíncrona de _completar_lista."""
+    lista, faltando = validar_lista(resultado)
+    if faltando:
+        try:
+            extra = _ler_json(await _criar_resposta_async(
+                _requisicao_categorias_lista(descricao, faltando, lista), "gerar_lista_churrasco"
+            ))
+            lista = _juntar_categorias(lista, faltando, extra)
+        except Exception:
+            pass
+    return lista
+
+
+def _juntar_categorias(lista: dict, faltando: list, extra: dict) -> dict:
+    for categoria in faltando:
+        lista[categoria] = validar_itens_lista(categoria, extra.get(categoria))
+    return validar_lista(lista)[0]
+
+
+def _requisicao_categorias_lista(descricao: str, faltando: list, lista: dict) -> dict:
+    """Pede só as categorias que faltaram na lista, com o que já veio como contexto."""
+    ja_tem = ", ".join(
+        item["item"] for categoria in CATEGORIAS_LISTA if categoria not in faltando for item in lista[categoria]
+    )
+    prompt = f"""Churrasco descrito assim: "{descricao}"
+Pessoas: {lista.get('pessoas') or 'não informado'} | Duração: {lista.get('duracao_estimada') or 'não informada'}
+A lista já tem: {ja_tem or 'nada ainda'}
+
+Complete APENAS estas categorias: {', '.join(faltando)}.
+Cada item: {{"item": "nome", "quantidade": "ex: 2kg", "preco_estimado": 0.00}}; bebidas também têm "alcoolica": true/false.
+Retorne JSON: {{{', '.join(f'"{c}": [...]' for c in faltando)}}}"""
+
+    return {
+        "model": MODELO_PADRAO,
+        "messages": [
+            {"role": "system", "content": "Você é o Mestre do Churrasco. Responda sempre em JSON válido, sem markdown."},
+            {"role": "user", "content": prompt}
+        ],
+        "response_format": {"type": "json_object"},
+        "max_tokens": 800
+    }
+
+
+# Último evento do streaming da lista: traz o dict completo
+FIM_STREAM = "__fim__"
+
+
+def gerar_lista_churrasco_stream(descricao: str, usar_cache: bool = True, permitir_local: bool = True):
+    """
+    Versão em streaming de gerar_lista_churrasco.
+    Gera tuplas (campo, valor) à medida que cada campo do JSON fecha, para a
+    interface mostrar "carnes" enquanto "bebidas" ainda está sendo escrito.
+    O último evento é (FIM_STREAM, lista_completa).
+    """
+    chave = chave_cache_lista(descricao)
+    resultado = _plano_local_confiavel(descricao) if permitir_local else None
+    if resultado is None and usar_cache:
+        resultado = _consultar_cache(_cache_lista, chave, "gerar_lista_churrasco")
+
+    # Mesma descrição já em streaming para outra sessão: espera e mostra tudo de uma vez
+    while resultado is None:
+        lider, voo = voo_unico_ia.entrar(chave)
+        if lider:
+            break
+        try:
+            resultado = voo_unico_ia.aguardar(voo)
+        except VooCancelado:
+            continue
+
+    if resultado is not None:
+        for campo, valor in resultado.items():
+            yield campo, valor
+        yield FIM_STREAM, resultado
+        return
+
+    try:
+        parser = ParserCamposJson()
+        rota = {}
+        stream = _criar_resposta(
+            {**_requisicao_lista(descricao), "stream": True, "stream_options": {"include_usage": True}},
+            "gerar_lista_churrasco", rota
+        )
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            pedaco = chunk.choices[0].delta.content
+            if pedaco:
+                for campo, valor in parser.alimentar(pedaco):
+                    if campo in CATEGORIAS_LISTA:
+                        valor = validar_itens_lista(campo, valor)
+                    yield campo, valor
+        resultado = _completar_lista(reparar_json(parser.texto)[0], descricao)
+    except BaseException as e:
+        voo_unico_ia.concluir(chave, voo, erro=e)
+        raise
+
+    _cache_lista.guardar(chave_cache_lista(descricao, rota["modelo"]), resultado)
+    voo_unico_ia.concluir(chave, voo, valor=resultado)
+    yield FIM_STREAM, resultado
+
+
+def gerar_lista_churrasco_local(espec: dict, textos_com_ia: bool = False, descricao: str = "") -> dict:
+    """
+    Monta a lista com o motor local (planejamento_utils), sem esperar a IA.
+    Com textos_com_ia=True só o resumo e as dicas engraçadas vêm da IA; se ela
+    estiver fora do ar, ficam os textos padrão e a lista sai do mesmo jeito.
+    """
+    plano = planejar_churrasco(espec)
+    if textos_com_ia:
+        try:
+            textos = _ler_json(_criar_resposta(_requisicao_textos_plano(plano, descricao), "gerar_lista_churrasco_local"))
+            if isinstance(textos.get("resumo"), str):
+                plano["resumo"] = textos["resumo"]
+            if isinstance(textos.get("dicas"), list):
+                plano["dicas"] = [str(dica) for dica in textos["dicas"]]
+        except Exception:
+            pass
+    return plano
+
+
+def _requisicao_textos_plano(plano: dict, descricao: str) -> dict:
+    """Pede à IA só o resumo e as dicas de uma lista já calculada (resposta curta)."""
+    itens = ", ".join(
+        f"{item['item']} ({item['quantidade']})"
+        for categoria in CATEGORIAS_LISTA for item in plano.get(categoria, [])
+    )
+    prompt = f"""O churrasco já está calculado:
+Descrição: "{descricao or 'não informada'}"
+Pessoas: {plano['pessoas']} | Duração: {plano['duracao_estimada']} | Total: R$ {plano['total_estimado']:.2f}
+Itens: {itens}
+
+Escreva só o resumo engraçado e informal e 2 a 4 dicas práticas.
+Retorne APENAS um JSON válido: {{"resumo": "...", "dicas": ["...", "..."]}}"""
+
+    return {
+        "model": MODELO_PADRAO,
+        "messages": [
+            {"role": "system", "content": "Você é o Mestre do Churrasco. Responda sempre em JSON válido, sem markdown."},
+            {"role": "user", "content": prompt}
+        ],
+        "response_format": {"type": "json_object"},
+        "max_tokens": 300
+    }
+
+
+def _requisicao_lista(descricao: str) -> dict:
+    """Monta os parâmetros da chamada que gera a lista de compras."""
     prompt = f"""Você é um especialista em churrascos brasileiros, manja tudo de carne, bebida e quantidade!
 
 O usuário descreveu o churrasco assim:
@@ -113,33 +777,314 @@ Retorne APENAS um JSON válido neste formato (sem markdown, só o JSON puro):
     "dicas": ["dica 1 sobre o churrasco", "dica 2"]
 }}"""
 
-    client = get_openai_client()
-    response = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[
+    return {
+        "model": MODELO_PADRAO,
+        "messages": [
             {"role": "system", "content": "Você é o Mestre do Churrasco. Responda sempre em JSON válido, sem markdown."},
             {"role": "user", "content": prompt}
         ],
-        response_format={"type": "json_object"},
-        max_tokens=2000
-    )
-    
-    content = response.choices[0].message.content or "{}"
-    return json.loads(content)
+        "response_format": {"type": "json_object"},
+        "max_tokens": 2000
+    }
 
 
 # ============================================
 # FUNÇÕES DE EXTRAÇÃO DE NOTA FISCAL
 # ============================================
 
-@retry(
-    stop=stop_after_attempt(5),
-    wait=wait_exponential(multiplier=1, min=2, max=64),
-    retry=retry_if_exception(is_rate_limit_error),
-    reraise=True
-)
-def extrair_itens_nota(image_bytes: bytes) -> dict:
-    """Extrai itens de uma foto de nota fiscal usando Vision."""
+def extrair_itens_nota(image_bytes: bytes, hash_original: str | None = None, usar_cache: bool = True,
+                       perfil: str | None = None) -> dict:
+    """
+    Extrai itens de uma foto de nota fiscal usando Vision.
+    hash_original é o hash do arquivo como foi enviado (antes de qualquer re-encode),
+    para que o mesmo upload sempre caia na mesma entrada do cache; perfil é o perfil de
+    pré-processamento que gerou image_bytes a partir dele (ver chave_cache_nota).
+    """
+    hash_original = hash_original or hash_arquivo(image_bytes)
+    chave = chave_cache_nota(hash_original, perfil)
+    if usar_cache:
+        resultado = _consultar_cache(_cache_notas, chave, "extrair_itens_nota")
+        if resultado is not None:
+            return resultado
+
+    def consultar_ia():
+        rota = {}
+        resposta = _criar_resposta(_requisicao_nota(image_bytes), "extrair_itens_nota", rota)
+        nota, sem_preco = validar_nota(_ler_json(resposta))
+        pedidos = _pedidos_complemento_nota(nota, sem_preco, image_bytes, _resposta_cortada(resposta))
+        complementos = []
+        for pedido in pedidos:
+            try:
+                complementos.append(_ler_json(_criar_resposta(pedido, "extrair_itens_nota")))
+            except Exception:
+                complementos.append({})
+        resultado = _aplicar_complementos_nota(nota, sem_preco, complementos)
+        # Não guarda "não é nota fiscal": o usuário pode tentar de novo com outra foto
+        if "erro" not in resultado:
+            _cache_notas.guardar(chave_cache_nota(hash_original, perfil, rota["modelo"]), resultado)
+        return resultado
+
+    return voo_unico_ia.executar(chave, consultar_ia)
+
+
+async def extrair_itens_nota_async(image_bytes: bytes, hash_original: str | None = None, usar_cache: bool = True,
+                                   perfil: str | None = None) -> dict:
+    """Versão assíncrona de extrair_itens_nota."""
+    hash_original = hash_original or hash_arquivo(image_bytes)
+    chave = chave_cache_nota(hash_original, perfil)
+    if usar_cache:
+        resultado = _consultar_cache(_cache_notas, chave, "extrair_itens_nota")
+        if resultado is not None:
+            return resultado
+
+    async def consultar_ia():
+        rota = {}
+        resposta = await _criar_resposta_async(_requisicao_nota(image_bytes), "extrair_itens_nota", rota)
+        nota, sem_preco = validar_nota(_ler_json(resposta))
+        pedidos = _pedidos_complemento_nota(nota, sem_preco, image_bytes, _resposta_cortada(resposta))
+        complementos = await reunir(
+            *[_criar_resposta_async(pedido, "extrair_itens_nota") for pedido in pedidos], return_exceptions=True
+        )
+        complementos = [{} if isinstance(c, BaseException) else _ler_json(c) for c in complementos]
+        resultado = _aplicar_complementos_nota(nota, sem_preco, complementos)
+        if "erro" not in resultado:
+            _cache_notas.guardar(chave_cache_nota(hash_original, perfil, rota["modelo"]), resultado)
+        return resultado
+
+    return await voo_unico_ia.executar_async(chave, consultar_ia)
+
+
+def _pedidos_complemento_nota(nota: dict, sem_preco: list, image_bytes: bytes, cortada: bool) -> list:
+    """
+    Chamadas extras só para o que faltou na leitura da nota: os itens depois do último
+    lido (resposta cortada no max_tokens) e o preço dos itens que vieram sem preço legível.
+    """
+    if "erro" in nota and not nota.get("itens"):
+        return []
+    pedidos = []
+    if cortada and nota["itens"]:
+        pedidos.append(_requisicao_nota(image_bytes, apos_item=nota["itens"][-1]["nome"]))
+    if sem_preco:
+        pedidos.append(_requisicao_precos_nota(image_bytes, sem_preco))
+    return pedidos
+
+
+def _aplicar_complementos_nota(nota: dict, sem_preco: list, complementos: list) -> dict:
+    """Junta as respostas dos pedidos extras na nota e recalcula os totais."""
+    if "erro" in nota and not nota.get("itens"):
+        return nota
+    nomes_pedidos = set(sem_preco)
+    for complemento in complementos:
+        itens, faltando = validar_itens_nota(complemento.get("itens"))
+        # A continuação pode repetir o último item lido: tira a sobreposição
+        nota["itens"] = mesclar_itens_faixas([nota["itens"], itens])
+        sem_preco = [nome for nome in sem_preco if nome not in {item["nome"] for item in itens}]
+        sem_preco += [nome for nome in faltando if nome not in nomes_pedidos]
+        total_impresso = converter_numero(complemento.get("total_nota"))
+        if nota.get("total_impresso") is None and total_impresso is not None:
+            nota["total_impresso"] = round(total_impresso, 2)
+    if sem_preco:
+        nota["itens_sem_preco"] = sem_preco
+    return recalcular_totais_nota(nota)
+
+
+def extrair_itens_nota_em_faixas(faixas: list, hash_original: str | None = None, usar_cache: bool = True,
+                                 perfil: str | None = None) -> dict:
+    """
+    Lê uma nota comprida já cortada em faixas sobrepostas (imagem_utils.preparar_faixas_nota),
+    com uma chamada de Vision por faixa em paralelo. Os itens repetidos nas sobreposições
+    são removidos e os totais são recalculados localmente.
+    """
+    return executar_async(extrair_itens_nota_em_faixas_async(faixas, hash_original, usar_cache, perfil))
+
+
+async def extrair_itens_nota_em_faixas_async(faixas: list, hash_original: str | None = None, usar_cache: bool = True,
+                                             perfil: str | None = None) -> dict:
+    """Versão assíncrona de extrair_itens_nota_em_faixas."""
+    hash_original = hash_original or hash_arquivo(b"".join(faixas))
+    chave = chave_cache_nota(hash_original, perfil)
+    if usar_cache:
+        resultado = _consultar_cache(_cache_notas, chave, "extrair_itens_nota")
+        if resultado is not None:
+            return resultado
+
+    return await voo_unico_ia.executar_async(chave, lambda: _ler_faixas_nota(faixas, hash_original, perfil))
+
+
+async def _ler_faixas_nota(faixas: list, hash_original: str, perfil: str | None) -> dict:
+    """Uma chamada de Vision por faixa, em paralelo, e a mesclagem do resultado."""
+    rotas = [{} for _ in faixas]
+    respostas = await reunir(*[
+        _criar_resposta_async(_requisicao_nota(faixa, (i + 1, len(faixas))), "extrair_itens_nota", rota)
+        for i, (faixa, rota) in enumerate(zip(faixas, rotas))
+    ])
+    parciais = [validar_nota(_ler_json(resposta)) for resposta in respostas]
+
+    validas = [nota for nota, _ in parciais if "erro" not in nota]
+    if not validas:
+        return parciais[0][0] if parciais else {"erro": "Não consegui identificar uma nota fiscal nesta imagem"}
+
+    resultado = {
+        "itens": mesclar_itens_faixas([p.get("itens", []) for p in validas]),
+        "estabelecimento": next((p["estabelecimento"] for p in validas if p.get("estabelecimento")), None),
+        "data_compra": next((p["data_compra"] for p in validas if p.get("data_compra")), None),
+        "faixas": len(faixas),
+    }
+    # O total impresso costuma aparecer só na última faixa
+    total_impresso = next((p["total_impresso"] for p in reversed(validas) if p.get("total_impresso")), None)
+    if total_impresso is not None:
+        resultado["total_impresso"] = total_impresso
+    sem_preco = list(dict.fromkeys(nome for nota, faltando in parciais if "erro" not in nota for nome in faltando))
+    if sem_preco:
+        resultado["itens_sem_preco"] = sem_preco
+    resultado = recalcular_totais_nota(resultado)
+
+    # Faixas lidas por modelos diferentes (troca para o reserva no meio) não valem por nenhum dos dois
+    modelos = {rota["modelo"] for rota in rotas}
+    if len(modelos) == 1:
+        _cache_notas.guardar(chave_cache_nota(hash_original, perfil, modelos.pop()), resultado)
+    return resultado
+
+
+def extrair_varias_notas(arquivos: list, perfil: str = "equilibrado") -> dict:
+    """
+    Lê várias notas (açougue, mercado, gelo...) ao mesmo tempo e junta tudo numa só.
+    arquivos é uma lista de (nome_arquivo, bytes_originais). Cada nota passa pelo
+    pré-processamento e é cacheada separadamente; notas compridas vão em faixas.
+    Retorna {"nota": nota_mesclada | None, "erros": {nome: msg}, "relatorios": {nome: relatorio}}.
+    """
+    return executar_async(extrair_varias_notas_async(arquivos, perfil))
+
+
+async def extrair_varias_notas_async(arquivos: list, perfil: str = "equilibrado") -> dict:
+    """Versão assíncrona de extrair_varias_notas."""
+    nomes = _nomes_unicos([nome for nome, _ in arquivos])
+    resultados = await reunir(
+        *[_ler_arquivo_nota_async(conteudo, perfil) for _, conteudo in arquivos],
+        return_exceptions=True
+    )
+
+    notas = []
+    erros = {}
+    relatorios = {}
+    for nome, resultado in zip(nomes, resultados):
+        if isinstance(resultado, BaseException):
+            erros[nome] = str(resultado)
+            continue
+        nota, relatorio = resultado
+        if relatorio:
+            relatorios[nome] = relatorio
+        if "erro" in nota:
+            erros[nome] = nota["erro"]
+        else:
+            notas.append((nome, nota))
+
+    return {
+        "nota": mesclar_notas(notas) if notas else None,
+        "erros": erros,
+        "relatorios": relatorios,
+    }
+
+
+async def _ler_arquivo_nota_async(conteudo: bytes, perfil: str) -> tuple:
+    """Lê um arquivo de nota: cache pelo hash do original e perfil, senão pré-processa e chama o Vision."""
+    from imagem_utils import preparar_nota
+
+    hash_original = hash_arquivo(conteudo)
+    nota = buscar_nota_em_cache(hash_original, perfil)
+    if nota is not None:
+        return nota, None
+
+    # Pillow é CPU: roda fora do event loop para as outras notas seguirem em paralelo.
+    # Se é nota comprida (faixas) só dá para saber depois de recortar o papel.
+    imagens, relatorio = await asyncio.to_thread(preparar_nota, conteudo, perfil)
+    if "faixas" in relatorio:
+        nota = await extrair_itens_nota_em_faixas_async(imagens, hash_original=hash_original, perfil=perfil)
+    else:
+        nota = await extrair_itens_nota_async(imagens[0], hash_original=hash_original, perfil=perfil)
+    return nota, relatorio
+
+
+def _nomes_unicos(nomes: list) -> list:
+    """Evita duas notas com o mesmo nome de arquivo ('nota.jpg', 'nota.jpg (2)')."""
+    vistos = {}
+    unicos = []
+    for nome in nomes:
+        vistos[nome] = vistos.get(nome, 0) + 1
+        unicos.append(nome if vistos[nome] == 1 else f"{nome} ({vistos[nome]})")
+    return unicos
+
+
+def mesclar_notas(notas: list) -> dict:
+    """
+    Junta várias notas [(origem, nota)] numa entrada só para calcular_divisao.
+    Cada item ganha o campo "origem" com o nome da nota de onde veio.
+    """
+    itens = []
+    resumo_notas = []
+    for origem, nota in notas:
+        itens_nota = [{**item, "origem": origem} for item in nota.get("itens", [])]
+        itens.extend(itens_nota)
+        resumo_notas.append({
+            "origem": origem,
+            "estabelecimento": nota.get("estabelecimento"),
+            "data_compra": nota.get("data_compra"),
+            "itens": len(itens_nota),
+            "total": round(sum(item["preco"] for item in itens_nota), 2),
+        })
+
+    estabelecimentos = list(dict.fromkeys(n["estabelecimento"] for n in resumo_notas if n["estabelecimento"]))
+    mesclada = {
+        "itens": itens,
+        "notas": resumo_notas,
+        "estabelecimento": " + ".join(estabelecimentos) or None,
+        "data_compra": next((n["data_compra"] for n in resumo_notas if n["data_compra"]), None),
+    }
+    sem_preco = [f"{nome} ({origem})" for origem, nota in notas for nome in nota.get("itens_sem_preco", [])]
+    if sem_preco:
+        mesclada["itens_sem_preco"] = sem_preco
+    return recalcular_totais_nota(mesclada)
+
+
+def _mesmo_item(a: dict, b: dict) -> bool:
+    """Compara itens de faixas vizinhas: mesmo preço e nome parecido (a borda pode cortar letras)."""
+    try:
+        if round(float(a.get("preco", 0)), 2) != round(float(b.get("preco", 0)), 2):
+            return False
+    except (TypeError, ValueError):
+        return False
+    nome_a = normalizar_texto(str(a.get("nome", "")))
+    nome_b = normalizar_texto(str(b.get("nome", "")))
+    return nome_a == nome_b or difflib.SequenceMatcher(None, nome_a, nome_b).ratio() >= 0.8
+
+
+def mesclar_itens_faixas(listas: list, max_sobreposicao: int = 8) -> list:
+    """
+    Junta as listas de itens de faixas consecutivas.
+    A sobreposição aparece como o fim de uma faixa repetido no começo da seguinte;
+    remove o maior trecho repetido assim (até max_sobreposicao itens), o que preserva
+    itens iguais comprados de propósito mais de uma vez em outros pontos da nota.
+    """
+    mesclados = []
+    anteriores = []
+    for itens in listas:
+        repetidos = 0
+        limite = min(len(anteriores), len(itens), max_sobreposicao)
+        for k in range(limite, 0, -1):
+            if all(_mesmo_item(x, y) for x, y in zip(anteriores[-k:], itens[:k])):
+                repetidos = k
+                break
+        mesclados.extend(itens[repetidos:])
+        anteriores = itens
+    return mesclados
+
+
+def _requisicao_nota(image_bytes: bytes, faixa: tuple | None = None, apos_item: str | None = None) -> dict:
+    """
+    Monta os parâmetros da chamada de Vision que lê a nota.
+    faixa=(i, n) avisa o modelo que a imagem é só um pedaço de uma nota comprida;
+    apos_item pede só os itens que vêm depois dele (continuação de uma resposta cortada).
+    """
     base64_image = base64.b64encode(image_bytes).decode('utf-8')
     
     prompt = """Analise esta nota fiscal/cupom de supermercado e extraia TODOS os itens com seus preços.
@@ -165,10 +1110,22 @@ Retorne APENAS um JSON válido neste formato (sem markdown):
 Se não conseguir ler algum valor, faça sua melhor estimativa.
 Se a imagem não for uma nota fiscal, retorne: {"erro": "Não consegui identificar uma nota fiscal nesta imagem"}"""
 
-    client = get_openai_client()
-    response = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[
+    if faixa:
+        prompt = f"""ATENÇÃO: esta imagem é a faixa {faixa[0]} de {faixa[1]} de uma nota fiscal comprida, cortada na horizontal com um pouco de sobreposição entre as faixas.
+Extraia só os itens desta faixa, na ordem em que aparecem, e ignore linhas cortadas pela borda.
+Não retorne erro só porque a nota está incompleta.
+
+""" + prompt
+
+    if apos_item:
+        prompt = f"""ATENÇÃO: os itens desta nota até "{apos_item}" (inclusive) já foram lidos.
+Extraia APENAS os itens que aparecem DEPOIS dele, no mesmo formato.
+
+""" + prompt
+
+    return {
+        "model": MODELO_PADRAO,
+        "messages": [
             {
                 "role": "user",
                 "content": [
@@ -177,18 +1134,52 @@ Se a imagem não for uma nota fiscal, retorne: {"erro": "Não consegui identific
                 ]
             }
         ],
-        response_format={"type": "json_object"},
-        max_tokens=2000
-    )
-    
-    content = response.choices[0].message.content or "{}"
-    return json.loads(content)
+        "response_format": {"type": "json_object"},
+        "max_tokens": 2000
+    }
+
+
+def _requisicao_precos_nota(image_bytes: bytes, nomes: list) -> dict:
+    """Pede à IA só o preço dos itens da nota que vieram sem preço legível."""
+    base64_image = base64.b64encode(image_bytes).decode('utf-8')
+    prompt = f"""Nesta nota fiscal, informe APENAS o preço destes itens: {', '.join(nomes)}.
+
+Retorne JSON: {{"itens": [{{"nome": "nome como está na lista", "preco": 0.00, "alcoolica": false}}]}}
+Se não conseguir ler um valor, faça sua melhor estimativa."""
+
+    return {
+        "model": MODELO_PADRAO,
+        "messages": [
+            {
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": prompt},
+                    {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"}}
+                ]
+            }
+        ],
+        "response_format": {"type": "json_object"},
+        "max_tokens": 400
+    }
 
 
 # ============================================
 # FUNÇÕES DE CÁLCULO DE DIVISÃO
 # ============================================
 
+def recalcular_totais_nota(nota: dict) -> dict:
+    """Recalcula total_nota, total_alcoolico e total_nao_alcoolico a partir dos itens."""
+    itens = nota.get("itens", [])
+    total_alcoolico = sum(item["preco"] for item in itens if item.get("alcoolica", False))
+    total_nao_alcoolico = sum(item["preco"] for item in itens if not item.get("alcoolica", False))
+    return {
+        **nota,
+        "total_nota": round(total_alcoolico + total_nao_alcoolico, 2),
+        "total_alcoolico": round(total_alcoolico, 2),
+        "total_nao_alcoolico": round(total_nao_alcoolico, 2),
+    }
+
+
 def calcular_divisao(itens: list, participantes: list, quem_bebeu: list) -> dict:
     """Calcula a divisão justa da conta."""
     total_alcoolico = sum(item['preco'] for item in itens if item.get('alcoolica', False))
@@ -227,14 +1218,130 @@ def calcular_divisao(itens: list, participantes: list, quem_bebeu: list) -> dict
 # FUNÇÕES DE COBRANÇA WHATSAPP
 # ============================================
 
-@retry(
-    stop=stop_after_attempt(5),
-    wait=wait_exponential(multiplier=1, min=2, max=64),
-    retry=retry_if_exception(is_rate_limit_error),
-    reraise=True
+def _gerar_modelos_pool(categoria: str, quantidade: int) -> list:
+    """Pede à IA `quantidade` modelos de mensagem com lacunas para uma categoria do pool."""
+    return _ler_json(_criar_resposta(_requisicao_pool(categoria, quantidade), "pool_mensagens")).get("mensagens", [])
+
+
+def _requisicao_pool(categoria: str, quantidade: int) -> dict:
+    """Monta os parâmetros da chamada que gera modelos de mensagem para o pool."""
+    situacoes = {
+        "bebeu": "A pessoa BEBEU álcool: piadas sobre a ressaca e sobre ter bebido como se não houvesse amanhã.",
+        "nao_bebeu": "A pessoa NÃO bebeu álcool: piadas sobre o prejuízo que deu na picanha/carne.",
+        "caloteiro_leve": "A pessoa é caloteira há {dias} dia(s): cobrança leve, só uma cutucada.",
+        "caloteiro_medio": "A pessoa é caloteira há {dias} dias: pressão cômica, ameaça contar pra galera.",
+        "caloteiro_pesado": "A pessoa é caloteira há {dias} dias: zoeira pesada (sem ofender de verdade), já virou lenda no grupo.",
+    }
+    lacunas = "{nome}, {valor}" + (" e {dias}" if categoria.startswith("caloteiro") else " e {pix}")
+    prompt = f"""Gere {min(quantidade, 10)} mensagens DIFERENTES de cobrança de churrasco para WhatsApp.
+
+Situação: {situacoes[categoria]}
+
+Use exatamente estas lacunas, com chaves, no lugar dos dados reais: {lacunas}.
+- {{valor}} já vem formatado (ex: "R$ 85.00"): não escreva "R$" antes dele.
+- Não use nenhuma outra chave {{ }} no texto.
+- Máximo de 4-5 linhas, gírias brasileiras e emojis.
+
+Retorne JSON: {{"mensagens": ["...", "..."]}}"""
+
+    return {
+        "model": MODELO_PADRAO,
+        "messages": [
+            {"role": "system", "content": "Você é o 'Churrasqueiro Sincerão': brasileiro, engraçado, levemente irônico, mas amigo."},
+            {"role": "user", "content": prompt}
+        ],
+        "response_format": {"type": "json_object"},
+        "max_tokens": 1500
+    }
+
+
+def chave_cache_pool() -> str:
+    """Chave do estoque do pool: versão do prompt + o modelo que o roteador usa agora para gerá-lo."""
+    modelo = roteador_ia.modelo_atual("pool_mensagens", MODELO_PADRAO)
+    return gerar_chave_cache("pool_mensagens", PROMPT_VERSAO_POOL, modelo)
+
+
+# Modelos da IA pré-gerados: com extra_zoeira a cobrança sai do pool em vez de esperar a IA
+_pool_mensagens = PoolMensagens(
+    _gerar_modelos_pool,
+    CacheRespostas("pool_mensagens", max_itens=8, ttl_segundos=30 * 24 * 3600),
+    chave_cache=chave_cache_pool,
 )
-def gerar_cobranca_whatsapp(nome: str, valor: float, itens_consumidos: list | None = None, pix_key: str = "churrasco@pix.com", bebeu: bool = False) -> str:
-    """Gera mensagem amigável de cobrança com personalidade Sincera."""
+
+
+def aquecer_pool_mensagens():
+    """Começa a encher, em segundo plano, as categorias do pool que estão com pouco estoque."""
+    _pool_mensagens.aquecer()
+
+
+def estatisticas_pool_mensagens() -> dict:
+    """Estoque e uso do pool de mensagens pré-geradas."""
+    return _pool_mensagens.estatisticas()
+
+
+def _cobranca_do_pool(nome: str, valor: float, pix_key: str | None, bebeu: bool = False,
+                      dias_atraso: int | None = None) -> str | None:
+    texto = _pool_mensagens.servir(categoria_pool(bebeu, dias_atraso), nome, valor, pix_key, dias_atraso or 0)
+    # Pool vazio conta como miss: a chamada à IA que vem em seguida é o custo dele
+    metricas_ia.registrar_cache(
+        "gerar_cobranca_caloteiro" if dias_atraso is not None else "gerar_cobranca_whatsapp", texto is not None
+    )
+    return texto
+
+
+def gerar_cobranca_whatsapp(
+    nome: str,
+    valor: float,
+    itens_consumidos: list | None = None,
+    pix_key: str = "churrasco@pix.com",
+    bebeu: bool = False,
+    extra_zoeira: bool = False,
+    persona: str = PERSONA_PADRAO,
+    semente: int | None = None,
+    usar_pool: bool = True
+) -> str:
+    """
+    Gera mensagem amigável de cobrança com personalidade Sincera.
+    Por padrão a mensagem é montada na hora pelo banco de frases (mensagens_utils);
+    com extra_zoeira=True quem escreve é a IA: primeiro tenta um modelo pré-gerado
+    do pool (usar_pool) e só chama a IA na hora se o pool estiver vazio.
+    """
+    if not extra_zoeira:
+        metricas_ia.registrar_local("gerar_cobranca_whatsapp")
+        return compor_cobranca(nome, valor, pix_key, bebeu, itens_consumidos, persona, semente)
+    texto = _cobranca_do_pool(nome, valor, pix_key, bebeu) if usar_pool else None
+    if texto is not None:
+        return texto
+    return _ler_texto(_criar_resposta(
+        _requisicao_cobranca(nome, valor, itens_consumidos, pix_key, bebeu), "gerar_cobranca_whatsapp"
+    ))
+
+
+async def gerar_cobranca_whatsapp_async(
+    nome: str,
+    valor: float,
+    itens_consumidos: list | None = None,
+    pix_key: str = "churrasco@pix.com",
+    bebeu: bool = False,
+    extra_zoeira: bool = False,
+    persona: str = PERSONA_PADRAO,
+    semente: int | None = None,
+    usar_pool: bool = True
+) -> str:
+    """Versão assíncrona de gerar_cobranca_whatsapp."""
+    if not extra_zoeira:
+        metricas_ia.registrar_local("gerar_cobranca_whatsapp")
+        return compor_cobranca(nome, valor, pix_key, bebeu, itens_consumidos, persona, semente)
+    texto = _cobranca_do_pool(nome, valor, pix_key, bebeu) if usar_pool else None
+    if texto is not None:
+        return texto
+    return _ler_texto(await _criar_resposta_async(
+        _requisicao_cobranca(nome, valor, itens_consumidos, pix_key, bebeu), "gerar_cobranca_whatsapp"
+    ))
+
+
+def _requisicao_cobranca(nome: str, valor: float, itens_consumidos: list | None, pix_key: str, bebeu: bool) -> dict:
+    """Monta os parâmetros da chamada da mensagem de cobrança."""
     itens_texto = ""
     if itens_consumidos:
         itens_texto = f"Itens do rolê: {', '.join(itens_consumidos[:5])}"
@@ -281,27 +1388,61 @@ Exemplo (Não Bebeu):
 💸 Pix: nomedopix@email.com"
 """
 
-    client = get_openai_client()
-    response = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[
+    return {
+        "model": MODELO_PADRAO,
+        "messages": [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": prompt}
         ],
-        max_tokens=400
-    )
-    
-    return response.choices[0].message.content or ""
+        "max_tokens": 400
+    }
 
 
-@retry(
-    stop=stop_after_attempt(5),
-    wait=wait_exponential(multiplier=1, min=2, max=64),
-    retry=retry_if_exception(is_rate_limit_error),
-    reraise=True
-)
-def gerar_cobranca_caloteiro(nome: str, valor: float, dias_atraso: int = 3) -> str:
-    """Gera mensagem de cobrança para caloteiros."""
+def gerar_cobranca_caloteiro(
+    nome: str,
+    valor: float,
+    dias_atraso: int = 3,
+    extra_zoeira: bool = False,
+    pix_key: str | None = None,
+    persona: str = PERSONA_PADRAO,
+    semente: int | None = None,
+    usar_pool: bool = True
+) -> str:
+    """
+    Gera mensagem de cobrança para caloteiros: local por padrão; com extra_zoeira=True,
+    do pool de modelos da IA ou, se ele estiver vazio, da IA na hora.
+    """
+    if not extra_zoeira:
+        metricas_ia.registrar_local("gerar_cobranca_caloteiro")
+        return compor_caloteiro(nome, valor, dias_atraso, pix_key, persona, semente)
+    texto = _cobranca_do_pool(nome, valor, pix_key, dias_atraso=dias_atraso) if usar_pool else None
+    if texto is not None:
+        return texto
+    return _ler_texto(_criar_resposta(_requisicao_caloteiro(nome, valor, dias_atraso), "gerar_cobranca_caloteiro"))
+
+
+async def gerar_cobranca_caloteiro_async(
+    nome: str,
+    valor: float,
+    dias_atraso: int = 3,
+    extra_zoeira: bool = False,
+    pix_key: str | None = None,
+    persona: str = PERSONA_PADRAO,
+    semente: int | None = None,
+    usar_pool: bool = True
+) -> str:
+    """Versão assíncrona de gerar_cobranca_caloteiro."""
+    if not extra_zoeira:
+        metricas_ia.registrar_local("gerar_cobranca_caloteiro")
+        return compor_caloteiro(nome, valor, dias_atraso, pix_key, persona, semente)
+    texto = _cobranca_do_pool(nome, valor, pix_key, dias_atraso=dias_atraso) if usar_pool else None
+    if texto is not None:
+        return texto
+    return _ler_texto(await _criar_resposta_async(_requisicao_caloteiro(nome, valor, dias_atraso), "gerar_cobranca_caloteiro"))
+
+
+def _requisicao_caloteiro(nome: str, valor: float, dias_atraso: int) -> dict:
+    """Monta os parâmetros da chamada da mensagem para caloteiro."""
     prompt = f"""Gere uma mensagem MUITO engraçada de cobrança para um "caloteiro" depois de um churrasco.
 
 Nome: {nome}
@@ -320,114 +1461,210 @@ Exemplo de tom: "Fala Pedro! A Picanha já foi digerida e virou saudade, mas o P
 
 Retorne APENAS a mensagem, sem aspas."""
 
-    client = get_openai_client()
-    response = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[
+    return {
+        "model": MODELO_PADRAO,
+        "messages": [
             {"role": "system", "content": "Você é um mestre da zueira cobrando o caloteiro do churrasco."},
             {"role": "user", "content": prompt}
         ],
-        max_tokens=400
+        "max_tokens": 400
+    }
+
+
+def gerar_cobrancas_em_lote(
+    divisao: dict,
+    quem_bebeu: list,
+    pix_key: str = "churrasco@pix.com",
+    pix_nome: str | None = None,
+    pix_cidade: str | None = None,
+    incluir_caloteiro: bool = False,
+    dias_atraso: int = 3,
+    cancelamento: threading.Event | None = None,
+    extra_zoeira: bool = False,
+    persona: str = PERSONA_PADRAO,
+    evento: str = ""
+) -> dict:
+    """
+    Gera as cobranças de todo mundo de uma vez: na hora pelo banco de frases ou,
+    com extra_zoeira=True, com as chamadas à IA em paralelo.
+    divisao é o dict {pessoa: valor} de calcular_divisao(...)["divisao"].
+    evento identifica o churrasco no livro de cobranças (ver LivroCobrancas).
+    Retorna {"mensagens": {...}, "erros": {...}} com as mesmas chaves usadas em
+    st.session_state.mensagens_cobranca ("Ana", "Ana_caloteiro", "Ana_pix").
+    """
+    return executar_async(
+        gerar_cobrancas_em_lote_async(
+            divisao, quem_bebeu, pix_key, pix_nome, pix_cidade, incluir_caloteiro, dias_atraso,
+            extra_zoeira, persona, evento
+        ),
+        cancelamento
     )
-    
-    return response.choices[0].message.content or ""
+
+
+async def gerar_cobrancas_em_lote_async(
+    divisao: dict,
+    quem_bebeu: list,
+    pix_key: str = "churrasco@pix.com",
+    pix_nome: str | None = None,
+    pix_cidade: str | None = None,
+    incluir_caloteiro: bool = False,
+    dias_atraso: int = 3,
+    extra_zoeira: bool = False,
+    persona: str = PERSONA_PADRAO,
+    evento: str = ""
+) -> dict:
+    """Versão assíncrona de gerar_cobrancas_em_lote (concorrência limitada pelo semáforo global)."""
+    mensagens = {}
+    erros = {}
+
+    # Pix é cálculo local: não precisa esperar a IA
+    if pix_nome and pix_cidade:
+        descricoes = {pessoa: f"Churras-{pessoa[:10]}" for pessoa in divisao}
+        txids = livro_cobrancas.registrar_lote(pix_key, divisao, descricoes, evento)
+        payloads = gerar_payloads_pix(pix_key, pix_nome, pix_cidade, divisao, descricoes, txids)
+        for pessoa, payload in payloads.items():
+            mensagens[f"{pessoa}_pix"] = payload
+
+    tarefas = {}
+    for pessoa, valor in divisao.items():
+        tarefas[pessoa] = gerar_cobranca_whatsapp_async(
+            pessoa, valor, pix_key=pix_key, bebeu=pessoa in quem_bebeu, extra_zoeira=extra_zoeira, persona=persona
+        )
+        if incluir_caloteiro:
+            tarefas[f"{pessoa}_caloteiro"] = gerar_cobranca_caloteiro_async(
+                pessoa, valor, dias_atraso=dias_atraso, extra_zoeira=extra_zoeira, pix_key=pix_key, persona=persona
+            )
+
+    resultados = await reunir(*tarefas.values(), return_exceptions=True)
+    for chave, resultado in zip(tarefas, resultados):
+        if isinstance(resultado, BaseException):
+            erros[chave] = str(resultado)
+        else:
+            mensagens[chave] = resultado
+
+    return {"mensagens": mensagens, "erros": erros}
 
 
 # ============================================
 # FUNÇÕES DE QR CODE PIX
 # ============================================
 
-def gerar_payload_pix(chave_pix: str, nome_recebedor: str, cidade: str, valor: float, descricao: str = "") -> str:
-    """
-    Gera payload do Pix no formato EMV.
-    Baseado na especificação do Banco Central do Brasil.
-    """
-    def formatar_campo(id_campo: str, valor_campo: str) -> str:
-        tamanho = str(len(valor_campo)).zfill(2)
-        return f"{id_campo}{tamanho}{valor_campo}"
-    
-    # Limpar e formatar valores
-    nome_recebedor = nome_recebedor[:25].upper()
-    cidade = cidade[:15].upper()
-    valor_formatado = f"{valor:.2f}"
-    
-    # Merchant Account Information (campo 26)
-    gui = formatar_campo("00", "br.gov.bcb.pix")
-    chave = formatar_campo("01", chave_pix)
-    if descricao:
-        desc = formatar_campo("02", descricao[:25])
-        mai = formatar_campo("26", gui + chave + desc)
-    else:
-        mai = formatar_campo("26", gui + chave)
-    
-    # Additional Data Field (campo 62)
-    txid = formatar_campo("05", "***")
-    adf = formatar_campo("62", txid)
-    
-    # Montar payload sem CRC
-    payload = (
-        formatar_campo("00", "01") +  # Payload Format Indicator
-        formatar_campo("01", "12") +  # Point of Initiation (12 = QR dinâmico)
-        mai +
-        formatar_campo("52", "0000") +  # Merchant Category Code
-        formatar_campo("53", "986") +   # Transaction Currency (986 = BRL)
-        formatar_campo("54", valor_formatado) +
-        formatar_campo("58", "BR") +    # Country Code
-        formatar_campo("59", nome_recebedor) +
-        formatar_campo("60", cidade) +
-        adf +
-        "6304"  # CRC placeholder
-    )
-    
-    # Calcular CRC16 CCITT
-    crc = calcular_crc16(payload)
-    
-    return payload + crc
+def _molde_pix(payload: str) -> str | None:
+    """Chave, recebedor e cidade do payload: cobranças com o mesmo molde reaproveitam a máscara do QR."""
+    try:
+        campos = decodificar_payload_pix(payload)
+    except PayloadPixInvalido:
+        return None
+    conta = campos.get("26")
+    chave = conta.get("01", "") if isinstance(conta, dict) else ""
+    return f"{chave}|{campos.get('59', '')}|{campos.get('60', '')}"
 
 
-def calcular_crc16(payload: str) -> str:
-    """Calcula CRC16 CCITT para o payload Pix."""
-    crc = 0xFFFF
-    for byte in payload.encode('utf-8'):
-        crc ^= byte << 8
-        for _ in range(8):
-            if crc & 0x8000:
-                crc = (crc << 1) ^ 0x1021
-            else:
-                crc <<= 1
-            crc &= 0xFFFF
-    return format(crc, '04X')
+def qrcode_pix_do_payload(payload: str, formato: str = "png") -> bytes | None:
+    """
+    QR Code (PNG ou SVG) de um payload Pix, vindo do cache compartilhado entre sessões.
+    A sessão guarda só o payload e pede a imagem de novo a cada rerun.
+    """
+    if not HAS_QRCODE:
+        return None
+    return renderizador_qr.renderizar(payload, formato, molde=_molde_pix(payload))
 
 
-def gerar_qrcode_pix(chave_pix: str, nome_recebedor: str, cidade: str, valor: float, descricao: str = "") -> bytes | None:
+def gerar_qrcode_pix(chave_pix: str, nome_recebedor: str, cidade: str, valor: float, descricao: str = "",
+                     txid: str = "***", formato: str = "png") -> bytes | None:
     """Gera imagem do QR Code Pix."""
     if not HAS_QRCODE:
         return None
     
-    payload = gerar_payload_pix(chave_pix, nome_recebedor, cidade, valor, descricao)
-    
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
-        border=4,
-    )
-    qr.add_data(payload)
-    qr.make(fit=True)
-    
-    img = qr.make_image(fill_color="black", back_color="white")
-    
-    # Converter para bytes
-    buffer = io.BytesIO()
-    img.save(buffer, format='PNG')
-    buffer.seek(0)
-    
-    return buffer.getvalue()
+    payload = gerar_payload_pix(chave_pix, nome_recebedor, cidade, valor, descricao, txid)
+    return qrcode_pix_do_payload(payload, formato)
+
 
+def estatisticas_qrcode() -> dict:
+    """Acertos do cache de QR codes, bytes ocupados e tempo médio de renderização."""
+    return renderizador_qr.estatisticas()
 
-def gerar_link_pix_copia_cola(chave_pix: str, nome_recebedor: str, cidade: str, valor: float, descricao: str = "") -> str:
+
+def gerar_link_pix_copia_cola(chave_pix: str, nome_recebedor: str, cidade: str, valor: float, descricao: str = "",
+                              txid: str = "***") -> str:
     """Gera o código Pix Copia e Cola."""
-    return gerar_payload_pix(chave_pix, nome_recebedor, cidade, valor, descricao)
+    return gerar_payload_pix(chave_pix, nome_recebedor, cidade, valor, descricao, txid)
+
+
+def registrar_cobranca_pix(chave_pix: str, pessoa: str, valor: float, descricao: str = "", evento: str = "") -> str:
+    """
+    txid da cobrança no livro (o mesmo enquanto ela estiver em aberto), para o QR e o copia e cola.
+    evento é o churrasco (ex.: gerar_id_churrasco()): um valor novo só substitui a cobrança
+    anterior da pessoa no mesmo evento.
+    """
+    return livro_cobrancas.registrar(chave_pix, pessoa, valor, descricao, evento)
+
+
+# ============================================
+# EXPORTAÇÃO DAS COBRANÇAS EM LOTE
+# ============================================
+
+def exportar_cobrancas_pix(
+    divisao: dict,
+    pix_key: str,
+    pix_nome: str,
+    pix_cidade: str,
+    formato: str = "zip",
+    imagem: str = "png",
+    mensagens: dict | None = None,
+    quem_bebeu: list | None = None,
+    persona: str = PERSONA_PADRAO,
+    destino=None,
+    evento: str = ""
+) -> dict:
+    """
+    Exporta QR, copia e cola, txid e mensagem de todo mundo da divisão num arquivo só:
+    ZIP (imagens PNG/SVG + cobrancas.csv) ou PDF (uma página por pessoa).
+    As mensagens já geradas (st.session_state.mensagens_cobranca) são reaproveitadas;
+    quem não tem mensagem recebe uma do banco de frases, sem IA.
+    Sem `destino`, o arquivo volta em bytes na chave "conteudo", junto com o tempo gasto.
+    """
+    mensagens = mensagens or {}
+    quem_bebeu = quem_bebeu or []
+    descricoes = {pessoa: f"Churras-{pessoa[:10]}" for pessoa in divisao}
+    txids = livro_cobrancas.registrar_lote(pix_key, divisao, descricoes, evento)
+    payloads = gerar_payloads_pix(pix_key, pix_nome, pix_cidade, divisao, descricoes, txids)
+
+    cobrancas = [
+        {
+            "pessoa": pessoa,
+            "valor": valor,
+            "payload": payloads[pessoa],
+            "txid": txids[pessoa],
+            "mensagem": mensagens.get(pessoa) or compor_cobranca(
+                pessoa, valor, pix_key, bebeu=pessoa in quem_bebeu, persona=persona
+            ),
+        }
+        for pessoa, valor in divisao.items()
+    ]
+    molde = _molde_pix(cobrancas[0]["payload"]) if cobrancas else None
+    saida = destino if destino is not None else io.BytesIO()
+    relatorio = exportar_cobrancas(cobrancas, saida, formato, imagem, molde)
+    if destino is None:
+        relatorio["conteudo"] = saida.getvalue()
+    return relatorio
+
+
+# ============================================
+# FUNÇÕES DE CONCILIAÇÃO PIX
+# ============================================
+
+def conciliar_extrato_pix(arquivo, chave_pix: str, janela_dias: int = 3, formato: str | None = None) -> dict:
+    """
+    Confere o extrato do banco (CSV ou OFX) contra as cobranças em aberto da chave Pix
+    e dá baixa nas que foram pagas. Retorna conciliados, ambíguos, não identificados,
+    duplicados e o que continua em aberto (ver conciliacao_utils.conciliar).
+    Cobranças substituídas entram só para reconhecer quem pagou o QR antigo.
+    """
+    cobrancas = livro_cobrancas.em_aberto(chave_pix, incluir_substituidas=True)
+    resultado = conciliar(ler_extrato(arquivo, formato), cobrancas, janela_dias)
+    livro_cobrancas.marcar_pagas(resultado["conciliados"])
+    return resultado
 
 
 # ============================================